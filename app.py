@@ -1,33 +1,61 @@
+import time
+PROCESS_START = time.perf_counter() # Taken before the other imports so --profile can time them
+
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+import argparse
 import json
 import os
 import sys # Access system-specific parameters
 import database # database.py file
+import db_connection
 from database import UserPreferences
+from workers import TkFuturePump
+from frame_cache import ToolFrameCache
+from profiler import Profiler, DEFAULT_PROFILE_FILE
+from scheduler import TkScheduler
+from monitor import LatencyMonitor, DEFAULT_REPORT_FILE
+from reloader import ToolReloader, WATCH_INTERVAL_MS
 from ttkthemes import ThemedTk
 
-# --- tool imports from package ---
-from tools.buttoncommand import ButtonCommand
-from tools.calculator import CalculatorTool
-from tools.clock import ClockTool
-from tools.homepage import Homepage
-from tools.snakegame import SnakeGameTool
-from tools.testzonetool import TestZoneTool
-from tools.timezoneconverter import TimezoneTool
-from tools.diffchecker import DiffChecker
-from tools.toolbase import ToolBase
+# --- tool registry ---
+# Tool modules are imported on first use, so startup only pays for the Homepage.
+from tools import registry
+
+IMPORTS_DONE = time.perf_counter()
 
 # --- Configuration ---
 USER_DATA_DIR = "user_data"
 DEFAULT_USER = "default_user"
-DEFAULT_TOOL = None
+DEFAULT_TOOL = "Homepage" # Registry name of the tool shown on startup
+
+# --- Switch User Dialog ---
+class UserSwitchDialog(simpledialog.Dialog):
+    """Asks for a username, suggesting existing users as you type. The answer ends up in .result"""
+    def body(self, master):
+        ttk.Label(master, text="Enter username:").pack(anchor=tk.W, padx=5, pady=(5, 0))
+        self.username_combo = ttk.Combobox(master, values=database.list_usernames(), width=30)
+        self.username_combo.pack(fill=tk.X, padx=5, pady=5)
+        # Narrow the suggestions down to usernames starting with what was typed
+        self.username_combo.bind("<KeyRelease>", self.update_suggestions)
+        return self.username_combo # Initial focus
+
+    def update_suggestions(self, event=None):
+        self.username_combo.config(values=database.list_usernames(self.username_combo.get()))
+
+    def apply(self):
+        self.result = self.username_combo.get()
 
 # --- Main Application ---
 class DigitalToolboxApp:
-    def __init__(self, root):
+    # profiler: optional profiler.Profiler that records startup phases and tool switches
+    # monitor: if True, time every menu command, hotkey and timer callback (see monitor.py)
+    # watch: if True, reload tool modules automatically when their source files change
+    def __init__(self, root, profiler=None, monitor=False, watch=False):
         self.root = root
         self.root.title("Digital Toolbox")
+        self.profiler = profiler if profiler is not None else Profiler(enabled=False)
+        self.monitor = LatencyMonitor(current_tool=self._current_tool_name) if monitor else None
 
         # The size of a frame is determined by the size and layout of any widgets within it. 
         # In turn, this is controlled by the geometry manager that manages the contents of the frame itself.
@@ -37,7 +65,8 @@ class DigitalToolboxApp:
         # self.root.attributes('-fullscreen', True)
         # root.state('zoomed')
 
-        self.root.set_theme("black")
+        with self.profiler.phase("theme_load"):
+            self.root.set_theme("black")
 
         # This line tells Tkinter to call our custom quit_app function
         # whenever the user clicks the 'X' button on the window.
@@ -47,39 +76,55 @@ class DigitalToolboxApp:
         # --- Set up the hotkey binding ---
         # The .bind() method links an event pattern to a callback function.
         # This is bound to the root window, so it works globally.
-        self.root.bind('<Control-q>', self.quit_app)
-        self.root.bind('<Control-r>', self.restart_app)
-        self.root.bind('<Control-h>', self.return_to_homepage)
+        # instrument() only wraps the handlers when the latency monitor is on.
+        self.root.bind('<Control-q>', self.instrument(self.quit_app, "<Control-q>"))
+        self.root.bind('<Control-r>', self.instrument(self.reload_tools, "<Control-r>"))
+        self.root.bind('<Control-R>', self.instrument(self.restart_app, "<Control-R>")) # Ctrl+Shift+R
+        self.root.bind('<Control-h>', self.instrument(self.return_to_homepage, "<Control-h>"))
+
+        # All preference writes go through one background thread; results come back via the pump
+        self.db_worker = database.DatabaseWorker()
+        self.db_pump = TkFuturePump(self.root)
 
         self.current_user = DEFAULT_USER
-        self.user_prefs = UserPreferences(self.current_user)
+        # Recently used users stay loaded, so switching back to them is instant
+        self.user_sessions = database.UserSessionCache(self._load_user_prefs)
+        with self.profiler.phase("load_user_prefs"):
+            self.user_prefs = self.user_sessions.get(self.current_user)
+
+        # Shared timer service for the tools' periodic work (see ToolBase.schedule_every)
+        self.scheduler = TkScheduler(self.root)
+        if self.monitor:
+            self.scheduler.run_hooks.append(self.monitor.on_scheduler_job)
 
         self.current_tool_frame = None
+        # Hidden tool frames are kept here so switching back doesn't rebuild them
+        self.frame_cache = ToolFrameCache()
 
         # --- Menu ---
+        menu_start = time.perf_counter()
         menubar = tk.Menu(root)
         root.config(menu=menubar)
 
         # File Menu
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="Switch User", command=self.switch_user)
+        file_menu.add_command(label="Switch User", command=self.instrument(self.switch_user, "File > Switch User"))
         file_menu.add_separator()
-        file_menu.add_command(label="Restart (Ctrl+R)", command=self.restart_app)
+        file_menu.add_command(label="Reload Tools (Ctrl+R)", command=self.instrument(self.reload_tools, "File > Reload Tools"))
+        file_menu.add_command(label="Full Restart (Ctrl+Shift+R)", command=self.instrument(self.restart_app, "File > Restart"))
+        if self.monitor:
+            file_menu.add_command(label="Dump Latency Report", command=self.dump_latency_report)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit (Ctrl+Q)", command=self.quit_app)
+        file_menu.add_command(label="Exit (Ctrl+Q)", command=self.instrument(self.quit_app, "File > Exit"))
 
         # Tools Menu
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
-        tools_menu.add_command(label="Homepage", command=lambda: self.show_tool(Homepage))
-        tools_menu.add_command(label="Calculator", command=lambda: self.show_tool(CalculatorTool))
-        tools_menu.add_command(label="Clock", command=lambda: self.show_tool(ClockTool))
-        tools_menu.add_command(label="Timezone Calculator", command=lambda: self.show_tool(TimezoneTool))
-        tools_menu.add_command(label="Snake Game", command=lambda: self.show_tool(SnakeGameTool))
-        tools_menu.add_command(label="Test Zone", command=lambda: self.show_tool(TestZoneTool))
-        tools_menu.add_command(label="Button Command", command=lambda: self.show_tool(ButtonCommand))
-        tools_menu.add_command(label="Diff Checker", command=lambda: self.show_tool(DiffChecker))
+        # One entry per registered tool; 'name=spec.name' binds each lambda to its own tool
+        for spec in registry.menu_tools():
+            tools_menu.add_command(label=spec.label, command=self.instrument(
+                lambda name=spec.name: self.show_tool(name), f"Tools > {spec.label}"))
         
         # Settings Menu (Example for Clock)
         settings_menu = tk.Menu(menubar, tearoff=0)
@@ -88,33 +133,69 @@ class DigitalToolboxApp:
         settings_menu.add_cascade(label="Clock Settings", menu=clock_settings_menu)
         
         self.clock_format_var = tk.StringVar(value=self.user_prefs.get_preference("Clock", "format", "24h"))
-        clock_settings_menu.add_radiobutton(label="24-hour Format", variable=self.clock_format_var, value="24h", command=self.update_clock_setting)
-        clock_settings_menu.add_radiobutton(label="12-hour Format", variable=self.clock_format_var, value="12h", command=self.update_clock_setting)
+        clock_settings_menu.add_radiobutton(label="24-hour Format", variable=self.clock_format_var, value="24h", command=self.instrument(self.update_clock_setting, "Settings > Clock"))
+        clock_settings_menu.add_radiobutton(label="12-hour Format", variable=self.clock_format_var, value="12h", command=self.instrument(self.update_clock_setting, "Settings > Clock"))
         
         self.clock_show_date_var = tk.BooleanVar(value=self.user_prefs.get_preference("Clock", "show_date", True))
-        clock_settings_menu.add_checkbutton(label="Show Date", variable=self.clock_show_date_var, command=self.update_clock_setting)
+        clock_settings_menu.add_checkbutton(label="Show Date", variable=self.clock_show_date_var, command=self.instrument(self.update_clock_setting, "Settings > Clock"))
+        self.profiler.record("menus", menu_start, time.perf_counter())
 
         # --- Status Bar ---
         self.status_bar = ttk.Label(root, text=f"Current User: {self.current_user}", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+        # Latency readout under the status bar, refreshed once a second (only with the monitor on)
+        if self.monitor:
+            self.latency_label = ttk.Label(root, text="", relief=tk.SUNKEN, anchor=tk.W)
+            self.latency_label.pack(side=tk.BOTTOM, fill=tk.X, before=self.status_bar)
+            self.scheduler.every(1000, self.update_latency_readout, "latency_readout", owner=self)
+
         # --- Main content area ---
         # padding & borderwidth on the *frame widget* control the 'padding' & 'border' (Box Model)
         self.main_content_frame = ttk.Frame(root, borderwidth=3, relief="groove")
         # padx & pady on the *Geometry Manager for the widget* control the 'Margin'
         self.main_content_frame.pack(fill="both", expand=True)
 
+        # Reloads changed tool modules in place (Ctrl+R), optionally whenever a source file changes
+        self.reloader = ToolReloader(self)
+        if watch:
+            self.scheduler.every(WATCH_INTERVAL_MS, lambda: self.reload_tools(quiet=True), "reload_watch", owner=self)
+
         # Show a default tool or welcome message
-        self.show_tool(DEFAULT_TOOL) # Show's a default Tool on startup
+        with self.profiler.phase("first_show_tool", tool=DEFAULT_TOOL):
+            self.show_tool(DEFAULT_TOOL) # Show's a default Tool on startup
 
     # The 'event=None' allows this method to be called by the keybinding 
     # (which sends an event object) and the menu (which doesn't).
     def quit_app(self, event=None):
         """Callback function to quit the application."""
+        # Save any preference changes still waiting for the write-behind timer
+        self.user_sessions.flush_all()
         self.root.quit()
 
+    def reload_tools(self, event=None, quiet=False):
+        """
+        Re-imports the tool modules whose source changed and rebuilds their frames,
+        keeping the window, database connection and user session (much faster than restart_app).
+        quiet=True (used by the file watcher) only updates the status bar when something reloaded.
+        """
+        self.user_prefs.flush() # Frames about to be rebuilt may have pending changes
+        try:
+            reloaded = self.reloader.reload()
+        except Exception as e:
+            self.status_bar.config(text=f"Current User: {self.current_user}  |  Reload failed: {e}")
+            self.root.report_callback_exception(*sys.exc_info()) # Full traceback on stderr
+            return
+        if reloaded:
+            self.status_bar.config(text=f"Current User: {self.current_user}  |  Reloaded: {', '.join(reloaded)}")
+        elif not quiet:
+            self.status_bar.config(text=f"Current User: {self.current_user}  |  No tool changes to reload")
+
     def restart_app(self, event=None):
         """Destroys the current window and restarts the python script."""
+        # Save pending preferences while the root (and its timers) still exists
+        self.user_sessions.flush_all()
+        self.shutdown_database()
         # First, cleanly destroy the current Tkinter window
         self.root.destroy()
         # Then, use os.execl to replace the current process with a new one.
@@ -122,42 +203,71 @@ class DigitalToolboxApp:
         # sys.argv is the list of original command line arguments.
         os.execl(sys.executable, sys.executable, *sys.argv)
 
+    def shutdown_database(self):
+        """Waits for queued database writes to finish, then closes the connections."""
+        self.db_worker.shutdown(wait=True)
+        db_connection.manager.close_all()
+
+    def _load_user_prefs(self, username):
+        """Loads a user's preferences in write-behind mode (batched, debounced commits on the DB thread)."""
+        return UserPreferences(username, write_behind=True, scheduler=self.root,
+                               backend=self.db_worker, pump=self.db_pump, on_error=self._on_preferences_error)
+
+    def _on_preferences_error(self, error):
+        """A preference write failed (it's retried on the next flush): say so and log the traceback."""
+        self.status_bar.config(text=f"Current User: {self.current_user}  |  Saving preferences failed: {error}")
+        self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+    # --- Latency monitor ---
+    def instrument(self, callback, label, tool=None):
+        """Wraps a Tk callback so the latency monitor times it; returns it unchanged when monitoring is off."""
+        if self.monitor is None:
+            return callback
+        return self.monitor.wrap(callback, label, tool)
+
+    def _current_tool_name(self):
+        frame = getattr(self, "current_tool_frame", None)
+        return frame.tool_name if frame is not None else None
+
+    def update_latency_readout(self):
+        self.latency_label.config(text=self.monitor.status_text())
+
+    def dump_latency_report(self):
+        path = self.monitor.dump(DEFAULT_REPORT_FILE)
+        messagebox.showinfo("Latency Report", f"Latency report written to:\n{os.path.abspath(path)}", parent=self.root)
+
     def return_to_homepage(self, event=None):
-        self.show_tool(Homepage)
+        self.show_tool("Homepage")
 
     def update_clock_setting(self):
+        # Saving publishes the change; a visible ClockTool is subscribed and redraws itself.
         self.user_prefs.set_preference("Clock", "format", self.clock_format_var.get())
         self.user_prefs.set_preference("Clock", "show_date", self.clock_show_date_var.get())
-        # If clock is currently shown, it should update itself via its on_show or internal logic
-        if isinstance(self.current_tool_frame, ClockTool):
-            # self.current_tool_frame.on_show() # Trigger a refresh of the clock display
-            # The clock's own update_clock loop will pick up preference changes.
-            # If on_show is called, it re-calls update_clock which is fine.
-            # Or, we could have a more specific update_display method in ClockTool.
-            # For now, the periodic update_clock will handle it.
-            # To make changes immediate, we can call update_clock directly if it's safe
-            if hasattr(self.current_tool_frame, 'update_clock'):
-                 self.current_tool_frame.update_clock()
 
     def switch_user(self):
-        new_user = simpledialog.askstring("Switch User", "Enter username:", parent=self.root)
+        new_user = UserSwitchDialog(self.root, "Switch User").result
         if new_user and new_user.strip():
             if self.current_tool_frame and hasattr(self.current_tool_frame, 'on_hide'):
                 self.current_tool_frame.on_hide()
             
-            self.user_prefs.close_connection()
+            self.user_prefs.flush() # The session stays cached for switching back
             self.current_user = new_user.strip()
-            self.user_prefs = UserPreferences(self.current_user)
+            self.user_prefs = self.user_sessions.get(self.current_user)
             
             self.status_bar.config(text=f"Current User: {self.current_user}")
             messagebox.showinfo("User Switched", f"Switched to user: {self.current_user}", parent=self.root)
             
+            # Cached frames were built from the previous user's preferences
+            self.frame_cache.clear()
+
             # Refresh current tool with new user's preferences or show default
             if self.current_tool_frame:
                 tool_class = type(self.current_tool_frame)
+                self.current_tool_frame.destroy()
+                self.current_tool_frame = None
                 self.show_tool(tool_class) # This re-instantiates the tool
             else:
-                self.show_tool(ClockTool) # Or a default welcome screen
+                self.show_tool("Clock") # Or a default welcome screen
 
             # Update settings menu variables to reflect new user's preferences
             self.clock_format_var.set(self.user_prefs.get_preference("Clock", "format", "24h"))
@@ -167,27 +277,62 @@ class DigitalToolboxApp:
             messagebox.showwarning("Invalid User", "Username cannot be empty.", parent=self.root)
 
     def show_tool(self, tool_class):
+        """Shows a tool, given either its class or its name in the tool registry."""
+        start = time.perf_counter()
+        if isinstance(tool_class, str):
+            tool_class = registry.load_tool(tool_class) # Imports the module on first use
+
         if self.current_tool_frame:
             if hasattr(self.current_tool_frame, 'on_hide'):
                 self.current_tool_frame.on_hide()
-            self.current_tool_frame.destroy()
+            # Hide the frame and keep it for later (the cache destroys it if it can't be kept)
+            self.current_tool_frame.pack_forget()
+            self.frame_cache.put(self.current_tool_frame)
             self.current_tool_frame = None # Ensure it's cleared
 
-        # Instantiate the new tool, passing the app_controller (self)
-        self.current_tool_frame = tool_class(self.main_content_frame, self)
+        # Commit whatever the previous tool changed as one batch
+        self.user_prefs.flush()
+
+        # Reuse the hidden frame if we have one, otherwise instantiate the new tool,
+        # passing the app_controller (self)
+        self.current_tool_frame = self.frame_cache.take(tool_class)
+        cached = self.current_tool_frame is not None
+        if not cached:
+            self.current_tool_frame = tool_class(self.main_content_frame, self)
         self.current_tool_frame.pack(fill="both", expand=True)
         if hasattr(self.current_tool_frame, 'on_show'):
             self.current_tool_frame.on_show()
         
         # Update window title or other app-level things based on tool
         self.root.title(f"Digital Toolbox - {self.current_tool_frame.tool_name}")
+        self.profiler.record_tool_switch(tool_class.__name__, start, time.perf_counter(), cached)
 
 # --- Initiate tk loop ---
 if __name__ == "__main__":
-    database.init_db()
+    parser = argparse.ArgumentParser(description="Digital Toolbox")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_FILE, metavar="FILE",
+                        help=f"record startup and tool-switch timings to FILE (default: {DEFAULT_PROFILE_FILE})")
+    parser.add_argument("--monitor", action="store_true",
+                        help="measure callback durations and timer lag, shown under the status bar")
+    parser.add_argument("--watch", action="store_true",
+                        help="reload tool modules automatically when their source files change")
+    args = parser.parse_args()
+
+    profiler = Profiler(enabled=args.profile is not None, origin=PROCESS_START)
+    profiler.record("imports", PROCESS_START, IMPORTS_DONE)
+
+    with profiler.phase("db_init"):
+        database.init_db()
+        registry.load_plugins() # Tools added through plugins/*.json manifests
 
-    DEFAULT_TOOL = Homepage
+    with profiler.phase("tk_init"):
+        root = ThemedTk()
+    profiler.watch_first_frame(root)
+    with profiler.phase("app_init"):
+        app = DigitalToolboxApp(root, profiler, monitor=args.monitor, watch=args.watch)
+    root.mainloop()
+    # Finish pending writes and close the SQLite connections so the WAL is checkpointed into the .db file
+    app.shutdown_database()
 
-    root = ThemedTk()
-    app = DigitalToolboxApp(root)
-    root.mainloop()
\ No newline at end of file
+    if profiler.enabled:
+        profiler.write(args.profile)
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Benchmark: core.diff against difflib.SequenceMatcher on generated log files.
+
+    python benchmarks/diff_benchmark.py [--lines 100000] [--edits 300] [--difflib-max-lines 100000]
+
+Writes two log-like files to a temporary folder, then times each core.diff
+algorithm (indexing the mmap'd files + streaming all hunks) and difflib on the
+same lines, with the peak Python memory each one needed (tracemalloc). The second
+file is, in turn, an edited copy of the first (random line edits, insertions and
+deletions), an unrelated log sharing only its heartbeat lines, and a file with no
+line in common.
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.diff import ALGORITHMS, LineSource, diff_sources
+
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+
+
+def make_log(lines, rng):
+    """Log-like lines: mostly distinct, with some repeated ones (like real logs)."""
+    result = []
+    for number in range(lines):
+        if rng.random() < 0.05:
+            result.append("-- heartbeat ok --")
+        else:
+            result.append(f"2024-05-01T12:{number // 6000 % 60:02d}:{number // 100 % 60:02d}.{number % 100:02d}0Z "
+                          f"{rng.choice(LEVELS)} worker-{rng.randrange(16)} request {number} took {rng.randrange(900)} ms")
+    return result
+
+
+def edit_log(lines, edits, rng):
+    edited = list(lines)
+    for _ in range(edits):
+        position = rng.randrange(len(edited))
+        kind = rng.randrange(3)
+        if kind == 0:
+            edited[position] = edited[position] + " (retried)"
+        elif kind == 1:
+            edited.insert(position, f"WARN inserted line {rng.randrange(10**6)}")
+        else:
+            del edited[position]
+    return edited
+
+
+def measure(function):
+    """
+    (seconds, peak MB of Python allocations, result). Tracing allocations slows
+    Python code down a lot, so the memory is measured in a second, untimed run.
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, result
+
+
+def apply_hunks(old_lines, new_lines, hunks):
+    """Rebuilds the new file from the old one and the hunks (to check them)."""
+    rebuilt = []
+    position = 0
+    for _, i1, i2, j1, j2 in hunks:
+        rebuilt += old_lines[position:i1]
+        rebuilt += new_lines[j1:j2]
+        position = i2
+    return rebuilt + old_lines[position:]
+
+
+def compare(title, old_lines, new_lines, folder, difflib_max_lines):
+    """Writes both files and times every core.diff algorithm (and difflib) on them."""
+    old_path, new_path = os.path.join(folder, "old.log"), os.path.join(folder, "new.log")
+    for path, lines in ((old_path, old_lines), (new_path, new_lines)):
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(lines) + "\n")
+    size_mb = (os.path.getsize(old_path) + os.path.getsize(new_path)) / 2**20
+    print(f"{title}: {len(old_lines):,} vs {len(new_lines):,} lines ({size_mb:.1f} MB)")
+
+    for algorithm in ALGORITHMS:
+        def run():
+            with LineSource.open(old_path) as old, LineSource.open(new_path) as new:
+                return list(diff_sources(old, new, algorithm))
+        elapsed, peak, hunks = measure(run)
+        assert apply_hunks(old_lines, new_lines, hunks) == new_lines
+        changed = sum(i2 - i1 + j2 - j1 for _, i1, i2, j1, j2 in hunks)
+        print(f"  core.diff {algorithm:<10} {elapsed:8.2f} s {peak:8.1f} MB peak  "
+              f"{len(hunks):,} hunks, {changed:,} lines changed")
+
+    if len(old_lines) <= difflib_max_lines:
+        def run_difflib():
+            with open(old_path, encoding="utf-8") as f:
+                old = f.read().splitlines()
+            with open(new_path, encoding="utf-8") as f:
+                new = f.read().splitlines()
+            return [op for op in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+                    if op[0] != "equal"]
+        elapsed, peak, hunks = measure(run_difflib)
+        changed = sum(i2 - i1 + j2 - j1 for _, i1, i2, j1, j2 in hunks)
+        print(f"  difflib SequenceMatcher {elapsed:8.2f} s {peak:8.1f} MB peak  "
+              f"{len(hunks):,} hunks, {changed:,} lines changed")
+    else:
+        print(f"  difflib skipped (more than {difflib_max_lines:,} lines)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000, help="lines in the old file")
+    parser.add_argument("--edits", type=int, default=300, help="random edits made to the new file")
+    parser.add_argument("--difflib-max-lines", type=int, default=100_000,
+                        help="skip difflib above this many lines (it gets very slow)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    old_lines = make_log(args.lines, rng)
+    cases = [
+        (f"Edited copy ({args.edits} edits)", edit_log(old_lines, args.edits, rng)),
+        # A different log: only the heartbeat lines are shared
+        ("Unrelated log", make_log(args.lines, rng)),
+        # No line in common at all
+        ("Disjoint file", [f"other {line}" for line in make_log(args.lines, rng)]),
+    ]
+    with tempfile.TemporaryDirectory() as folder:
+        for title, new_lines in cases:
+            compare(title, old_lines, new_lines, folder, args.difflib_max_lines)
+
+
+if __name__ == "__main__":
+    main()
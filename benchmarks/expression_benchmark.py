@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: core.expression against Python's eval() on long expressions.
+
+    python benchmarks/expression_benchmark.py [--terms 200] [--repeat 2000]
+
+"compiled" re-evaluates an already compiled expression (what the calculator does
+for a repeated '=' or what batch mode does per x value), "cached" goes through
+evaluate() and the LRU cache, "cold" parses from scratch every time.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.expression import CompiledExpression, compile_expression, evaluate
+
+
+def make_expression(terms, rng):
+    """A long arithmetic expression with nesting, e.g. '(3.5*12)+(7-2)/...'."""
+    parts = []
+    for _ in range(terms):
+        a, b = rng.randint(1, 99), rng.randint(1, 99)
+        parts.append(f"({a}{rng.choice('+-*/')}{b}.5)")
+    return rng.choice("+-").join(parts) if terms else "0"
+
+
+def make_variable_expression(terms, rng):
+    """Like make_expression, but every term uses x, so nothing can be folded away."""
+    return "+".join(f"(x*{rng.randint(1, 99)}-{rng.randint(1, 99)})" for _ in range(terms))
+
+
+def time_it(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6 # microseconds per call
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--terms", type=int, default=200, help="terms per expression")
+    parser.add_argument("--repeat", type=int, default=2000, help="evaluations per measurement")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    constant = make_expression(args.terms, rng)
+    variable = make_variable_expression(args.terms, rng)
+    compiled_constant = compile_expression(constant)
+    compiled_variable = compile_expression(variable)
+    code = compile(variable, "<bench>", "eval")
+    env = {"x": 1.25}
+    assert abs(compiled_variable.evaluate(env) - eval(code, {"__builtins__": {}}, env)) < 1e-6
+
+    rows = [
+        ("constant expr, eval(text)", time_it(lambda: eval(constant), args.repeat)),
+        ("constant expr, evaluate() (cached)", time_it(lambda: evaluate(constant), args.repeat)),
+        ("constant expr, cold compile", time_it(lambda: CompiledExpression(constant), max(1, args.repeat // 10))),
+        ("x expr, eval(text)", time_it(lambda: eval(variable, {"__builtins__": {}}, env), args.repeat)),
+        ("x expr, eval(precompiled code)", time_it(lambda: eval(code, {"__builtins__": {}}, env), args.repeat)),
+        ("x expr, compiled.evaluate()", time_it(lambda: compiled_variable.evaluate(env), args.repeat)),
+        ("x expr, cold compile", time_it(lambda: CompiledExpression(variable), max(1, args.repeat // 10))),
+    ]
+    print(f"{args.terms} terms, {args.repeat} repeats")
+    for label, micros in rows:
+        print(f"  {label:<36} {micros:10.1f} us")
+    print(f"  (constant expression folds to {compiled_constant.evaluate()!r})")
+
+
+if __name__ == "__main__":
+    main()
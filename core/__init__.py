@@ -0,0 +1,4 @@
+# Headless tool logic: no tkinter / ttkthemes imports anywhere in this package,
+# so it can run in scripts, batch jobs and benchmarks without a display.
+# The Tk tools in tools/ are views on top of these modules.
+# Command line: python -m core --help
@@ -0,0 +1,171 @@
+"""
+Command line front end for the headless tool logic. Never imports tkinter or ttkthemes.
+
+    python -m core calc "12*(3+4)"          evaluate expressions (or read them from stdin, one per line)
+    python -m core tz 14:30 UTC Asia/Tokyo   convert a time between timezones
+    python -m core snake --moves RRDDL       run a game of Snake headlessly
+    python -m core snake-bench --policy bfs  benchmark computer players over many games
+    python -m core diff OLD NEW              unified diff of two (large) text files
+    python -m core prefs get USER TOOL KEY   read / write / dump user preferences
+"""
+import argparse
+import json
+import sys
+
+from .expression import evaluate, format_result, ExpressionError
+from .timezones import TimezoneService, TimezoneError
+from .snake import SnakeGame, DEFAULT_COLS, DEFAULT_ROWS
+
+# Single-letter moves accepted by "snake --moves"; "." keeps the current direction
+MOVE_LETTERS = {"L": "Left", "R": "Right", "U": "Up", "D": "Down"}
+
+
+def _lines(args_list):
+    """The given arguments, or the lines of stdin when there are none (or just "-")."""
+    if args_list and args_list != ["-"]:
+        return args_list
+    return [line.rstrip("\n") for line in sys.stdin if line.strip()]
+
+
+def cmd_calc(args):
+    status = 0
+    for expression in _lines(args.expressions):
+        try:
+            result = format_result(evaluate(expression))
+        except ExpressionError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            result = "Error"
+            status = 1
+        print(f"{expression} = {result}" if args.echo else result)
+    return status
+
+
+def cmd_tz(args):
+    service = TimezoneService()
+    try:
+        converted = service.convert(args.time, args.from_tz, args.to_tz)
+    except TimezoneError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(service.format(converted))
+    return 0
+
+
+def cmd_snake(args):
+    game = SnakeGame(args.cols, args.rows, seed=args.seed)
+    for letter in args.moves.upper():
+        if game.game_over:
+            break
+        if letter in MOVE_LETTERS:
+            game.change_direction(MOVE_LETTERS[letter])
+        game.step()
+    print(json.dumps({"score": game.score, "ticks": game.ticks, "game_over": game.game_over,
+                      "head": game.snake[0], "length": len(game.snake), "food": game.food}))
+    return 0
+
+
+def cmd_snake_bench(args):
+    from .autoplay import run_benchmark, format_report
+    report = run_benchmark(args.policy, args.games, args.cols, args.rows, args.seed, args.workers, args.max_ticks)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+def cmd_diff(args):
+    from .diff import LineSource, unified_diff, DiffError
+    try:
+        with LineSource.open(args.old) as old, LineSource.open(args.new) as new:
+            changed = False
+            for line in unified_diff(old, new, args.context, args.algorithm):
+                print(line) # Streamed: the first hunks print while the rest is still being compared
+                changed = True
+    except DiffError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    return 1 if changed else 0 # Like diff(1): 1 when the files differ
+
+
+def cmd_prefs(args):
+    # Imported here so "calc"/"tz"/"snake" never touch the database
+    from .preferences import PreferencesService
+    service = PreferencesService(args.db)
+    if args.action == "get":
+        print(json.dumps(service.get(args.username, args.tool, args.key)))
+    elif args.action == "set":
+        try:
+            value = json.loads(args.value) # Numbers, true/false, lists...
+        except ValueError:
+            value = args.value # Anything else is stored as a plain string
+        service.set(args.username, args.tool, args.key, value)
+    elif args.action == "dump":
+        print(json.dumps(service.dump(args.username), indent=2))
+    elif args.action == "users":
+        print("\n".join(service.usernames(args.username or "")))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core", description="Digital Toolbox without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calc = commands.add_parser("calc", help="evaluate arithmetic expressions")
+    calc.add_argument("expressions", nargs="*", help="expressions; read from stdin if none (or '-')")
+    calc.add_argument("--echo", action="store_true", help="print 'expression = result'")
+    calc.set_defaults(func=cmd_calc)
+
+    tz = commands.add_parser("tz", help="convert a time between timezones")
+    tz.add_argument("time", help="HH:MM, today")
+    tz.add_argument("from_tz")
+    tz.add_argument("to_tz")
+    tz.set_defaults(func=cmd_tz)
+
+    snake = commands.add_parser("snake", help="play Snake from a list of moves")
+    snake.add_argument("--moves", default="", help="one letter per tick: L R U D, or '.' to go straight")
+    snake.add_argument("--seed", type=int, default=None, help="food placement seed")
+    snake.add_argument("--cols", type=int, default=DEFAULT_COLS)
+    snake.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    snake.set_defaults(func=cmd_snake)
+
+    bench = commands.add_parser("snake-bench", help="play many Snake games with a computer player")
+    bench.add_argument("--policy", choices=["greedy", "bfs", "hamiltonian"], default="greedy")
+    bench.add_argument("--games", type=int, default=1000)
+    bench.add_argument("--cols", type=int, default=DEFAULT_COLS)
+    bench.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    bench.add_argument("--seed", type=int, default=0, help="seed of the first game (then seed+1, ...)")
+    bench.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU; 1 = no pool)")
+    bench.add_argument("--max-ticks", type=int, default=None, help="stop a game after this many ticks (default depends on the policy)")
+    bench.add_argument("--json", action="store_true", help="print the report as JSON")
+    bench.set_defaults(func=cmd_snake_bench)
+
+    diff = commands.add_parser("diff", help="compare two text files line by line")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--algorithm", choices=["histogram", "patience", "myers"], default="histogram")
+    diff.add_argument("-U", "--context", type=int, default=3, help="unchanged lines around each hunk")
+    diff.set_defaults(func=cmd_diff)
+
+    prefs = commands.add_parser("prefs", help="read or change user preferences")
+    prefs.add_argument("action", choices=["get", "set", "dump", "users"])
+    prefs.add_argument("username", nargs="?", help="for 'users': optional name prefix")
+    prefs.add_argument("tool", nargs="?")
+    prefs.add_argument("key", nargs="?")
+    prefs.add_argument("value", nargs="?", help="JSON value (plain text is stored as a string)")
+    prefs.add_argument("--db", help="database file (default: digital_toolbox.db)")
+    prefs.set_defaults(func=cmd_prefs)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "action", None) in ("get", "set") and not (args.username and args.tool and args.key):
+        parser.error("prefs get/set need USERNAME TOOL KEY")
+    if getattr(args, "action", None) == "set" and args.value is None:
+        parser.error("prefs set needs a VALUE")
+    if getattr(args, "action", None) == "dump" and not args.username:
+        parser.error("prefs dump needs a USERNAME")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Computer players for core.snake, and a benchmark that runs many games headlessly.
+
+    from core.autoplay import play_game, run_benchmark
+    play_game("bfs", cols=20, rows=20, seed=1)      # one game -> {"score": ..., ...}
+    run_benchmark("greedy", games=1000, workers=4)  # many games across processes
+
+Or from the command line: python -m core snake-bench --policy bfs --games 1000
+"""
+import os
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .snake import SnakeGame, DIRECTIONS, DEFAULT_COLS, DEFAULT_ROWS
+
+# Games are handed to worker processes in chunks of this many, to keep pickling cheap
+CHUNK_SIZE = 25
+
+
+# --- Policies ---
+# A policy looks at the game and returns the direction to take next (or None to go straight).
+class GreedyPolicy:
+    """Heads straight for the food, avoiding only the cells it would die on next tick."""
+    name = "greedy"
+
+    def __init__(self, game):
+        self.game = game
+
+    @staticmethod
+    def default_max_ticks(cols, rows):
+        """Ticks after which a game is cut short: 50 per cell stops players that circle forever."""
+        return cols * rows * 50
+
+    def safe_moves(self):
+        """(direction, cell) pairs that don't hit a wall or the body next tick."""
+        game = self.game
+        head_x, head_y = game.snake[0]
+        tail = game.snake[-1]
+        moves = []
+        for direction, (dx, dy) in DIRECTIONS.items():
+            cell = (head_x + dx, head_y + dy)
+            if not (0 <= cell[0] < game.cols and 0 <= cell[1] < game.rows):
+                continue
+            # The tail moves away this tick, unless the snake is about to eat
+            if game.is_occupied(cell) and not (cell == tail and cell != game.food and len(game.snake) > 2):
+                continue
+            moves.append((direction, cell))
+        return moves
+
+    def choose(self):
+        food = self.game.food
+        moves = self.safe_moves()
+        if not moves:
+            return None
+        return min(moves, key=lambda move: abs(move[1][0] - food[0]) + abs(move[1][1] - food[1]))[0]
+
+
+class BfsPolicy(GreedyPolicy):
+    """
+    Follows the shortest path to the food (breadth-first search, which is what A*
+    reduces to on a grid with a distance-0 heuristic). A path stays valid until the
+    food is eaten, because the body only ever frees cells off the path, so it is
+    searched once per food rather than every tick. When the food can't be reached,
+    it moves to the neighbouring cell with the most room around it.
+    """
+    name = "bfs"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.path = deque() # Directions still to take towards self.path_food
+        self.path_food = None
+
+    def choose(self):
+        game = self.game
+        if self.path and self.path_food == game.food:
+            return self.path.popleft()
+        moves = self.safe_moves()
+        if not moves:
+            return None
+        self.path = self.find_path(moves)
+        if self.path:
+            self.path_food = game.food
+            return self.path.popleft()
+        # No path to the food: stay in the biggest open area
+        return max(moves, key=lambda move: self.room(move[1], limit=len(game.snake) * 2))[0]
+
+    def find_path(self, moves):
+        """Directions along a shortest path from the head to the food (empty if there's none)."""
+        game = self.game
+        came_from = {cell: (None, direction) for direction, cell in moves}
+        queue = deque(came_from)
+        while queue:
+            cell = queue.popleft()
+            if cell == game.food:
+                path = deque()
+                while cell is not None:
+                    cell, direction = came_from[cell]
+                    path.appendleft(direction)
+                return path
+            for direction, (dx, dy) in DIRECTIONS.items():
+                neighbour = (cell[0] + dx, cell[1] + dy)
+                if (neighbour not in came_from and neighbour != game.snake[0]
+                        and 0 <= neighbour[0] < game.cols and 0 <= neighbour[1] < game.rows
+                        and not game.is_occupied(neighbour)):
+                    came_from[neighbour] = (cell, direction)
+                    queue.append(neighbour)
+        return deque()
+
+    def room(self, start, limit):
+        """How many free cells can be reached from 'start' (counting stops at 'limit')."""
+        game = self.game
+        seen = {start}
+        stack = [start]
+        while stack and len(seen) < limit:
+            x, y = stack.pop()
+            for dx, dy in DIRECTIONS.values():
+                cell = (x + dx, y + dy)
+                if (cell not in seen and 0 <= cell[0] < game.cols and 0 <= cell[1] < game.rows
+                        and not game.is_occupied(cell)):
+                    seen.add(cell)
+                    stack.append(cell)
+        return len(seen)
+
+
+class HamiltonianPolicy(GreedyPolicy):
+    """
+    Follows a fixed cycle through every cell of the board, so it never dies and always
+    fills the board eventually (slowly). Needs an even number of rows or columns.
+    Until the body lies along the cycle, unsafe cycle steps are replaced by greedy ones.
+    """
+    name = "hamiltonian"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.next_cell = hamiltonian_cycle(game.cols, game.rows)
+
+    @staticmethod
+    def default_max_ticks(cols, rows):
+        """Each food takes at most one lap of the cycle, so a full board needs up to cells**2 ticks."""
+        return (cols * rows) ** 2
+
+    def choose(self):
+        head_x, head_y = self.game.snake[0]
+        next_x, next_y = self.next_cell[(head_x, head_y)]
+        direction = {(-1, 0): "Left", (1, 0): "Right", (0, -1): "Up", (0, 1): "Down"}[(next_x - head_x, next_y - head_y)]
+        if any(direction == safe for safe, _ in self.safe_moves()):
+            return direction
+        return super().choose()
+
+
+def hamiltonian_cycle(cols, rows):
+    """
+    Returns {cell: next cell} for a cycle visiting every cell once: along the top row,
+    zig-zag down through columns 1.., then back up column 0.
+    """
+    if rows % 2 and cols % 2:
+        raise ValueError("A Hamiltonian cycle needs an even number of rows or columns")
+    if rows % 2: # Build it on the transposed board
+        return {(y, x): (ny, nx) for (x, y), (nx, ny) in hamiltonian_cycle(rows, cols).items()}
+    order = [(x, 0) for x in range(cols)]
+    for y in range(1, rows):
+        xs = range(cols - 1, 0, -1) if y % 2 else range(1, cols)
+        order.extend((x, y) for x in xs)
+    order.extend((0, y) for y in range(rows - 1, 0, -1))
+    return {cell: order[(index + 1) % len(order)] for index, cell in enumerate(order)}
+
+
+POLICIES = {policy.name: policy for policy in (GreedyPolicy, BfsPolicy, HamiltonianPolicy)}
+
+
+# --- Playing ---
+def play_game(policy_name, cols=DEFAULT_COLS, rows=DEFAULT_ROWS, seed=0, max_ticks=None):
+    """
+    Plays one game with the named policy and returns its score, ticks, whether it
+    filled the board, and how long the game rules and the policy took in total.
+    'max_ticks' (default: the policy's default_max_ticks) stops players that circle
+    forever; a game stopped that way is reported as truncated rather than lost.
+    """
+    game = SnakeGame(cols, rows, seed=seed)
+    policy = POLICIES[policy_name](game)
+    max_ticks = max_ticks or policy.default_max_ticks(cols, rows)
+    clock = time.perf_counter
+    step_time = policy_time = 0.0
+    while not game.game_over and game.ticks < max_ticks:
+        start = clock()
+        direction = policy.choose()
+        middle = clock()
+        if direction is not None:
+            game.change_direction(direction)
+        game.step()
+        end = clock()
+        policy_time += middle - start
+        step_time += end - middle
+    return {"seed": seed, "score": game.score, "ticks": game.ticks, "won": game.won,
+            "truncated": not game.game_over, "step_s": step_time, "policy_s": policy_time}
+
+
+def _play_chunk(policy_name, cols, rows, seeds, max_ticks):
+    """Worker process entry point: plays a list of games."""
+    return [play_game(policy_name, cols, rows, seed, max_ticks) for seed in seeds]
+
+
+def run_benchmark(policy_name, games=1000, cols=DEFAULT_COLS, rows=DEFAULT_ROWS, seed=0,
+                  workers=None, max_ticks=None):
+    """
+    Plays 'games' games (seeds seed, seed+1, ...) across a ProcessPoolExecutor and returns
+    a report: games/sec, ticks/sec, the score distribution and the per-tick cost of the
+    game rules and of the policy. workers=1 plays everything in this process.
+    """
+    if policy_name not in POLICIES:
+        raise ValueError(f"Unknown policy {policy_name!r}; choose from {', '.join(POLICIES)}")
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(seed, seed + games))
+    chunks = [seeds[i:i + CHUNK_SIZE] for i in range(0, games, CHUNK_SIZE)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [result for chunk in chunks for result in _play_chunk(policy_name, cols, rows, chunk, max_ticks)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_play_chunk, policy_name, cols, rows, chunk, max_ticks) for chunk in chunks]
+            results = [result for future in futures for result in future.result()]
+    wall_s = time.perf_counter() - start
+
+    scores = sorted(result["score"] for result in results)
+    ticks = sum(result["ticks"] for result in results)
+    return {
+        "policy": policy_name,
+        "board": f"{cols}x{rows}",
+        "games": len(results),
+        "workers": workers,
+        "wall_s": wall_s,
+        "games_per_s": len(results) / wall_s if wall_s else 0.0,
+        "ticks_per_s": ticks / wall_s if wall_s else 0.0,
+        "step_us_per_tick": sum(result["step_s"] for result in results) / ticks * 1e6 if ticks else 0.0,
+        "policy_us_per_tick": sum(result["policy_s"] for result in results) / ticks * 1e6 if ticks else 0.0,
+        "wins": sum(result["won"] for result in results),
+        "truncated": sum(result["truncated"] for result in results),
+        "score": {
+            "min": scores[0] if scores else 0,
+            "median": statistics.median(scores) if scores else 0,
+            "mean": statistics.fmean(scores) if scores else 0.0,
+            "p90": scores[int(len(scores) * 0.9)] if scores else 0,
+            "max": scores[-1] if scores else 0,
+        },
+        "histogram": _histogram(scores),
+    }
+
+
+def _histogram(scores, buckets=10):
+    """Score distribution as [(low, high, count)] over equal-width buckets."""
+    if not scores:
+        return []
+    low, high = scores[0], scores[-1]
+    width = max(1, -(-(high - low + 1) // buckets))
+    counts = {}
+    for score in scores:
+        bucket = (score - low) // width
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return [(low + bucket * width, low + (bucket + 1) * width - 1, counts.get(bucket, 0))
+            for bucket in range((high - low) // width + 1)]
+
+
+def format_report(report):
+    """The benchmark report as text for the terminal."""
+    score = report["score"]
+    lines = [
+        f"{report['games']} games of {report['policy']} on {report['board']} "
+        f"({report['workers']} workers, {report['wall_s']:.2f} s)",
+        f"  {report['games_per_s']:.1f} games/s, {report['ticks_per_s']:,.0f} ticks/s",
+        f"  per tick: rules {report['step_us_per_tick']:.2f} us, policy {report['policy_us_per_tick']:.2f} us",
+        f"  score: min {score['min']}  median {score['median']}  mean {score['mean']:.1f}  "
+        f"p90 {score['p90']}  max {score['max']}  (board filled {report['wins']} times)",
+    ]
+    if report["truncated"]:
+        lines.append(f"  {report['truncated']} games hit the tick limit before ending (not counted as losses)")
+    biggest = max((count for _, _, count in report["histogram"]), default=0)
+    for low, high, count in report["histogram"]:
+        bar = "#" * round(40 * count / biggest) if biggest else ""
+        lines.append(f"  {low:>5}-{high:<5} {count:>6} {bar}")
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+import csv
+import functools
+import math
+import re
+import time
+from array import array
+
+from .expression import compile_expression, ExpressionError
+
+# Refuse anything bigger than this many values (about 160 MB of x and f(x) doubles)
+MAX_BATCH_SIZE = 10_000_000
+# "0..1e6 step 0.5", "x = 1..10", "-5..5 step 0.25"
+RANGE_PATTERN = re.compile(r"^\s*(?:x\s*=\s*)?(?P<start>\S+?)\s*\.\.\s*(?P<stop>\S+?)(?:\s+step\s+(?P<step>\S+))?\s*$")
+
+
+class BatchError(ValueError):
+    """Raised for a bad range, column or CSV file, or an expression that can't be batched."""
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise BatchError(f"Not a number: {text!r}") from None
+
+
+def parse_range(text):
+    """Parses "start..stop [step s]" (stop included) into (start, step, count)."""
+    match = RANGE_PATTERN.match(text)
+    if match is None:
+        raise BatchError("Range should look like 0..100 step 0.5")
+    start, stop = _number(match.group("start")), _number(match.group("stop"))
+    step = _number(match.group("step")) if match.group("step") else 1.0
+    if not all(math.isfinite(number) for number in (start, stop, step)):
+        raise BatchError("Start, stop and step must be finite numbers")
+    steps = (stop - start) / step if step else -1.0
+    if steps < 0:
+        raise BatchError("The step doesn't lead from start to stop")
+    # Checked before converting to int: 0..1e300 step 1e-300 gives inf steps
+    if not steps < MAX_BATCH_SIZE:
+        raise BatchError(f"More than the limit of {MAX_BATCH_SIZE:,} values")
+    # The small epsilon keeps 0..1 step 0.1 from losing its last value to rounding
+    count = int(math.floor(steps + 1e-9)) + 1
+    if count > MAX_BATCH_SIZE:
+        raise BatchError(f"{count:,} values is more than the limit of {MAX_BATCH_SIZE:,}")
+    return start, step, count
+
+
+def parse_column(text):
+    """Reads numbers from pasted text: one per line, or separated by commas/spaces/tabs."""
+    values = array("d", (_number(item) for item in re.split(r"[\s,;]+", text) if item))
+    if len(values) > MAX_BATCH_SIZE:
+        raise BatchError(f"{len(values):,} values is more than the limit of {MAX_BATCH_SIZE:,}")
+    return values
+
+
+def read_csv_column(path, column=None):
+    """
+    Reads one column of numbers from a CSV file. 'column' is a header name or a
+    0-based index; by default the first column whose first data value is a number.
+    A header row is detected (and skipped) automatically.
+    """
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = [row for row in csv.reader(f) if row]
+    except OSError as e:
+        raise BatchError(f"Can't read {path}: {e.strerror or e}") from e
+    except UnicodeDecodeError as e:
+        raise BatchError(f"{path} is not a UTF-8 text file (byte {e.start})") from e
+    except csv.Error as e:
+        raise BatchError(f"Can't read {path} as CSV: {e}") from e
+    if not rows:
+        raise BatchError(f"{path} is empty")
+
+    header = None
+    try:
+        [float(cell) for cell in rows[0] if cell.strip()]
+    except ValueError:
+        header, rows = rows[0], rows[1:]
+
+    if column is None or column == "":
+        index = next((i for i, cell in enumerate(rows[0] if rows else []) if _is_number(cell)), None)
+    elif str(column).isdigit():
+        index = int(column)
+    elif header is not None and column in header:
+        index = header.index(column)
+    else:
+        index = None
+    if index is None:
+        raise BatchError(f"No column {column!r} of numbers in {path}" if column else f"No numeric column in {path}")
+
+    values = array("d")
+    for line_number, row in enumerate(rows, start=2 if header else 1):
+        if index < len(row) and row[index].strip():
+            try:
+                values.append(float(row[index]))
+            except ValueError:
+                raise BatchError(f"Line {line_number}: {row[index]!r} is not a number") from None
+    if len(values) > MAX_BATCH_SIZE:
+        raise BatchError(f"{len(values):,} values is more than the limit of {MAX_BATCH_SIZE:,}")
+    return values
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _float(value):
+    """float(value), or nan for an integer too big for a float (like 10^400), as in the Python engine."""
+    try:
+        return float(value)
+    except OverflowError:
+        return math.nan
+
+
+# --- Vectorized (NumPy) evaluation ---
+def _numpy():
+    """numpy, or None if it isn't installed (it's optional; batches then run in pure Python)."""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _numpy_compile(node, np):
+    """Turns an expression tree into a function env -> array, using NumPy ufuncs."""
+    kind = node[0]
+    if kind == "num":
+        value = _float(node[1])
+        return lambda env: value
+    if kind == "var":
+        name = node[1]
+        return lambda env: env[name]
+    if kind == "neg":
+        operand = _numpy_compile(node[1], np)
+        return lambda env: np.negative(operand(env))
+    if kind == "bin":
+        _, op, left_node, right_node = node
+        ufunc = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.true_divide,
+                 "//": np.floor_divide, "%": np.mod, "^": np.power}[op]
+        left, right = _numpy_compile(left_node, np), _numpy_compile(right_node, np)
+        return lambda env: ufunc(left(env), right(env))
+    # kind == "call"
+    _, name, arg_nodes = node
+    args = [_numpy_compile(arg, np) for arg in arg_nodes]
+    if name in ("min", "max"):
+        pairwise = np.minimum if name == "min" else np.maximum
+        return lambda env: functools.reduce(pairwise, [arg(env) for arg in args])
+    if name == "round" and len(arg_nodes) == 2:
+        # np.round needs a plain int for the digits; like Python's round(), any
+        # other digits (2.5, x, ...) can't be computed and give nan
+        value = args[0]
+        digits_node = arg_nodes[1]
+        if digits_node[0] != "num" or not isinstance(digits_node[1], int):
+            return lambda env: np.full(np.shape(value(env)), math.nan)
+        digits = digits_node[1]
+        return lambda env: np.round(value(env), digits)
+    ufunc = {"sqrt": np.sqrt, "abs": np.abs, "round": np.round, "floor": np.floor, "ceil": np.ceil,
+             "exp": np.exp, "ln": np.log, "log": np.log10, "log2": np.log2,
+             "sin": np.sin, "cos": np.cos, "tan": np.tan,
+             "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan}[name]
+    return lambda env: ufunc(*[arg(env) for arg in args])
+
+
+# --- Results ---
+class BatchResult:
+    """
+    The x values and f(x) results of a batch run (NumPy arrays or array('d')),
+    with summary statistics. Values that couldn't be computed are nan.
+    """
+    def __init__(self, expression, xs, ys, engine, elapsed_ms):
+        self.expression = expression
+        self.xs = xs
+        self.ys = ys
+        self.engine = engine # "numpy" or "python"
+        self.elapsed_ms = elapsed_ms
+        self.stats = _numpy_stats(ys) if engine == "numpy" else _python_stats(ys)
+
+    def __len__(self):
+        return len(self.ys)
+
+    def page(self, index, size):
+        """Rows (position, x, f(x)) of page 'index' (0-based) with 'size' rows per page."""
+        start = index * size
+        stop = min(start + size, len(self.ys))
+        return [(i, float(self.xs[i]), float(self.ys[i])) for i in range(start, stop)]
+
+    def page_count(self, size):
+        return max(1, -(-len(self.ys) // size))
+
+
+def _empty_stats(count):
+    return {"count": count, "valid": 0, "min": None, "max": None, "mean": None, "stdev": None, "sum": None}
+
+
+def _python_stats(ys):
+    valid = [y for y in ys if math.isfinite(y)]
+    if not valid:
+        return _empty_stats(len(ys))
+    total = math.fsum(valid)
+    mean = total / len(valid)
+    variance = math.fsum((y - mean) ** 2 for y in valid) / len(valid)
+    return {"count": len(ys), "valid": len(valid), "min": min(valid), "max": max(valid),
+            "mean": mean, "stdev": math.sqrt(variance), "sum": total}
+
+
+def _numpy_stats(ys):
+    np = _numpy()
+    valid = ys[np.isfinite(ys)]
+    if not len(valid):
+        return _empty_stats(len(ys))
+    return {"count": len(ys), "valid": len(valid), "min": float(valid.min()), "max": float(valid.max()),
+            "mean": float(valid.mean()), "stdev": float(valid.std()), "sum": float(valid.sum())}
+
+
+# --- Running a batch ---
+def run_batch(expression, values=None, value_range=None, variables=None, use_numpy=True):
+    """
+    Evaluates 'expression' (in x) for every x in 'values' (a sequence of numbers) or
+    'value_range' (a (start, step, count) tuple from parse_range), and returns a
+    BatchResult. Uses NumPy when it's installed, otherwise one value at a time.
+    'variables' (like ans) are used as floats; integers too big for one become nan.
+    Safe to call from a worker thread: it doesn't touch Tk or the database.
+    """
+    try:
+        compiled = compile_expression(expression.strip())
+    except ExpressionError as e:
+        raise BatchError(str(e)) from e
+    unknown = compiled.variables - {"x"} - set(variables or {})
+    if unknown:
+        raise BatchError(f"Unknown variable {sorted(unknown)[0]!r} (use x for the batch values)")
+    variables = {name: _float(value) for name, value in (variables or {}).items()}
+
+    np = _numpy() if use_numpy else None
+    start_time = time.perf_counter()
+    if np is not None:
+        if value_range is not None:
+            start, step, count = value_range
+            xs = start + np.arange(count, dtype=float) * step
+        else:
+            xs = np.asarray(values, dtype=float)
+        env = dict(variables)
+        env["x"] = xs
+        try:
+            with np.errstate(all="ignore"): # 1/0 -> inf, sqrt(-1) -> nan instead of warnings
+                ys = _numpy_compile(compiled.tree, np)(env)
+        except RecursionError: # Compiled, but only just: the NumPy version nests a little deeper
+            raise BatchError("Expression too complex") from None
+        ys = np.broadcast_to(np.asarray(ys, dtype=float), xs.shape) # "2+3" gives one value per x too
+        engine = "numpy"
+    else:
+        if value_range is not None:
+            start, step, count = value_range
+            xs = array("d", (start + i * step for i in range(count)))
+        else:
+            xs = values if isinstance(values, array) else array("d", values)
+        ys = array("d", compiled.evaluate_many(xs, "x", variables))
+        engine = "python"
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    return BatchResult(expression, xs, ys, engine, elapsed_ms)
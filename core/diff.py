@@ -0,0 +1,680 @@
+"""
+Line diff engine for large files.
+
+Both inputs are memory-mapped and indexed once: every line becomes an offset and a
+64-bit hash in compact arrays, and the hashes are then interned into small integer
+ids shared by both files. The algorithms only ever compare ids, so memory grows with
+the number of lines, not with the file size, and a line's text is only read back
+from the mapping when it's shown.
+
+Three algorithms are available:
+- "myers": the classic shortest edit script, linear-space (middle snake) version.
+- "patience": anchors on lines that occur exactly once in both sides.
+- "histogram": anchors on the rarest common lines (git's default-like choice).
+Patience and histogram fall back to Myers for regions with no usable anchor, and
+very large regions are cut at their patience anchors first (see LARGE_REGION).
+Common prefixes and suffixes are trimmed before (and between) every step, and a
+region with no line in common is one replacement without any search. Myers answers
+regions with few matching line pairs through an exact sparse LCS (Hunt-Szymanski),
+so unrelated files cost about as much as similar ones.
+
+Results are streamed: diff_hunks() yields difflib-style opcodes as soon as they are
+known, left to right, instead of building the whole list first.
+"""
+import bisect
+import difflib
+import mmap
+import re
+from array import array
+from itertools import accumulate, islice
+
+ALGORITHMS = ("histogram", "patience", "myers")
+# Bytes read per step while indexing lines (only this much is copied out of the mapping at once)
+CHUNK_BYTES = 8 * 1024 * 1024
+# Line hashes turned into ids per step
+INTERN_SLICE = 65536
+# Myers gives up on finding the shortest script past this many edits in one region and
+# splits at the furthest point it reached: still a correct diff, just not minimal.
+MYERS_MAX_COST = 1024
+# Myers hands a region to the sparse LCS when it has at most this many matching
+# (i, j) line pairs per line (and fewer than the Myers search would take steps)
+SPARSE_PAIRS_PER_LINE = 16
+# Histogram ignores lines occurring more often than this in a region (like git)
+HISTOGRAM_MAX_CHAIN = 64
+# Row kinds of a side-by-side view
+ROW_EQUAL, ROW_DELETE, ROW_INSERT, ROW_REPLACE = range(4)
+ROW_KINDS = {"delete": ROW_DELETE, "insert": ROW_INSERT, "replace": ROW_REPLACE}
+# Intra-line diffs: words (with the spaces and punctuation between them) or single characters
+WORD_PATTERN = re.compile(r"\w+|\s+|[^\w\s]")
+# Printed by unified_diff() after a last line that has no newline (same text as GNU diff)
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
+
+
+class DiffError(ValueError):
+    """Raised for an unknown algorithm or a file that can't be read."""
+
+
+# --- Line sources ---
+class LineSource:
+    """
+    The lines of a file (memory-mapped) or of a bytes object: offsets[i] is where
+    line i starts and hashes[i] its hash. Lines are split on b"\\n" only.
+    Equal hashes are treated as equal lines; with 64-bit hashes a collision
+    between two different lines is astronomically unlikely.
+    A last line without a newline gets a different hash than the same text with
+    one, so files that only differ in their final newline don't compare equal.
+    """
+    def __init__(self, data, name=""):
+        self.data = data
+        self.name = name
+        self._mapping = None
+        self.offsets, self.hashes = _index_lines(data)
+        self.missing_newline = len(data) > 0 and data[-1:] != b"\n"
+        if self.missing_newline:
+            self.hashes[-1] = hash((self.hashes[-1], "no newline at end"))
+
+    @classmethod
+    def open(cls, path):
+        """Memory-maps 'path' (read-only) and indexes its lines."""
+        try:
+            with open(path, "rb") as f:
+                if f.seek(0, 2) == 0:
+                    return cls(b"", path) # Empty files can't be mapped
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            raise DiffError(f"Can't read {path}: {e.strerror}") from e
+        source = cls(mapping, path)
+        source._mapping = mapping
+        return source
+
+    @classmethod
+    def from_text(cls, text, name=""):
+        return cls(text.encode("utf-8"), name)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def raw_line(self, index):
+        """Line 'index' as bytes, without its newline."""
+        return self.data[self.offsets[index]:self.offsets[index + 1] - 1]
+
+    def line(self, index):
+        """Line 'index' as text (invalid UTF-8 is replaced, a trailing \\r is dropped)."""
+        return self.raw_line(index).decode("utf-8", "replace").rstrip("\r")
+
+    def lines(self, start, stop):
+        return [self.line(index) for index in range(start, stop)]
+
+    def close(self):
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _index_lines(buffer):
+    """
+    Returns (offsets, hashes) for the lines of 'buffer'. offsets has one extra entry,
+    so line i is buffer[offsets[i]:offsets[i + 1] - 1]. Works through the buffer in
+    CHUNK_BYTES pieces ending on a newline, splitting and hashing each piece in C.
+    """
+    offsets = array("q", [0])
+    hashes = array("q")
+    size = len(buffer)
+    position = 0
+    while position < size:
+        end = min(position + CHUNK_BYTES, size)
+        if end < size:
+            cut = buffer.rfind(b"\n", position, end)
+            if cut < 0: # A line longer than a chunk: take it whole
+                cut = buffer.find(b"\n", end)
+            end = cut + 1 if cut >= 0 else size
+        lines = buffer[position:end].split(b"\n")
+        if not lines[-1]:
+            lines.pop() # The piece ended with a newline
+        hashes.extend(map(hash, lines))
+        # Each line takes its length plus the newline (the last line may not have one,
+        # which puts its end one past the buffer; raw_line() slices it the same way)
+        offsets.extend(islice(accumulate((len(line) + 1 for line in lines), initial=position), 1, None))
+        position = end
+    return offsets, hashes
+
+
+def intern_lines(*sources):
+    """Maps every distinct line hash of the sources to a small int; returns an id array per source."""
+    table = {}
+    get = table.setdefault
+    result = []
+    for source in sources:
+        ids = array("i")
+        hashes = source.hashes
+        for start in range(0, len(hashes), INTERN_SLICE): # Slices keep the temporary list small
+            # len(table) is evaluated before setdefault() inserts, so new hashes get 0, 1, 2, ...
+            ids.extend([get(value, len(table)) for value in hashes[start:start + INTERN_SLICE]])
+        result.append(ids)
+    return result
+
+
+# --- Splitting a region into matches (each returns matching blocks (i, j, length)) ---
+def _myers_split(a, b, alo, ahi, blo, bhi, scratch):
+    """
+    Finds the middle of a shortest edit script between a[alo:ahi] and b[blo:bhi]
+    by running Myers' algorithm from both ends until the paths meet.
+    Returns [(i, j, 0)], a split point, or [] when the two sides share no line.
+    Regions where few lines match are handed to _sparse_lcs instead (an exact result as
+    blocks, much cheaper there), and ones too different to ever finish are cut in half.
+    """
+    n, m = ahi - alo, bhi - blo
+    common, pairs = _match_counts(a, b, alo, ahi, blo, bhi, scratch)
+    if not common:
+        return [] # No snake to find: it's all one replacement
+    # Each matched line saves one delete and one insert, so the script needs at least
+    # this many edits, and both searches run about half of that many rounds
+    rounds = (n + m - 2 * common) // 2
+    if pairs <= min(rounds * rounds, SPARSE_PAIRS_PER_LINE * (n + m)):
+        return _sparse_lcs(a, b, alo, ahi, blo, bhi, scratch)
+    if rounds > MYERS_MAX_COST:
+        # The search would give up anyway, after O(MYERS_MAX_COST^2) steps
+        return [(alo + n // 2, blo + m // 2, 0)]
+    max_d = min((n + m + 1) // 2, MYERS_MAX_COST)
+    offset = max_d
+    size = 2 * max_d + 2
+    forward = [-1] * size # forward[offset + k]: furthest x on diagonal k = x - y from the start
+    backward = [-1] * size # The same, counted back from the end
+    forward[offset + 1] = backward[offset + 1] = 0
+    delta = n - m
+    odd = delta & 1 # Paths meet in the forward pass when delta is odd, else in the backward one
+    # Diagonals that ran off the edge of the region are skipped from then on
+    forward_start = forward_end = backward_start = backward_end = 0
+    best = (0, 0) # Furthest point reached going forward, used when giving up
+    for d in range(max_d):
+        for k in range(-d + forward_start, d + 1 - forward_end, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if x > n:
+                forward_end += 2
+            elif y > m:
+                forward_start += 2
+            else:
+                if x + y > best[0] + best[1]:
+                    best = (x, y)
+                other = offset + delta - k
+                if odd and 0 <= other < size and backward[other] != -1 and x >= n - backward[other]:
+                    return [(alo + x, blo + y, 0)]
+        for k in range(-d + backward_start, d + 1 - backward_end, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[ahi - x - 1] == b[bhi - y - 1]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if x > n:
+                backward_end += 2
+            elif y > m:
+                backward_start += 2
+            elif not odd:
+                other = offset + delta - k
+                if 0 <= other < size and forward[other] != -1:
+                    front_x = forward[other]
+                    if front_x >= n - x:
+                        return [(alo + front_x, blo + front_x - (delta - k), 0)]
+    if 0 < best[0] + best[1] < n + m:
+        return [(alo + best[0], blo + best[1], 0)] # Too costly: a correct, non-minimal split
+    return []
+
+
+def _shares_a_line(a, b, alo, ahi, blo, bhi, scratch):
+    """Whether any line of a[alo:ahi] also occurs in b[blo:bhi]."""
+    mark = scratch.mark
+    for j in range(blo, bhi):
+        mark[b[j]] = 1
+    found = any(mark[a[i]] for i in range(alo, ahi))
+    for j in range(blo, bhi):
+        mark[b[j]] = 0
+    return found
+
+
+def _match_counts(a, b, alo, ahi, blo, bhi, scratch):
+    """
+    (common, pairs) for a region: common is how many lines any alignment could match
+    at most (lines of one side that occur in the other, the smaller side's count), and
+    pairs the number of (i, j) with a[i] == b[j].
+    """
+    count_a, count_b = scratch.count, scratch.count_b
+    for i in range(alo, ahi):
+        count_a[a[i]] += 1
+    for j in range(blo, bhi):
+        count_b[b[j]] += 1
+    in_b = pairs = 0
+    for i in range(alo, ahi):
+        found = count_b[a[i]]
+        if found:
+            in_b += 1
+            pairs += found
+    in_a = sum(1 for j in range(blo, bhi) if count_a[b[j]])
+    for i in range(alo, ahi):
+        count_a[a[i]] = 0
+    for j in range(blo, bhi):
+        count_b[b[j]] = 0
+    return min(in_a, in_b), pairs
+
+
+def _sparse_lcs(a, b, alo, ahi, blo, bhi, scratch):
+    """
+    A longest common subsequence of the region as merged blocks (Hunt-Szymanski):
+    O(pairs * log) instead of Myers' O((n + m) * edits), so it's the cheaper exact
+    method when few line pairs match, e.g. two mostly unrelated files.
+    """
+    head = scratch.head
+    chain_next = array("q", [-1]) * (bhi - blo) # Previous position of the same line in b
+    for j in range(blo, bhi):
+        line = b[j]
+        chain_next[j - blo] = head[line]
+        head[line] = j
+    thresholds = array("q") # Smallest j ending a common subsequence of each length
+    ends = array("q") # The node ending it
+    node_i, node_j, node_previous = array("q"), array("q"), array("q")
+    for i in range(alo, ahi):
+        j = head[a[i]]
+        while j >= 0: # Last to first, so one i never extends its own match
+            length = bisect.bisect_left(thresholds, j)
+            if length == len(thresholds) or thresholds[length] != j:
+                node_i.append(i)
+                node_j.append(j)
+                node_previous.append(ends[length - 1] if length else -1)
+                if length == len(thresholds):
+                    thresholds.append(j)
+                    ends.append(len(node_i) - 1)
+                else:
+                    thresholds[length] = j
+                    ends[length] = len(node_i) - 1
+            j = chain_next[j - blo]
+    for j in range(blo, bhi):
+        head[b[j]] = -1
+    if not ends:
+        return []
+    blocks = []
+    node = ends[-1]
+    while node >= 0:
+        i, j = node_i[node], node_j[node]
+        if blocks and blocks[-1][0] == i + 1 and blocks[-1][1] == j + 1:
+            blocks[-1] = (i, j, blocks[-1][2] + 1) # Extends the run backwards
+        else:
+            blocks.append((i, j, 1))
+        node = node_previous[node]
+    blocks.reverse()
+    return blocks
+
+
+class _Scratch:
+    """
+    Per-line-id tables shared by the splitters of one diff, so they don't build a
+    dict per region. Every splitter puts back the entries it touched before returning.
+    """
+    def __init__(self, table_size):
+        self.mark = array("b", [0]) * table_size # _shares_a_line: the line occurs in b
+        self.count_b = array("i", [0]) * table_size # _match_counts: occurrences in b
+        self.where_a = array("q", [-2]) * table_size # Patience: -2 unseen, -1 repeated, else position
+        self.where_b = array("q", [-2]) * table_size
+        self.head = array("q", [-1]) * table_size # Histogram: first position of each line in the region
+        self.count = array("i", [0]) * table_size # Histogram: occurrences in the region
+
+
+def _patience_split(a, b, alo, ahi, blo, bhi, scratch):
+    """Lines unique to both sides, kept where they appear in the same order (longest such run)."""
+    where_a, where_b = scratch.where_a, scratch.where_b
+    for i in range(alo, ahi):
+        line = a[i]
+        where_a[line] = i if where_a[line] == -2 else -1
+    for j in range(blo, bhi):
+        line = b[j]
+        if where_a[line] >= 0:
+            where_b[line] = j if where_b[line] == -2 else -1
+    # Unique pairs in the order of a; their positions in b, for the longest increasing run
+    pair_i, pair_j = array("q"), array("q")
+    for i in range(alo, ahi):
+        line = a[i]
+        if where_a[line] == i and where_b[line] >= 0:
+            pair_i.append(i)
+            pair_j.append(where_b[line])
+    for i in range(alo, ahi):
+        where_a[a[i]] = -2
+    for j in range(blo, bhi):
+        where_b[b[j]] = -2
+    if not pair_i:
+        return []
+
+    # Longest increasing subsequence of the b positions (patience sorting)
+    tops = array("q") # Smallest ending j of an increasing run of each length
+    top_index = array("q")
+    previous = array("q", [-1]) * len(pair_j)
+    for index, j in enumerate(pair_j):
+        length = bisect.bisect_left(tops, j)
+        if length == len(tops):
+            tops.append(j)
+            top_index.append(index)
+        else:
+            tops[length] = j
+            top_index[length] = index
+        if length:
+            previous[index] = top_index[length - 1]
+    # Walk the run back, merging anchors that are next to each other on both sides
+    anchors = []
+    index = top_index[-1]
+    start_i, start_j = pair_i[index], pair_j[index]
+    end_i = start_i + 1
+    index = previous[index]
+    while index >= 0:
+        i, j = pair_i[index], pair_j[index]
+        if i + 1 == start_i and j + 1 == start_j:
+            start_i, start_j = i, j # Extends the current run backwards
+        else:
+            anchors.append((start_i, start_j, end_i - start_i))
+            start_i, start_j, end_i = i, j, i + 1
+        index = previous[index]
+    anchors.append((start_i, start_j, end_i - start_i))
+    anchors.reverse()
+    return anchors
+
+
+def _histogram_split(a, b, alo, ahi, blo, bhi, scratch):
+    """
+    The common run built around the rarest line (fewest occurrences in a[alo:ahi]),
+    longest first on ties. Lines occurring more than HISTOGRAM_MAX_CHAIN times are ignored.
+    """
+    head, count = scratch.head, scratch.count
+    chain_next = array("q", [-1]) * (ahi - alo) # Next position of the same line in a
+    for i in range(ahi - 1, alo - 1, -1):
+        line = a[i]
+        chain_next[i - alo] = head[line]
+        head[line] = i
+        count[line] += 1
+    best = None
+    best_count = HISTOGRAM_MAX_CHAIN + 1
+    best_length = 0
+    j = blo
+    while j < bhi:
+        line = b[j]
+        i = head[line]
+        if i < 0 or count[line] > best_count:
+            j += 1
+            continue
+        next_j = j + 1
+        while i >= 0:
+            start_i, start_j = i, j
+            while start_i > alo and start_j > blo and a[start_i - 1] == b[start_j - 1]:
+                start_i -= 1
+                start_j -= 1
+            end_i, end_j = i + 1, j + 1
+            while end_i < ahi and end_j < bhi and a[end_i] == b[end_j]:
+                end_i += 1
+                end_j += 1
+            length = end_i - start_i
+            if count[line] < best_count or length > best_length:
+                best = (start_i, start_j, length)
+                best_count, best_length = count[line], length
+            next_j = max(next_j, end_j) # Lines inside this run can't start a better one
+            i = chain_next[i - alo]
+        j = next_j
+    for i in range(alo, ahi):
+        head[a[i]] = -1
+        count[a[i]] = 0
+    return [best] if best is not None else []
+
+
+SPLITTERS = {"myers": _myers_split, "patience": _patience_split, "histogram": _histogram_split}
+# Regions longer than this are first cut at their patience anchors, whatever the algorithm:
+# that's one linear pass, where histogram or Myers would need many passes over a big file.
+LARGE_REGION = 20_000
+
+
+# --- Streaming the diff ---
+def matching_blocks(a, b, algorithm="histogram"):
+    """
+    Yields (i, j, length) runs where a[i:i+length] == b[j:j+length], left to right.
+    Regions still to be compared wait on a stack (so nothing recurses), and the
+    leftmost one is always worked on next, so blocks come out in order.
+    """
+    if algorithm not in SPLITTERS:
+        raise DiffError(f"Unknown algorithm {algorithm!r} (choose from {', '.join(ALGORITHMS)})")
+    split = SPLITTERS[algorithm]
+    scratch = _Scratch(max(max(a, default=-1), max(b, default=-1)) + 1)
+    stack = [(0, len(a), 0, len(b))] # Regions, or (i, j, length) matches, rightmost at the bottom
+    while stack:
+        item = stack.pop()
+        if len(item) == 3:
+            yield item
+            continue
+        alo, ahi, blo, bhi = item
+        # Common prefix and suffix
+        start = alo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start:
+            yield (start, blo - (alo - start), alo - start)
+        end = ahi
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        if ahi < end:
+            stack.append((ahi, bhi, end - ahi))
+        if alo == ahi or blo == bhi:
+            continue # Only deletions or only insertions left
+        if not _shares_a_line(a, b, alo, ahi, blo, bhi, scratch):
+            continue # Nothing in common: the whole region is one replacement
+        blocks = []
+        if ahi - alo + bhi - blo > LARGE_REGION:
+            blocks = _patience_split(a, b, alo, ahi, blo, bhi, scratch)
+        if not blocks:
+            blocks = split(a, b, alo, ahi, blo, bhi, scratch)
+        if not blocks and split is not _myers_split:
+            blocks = _myers_split(a, b, alo, ahi, blo, bhi, scratch) # No anchors: plain Myers for this region
+        # Push right to left: region after the last block, the block, ..., region before the first
+        for i, j, length in reversed(blocks):
+            stack.append((i + length, ahi, j + length, bhi))
+            if length:
+                stack.append((i, j, length))
+            ahi, bhi = i, j
+        if blocks:
+            stack.append((alo, ahi, blo, bhi))
+
+
+def diff_hunks(a, b, algorithm="histogram"):
+    """
+    Yields the differences between id arrays 'a' and 'b' as difflib-style opcodes
+    (tag, i1, i2, j1, j2) with tag "replace", "delete" or "insert"; equal runs are left out.
+    """
+    i = j = 0
+    for block_i, block_j, length in matching_blocks(a, b, algorithm):
+        if block_i > i or block_j > j:
+            tag = "replace" if block_i > i and block_j > j else "delete" if block_i > i else "insert"
+            yield (tag, i, block_i, j, block_j)
+        i, j = block_i + length, block_j + length
+    if i < len(a) or j < len(b):
+        tag = "replace" if i < len(a) and j < len(b) else "delete" if i < len(a) else "insert"
+        yield (tag, i, len(a), j, len(b))
+
+
+def diff_sources(old, new, algorithm="histogram"):
+    """diff_hunks() for two LineSources."""
+    a, b = intern_lines(old, new)
+    return diff_hunks(a, b, algorithm)
+
+
+def group_hunks(hunks, context=3):
+    """
+    Groups a stream of opcodes into unified-diff hunks: lists of opcodes whose
+    unchanged gaps are at most 2 * context lines. Yields each group when it's complete.
+    """
+    group = []
+    for hunk in hunks:
+        if group and hunk[1] - group[-1][2] > 2 * context:
+            yield group
+            group = []
+        group.append(hunk)
+    if group:
+        yield group
+
+
+def unified_diff(old, new, context=3, algorithm="histogram"):
+    """
+    Yields the lines of a unified diff between two LineSources, as they are found (none
+    if they're equal). A last line without a newline is followed by GNU diff's marker.
+    """
+    def show(prefix, source, index):
+        yield prefix + source.line(index)
+        if source.missing_newline and index == len(source) - 1:
+            yield NO_NEWLINE_MARKER
+
+    for number, group in enumerate(group_hunks(diff_sources(old, new, algorithm), context)):
+        if number == 0:
+            yield f"--- {old.name}"
+            yield f"+++ {new.name}"
+        a_start = max(group[0][1] - context, 0)
+        b_start = max(group[0][3] - context, 0)
+        a_end = min(group[-1][2] + context, len(old))
+        b_end = min(group[-1][4] + context, len(new))
+        yield f"@@ -{_hunk_range(a_start, a_end)} +{_hunk_range(b_start, b_end)} @@"
+        i = a_start
+        for _, i1, i2, j1, j2 in group:
+            for index in range(i, i1):
+                yield from show(" ", old, index)
+            for index in range(i1, i2):
+                yield from show("-", old, index)
+            for index in range(j1, j2):
+                yield from show("+", new, index)
+            i = i2
+        for index in range(i, a_end):
+            yield from show(" ", old, index)
+
+
+def _hunk_range(start, stop):
+    """Unified diff line range: 1-based start and length (start is the line before for empty ranges)."""
+    length = stop - start
+    first = start + 1 if length else start
+    return f"{first}" if length == 1 else f"{first},{length}"
+
+
+# --- Side-by-side layout ---
+class SideBySide:
+    """
+    Row index of a side-by-side view: unchanged runs take one row per line, and a
+    changed hunk takes as many rows as its longer side (the shorter side is padded).
+    Only one entry per run/hunk ("segment") is stored, in arrays, so the index stays
+    small for millions of lines; rows, line numbers and hunks are found by bisecting.
+    """
+    def __init__(self, old, new, hunks):
+        self.old = old
+        self.new = new
+        self.starts = array("q") # First row of each segment
+        self.a_starts, self.a_ends = array("q"), array("q") # Old line range of each segment
+        self.b_starts, self.b_ends = array("q"), array("q")
+        self.kinds = array("b")
+        self.hunk_rows = array("q") # First row of each hunk, for next/previous navigation
+        i = j = 0
+        self.rows = 0
+        for tag, i1, i2, j1, j2 in hunks:
+            if i1 > i:
+                self._add(ROW_EQUAL, i, i1, j, j1)
+            self.hunk_rows.append(self.rows)
+            self._add(ROW_KINDS[tag], i1, i2, j1, j2)
+            i, j = i2, j2
+        if i < len(old):
+            self._add(ROW_EQUAL, i, len(old), j, len(new))
+
+    def _add(self, kind, i1, i2, j1, j2):
+        self.starts.append(self.rows)
+        self.a_starts.append(i1)
+        self.a_ends.append(i2)
+        self.b_starts.append(j1)
+        self.b_ends.append(j2)
+        self.kinds.append(kind)
+        self.rows += max(i2 - i1, j2 - j1)
+
+    def rows_between(self, start, stop):
+        """Yields (row, kind, old line index or None, new line index or None) for rows start..stop-1."""
+        stop = min(stop, self.rows)
+        if start >= stop:
+            return
+        segment = bisect.bisect_right(self.starts, start) - 1
+        row = start
+        while row < stop:
+            offset = row - self.starts[segment]
+            segment_end = self.starts[segment + 1] if segment + 1 < len(self.starts) else self.rows
+            kind = self.kinds[segment]
+            a_start, a_end = self.a_starts[segment], self.a_ends[segment]
+            b_start, b_end = self.b_starts[segment], self.b_ends[segment]
+            while row < min(stop, segment_end):
+                old_index = a_start + offset if a_start + offset < a_end else None
+                new_index = b_start + offset if b_start + offset < b_end else None
+                yield row, kind, old_index, new_index
+                row += 1
+                offset += 1
+            segment += 1
+
+    def row_for_line(self, index, side="old"):
+        """The row showing line 'index' (0-based) of the old or new file."""
+        starts, ends = (self.a_starts, self.a_ends) if side == "old" else (self.b_starts, self.b_ends)
+        if not self.starts:
+            return 0
+        segment = max(bisect.bisect_right(starts, index) - 1, 0)
+        length = ends[segment] - starts[segment]
+        return self.starts[segment] + max(0, min(index - starts[segment], length - 1))
+
+    def next_hunk(self, row):
+        """First row of the first hunk below 'row', or None."""
+        position = bisect.bisect_right(self.hunk_rows, row)
+        return self.hunk_rows[position] if position < len(self.hunk_rows) else None
+
+    def previous_hunk(self, row):
+        """First row of the last hunk above 'row', or None."""
+        position = bisect.bisect_left(self.hunk_rows, row) - 1
+        return self.hunk_rows[position] if position >= 0 else None
+
+    def hunk_number(self, row):
+        """How many hunks start at or above 'row' (the 1-based number of the hunk being read)."""
+        return bisect.bisect_right(self.hunk_rows, row)
+
+    def close(self):
+        self.old.close()
+        self.new.close()
+
+
+def intraline_spans(old_text, new_text, unit="words"):
+    """
+    The character ranges that differ between two versions of a line, as
+    ([(start, end), ...] in old_text, [(start, end), ...] in new_text).
+    'unit' is "words" (runs of letters/digits, spaces and punctuation) or "chars".
+    """
+    if unit == "words":
+        old_tokens, new_tokens = WORD_PATTERN.findall(old_text), WORD_PATTERN.findall(new_text)
+    else:
+        old_tokens, new_tokens = list(old_text), list(new_text)
+    old_offsets = list(accumulate(map(len, old_tokens), initial=0))
+    new_offsets = list(accumulate(map(len, new_tokens), initial=0))
+    old_spans, new_spans = [], []
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if i2 > i1:
+            old_spans.append((old_offsets[i1], old_offsets[i2]))
+        if j2 > j1:
+            new_spans.append((new_offsets[j1], new_offsets[j2]))
+    return old_spans, new_spans
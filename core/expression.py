@@ -0,0 +1,438 @@
+import math
+import operator
+import re
+from decimal import Context, Decimal, InvalidOperation, localcontext
+from functools import lru_cache
+
+# How many compiled expressions to keep (the calculator re-evaluates the same ones a lot)
+COMPILE_CACHE_SIZE = 256
+# Significant digits used in decimal mode
+DECIMAL_PRECISION = 50
+DECIMAL_CONTEXT = Context(prec=DECIMAL_PRECISION)
+# The live preview skips longer expressions, so one keystroke never costs more than
+# compiling and evaluating this many tokens (the = button still evaluates anything)
+PREVIEW_MAX_TOKENS = 200
+
+# --- Tokenizer ---
+# One token per match: a number, an operator/bracket/comma, or a name
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<op>\*\*|//|[-+*/%^(),])
+      | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+    )""", re.VERBOSE)
+
+
+class ExpressionError(ValueError):
+    """Raised for anything that isn't a valid expression (or can't be computed)."""
+
+
+def tokenize(text, start=0, tokens=None):
+    """
+    Splits an expression (from position 'start' on) into (kind, text, position) tuples.
+    Appends them to 'tokens' if given, so on error it holds everything read before.
+    """
+    tokens = [] if tokens is None else tokens
+    position = start
+    end = len(text.rstrip())
+    while position < end:
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise ExpressionError(f"Unexpected character {text[position:].strip()[:1]!r} at {position}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        position = match.end()
+    return tokens
+
+
+class IncrementalTokenizer:
+    """
+    Keeps the tokens of an expression that is being typed. update() only re-tokenizes
+    from the token the edit touched, so typing or deleting at the end costs the same
+    however long the expression already is. A half-typed, invalid tail (like "2 $")
+    is kept in 'error' instead of being raised.
+    """
+    # Tokens merge with what's typed after them ("1" "e" "+" then "5" is the number 1e+5),
+    # so this many extra tokens before an edit are always re-read
+    LOOKBACK = 2
+
+    def __init__(self):
+        self.text = ""
+        self.tokens = []
+        self.error = None
+
+    def update(self, text):
+        """Brings the tokens up to date with 'text' and returns them."""
+        old = self.text
+        if text.startswith(old):
+            common = len(old) # Typed at the end
+        elif old.startswith(text):
+            common = len(text) # Deleted at the end
+        else:
+            common = 0
+            for common, (a, b) in enumerate(zip(old, text)):
+                if a != b:
+                    break
+        tokens = self.tokens
+        while tokens and tokens[-1][2] + len(tokens[-1][1]) >= common:
+            tokens.pop()
+        del tokens[max(0, len(tokens) - self.LOOKBACK):]
+        restart = tokens[-1][2] + len(tokens[-1][1]) if tokens else 0
+
+        self.text = text
+        self.error = None
+        try:
+            tokenize(text, restart, tokens)
+        except ExpressionError as e:
+            self.error = e # Tokens up to the bad character are kept; the next edit re-reads from there
+        return tokens
+
+
+# --- Parser ---
+# Binding power of each binary operator; higher binds tighter.
+BINARY_PRECEDENCE = {"+": 10, "-": 10, "*": 20, "/": 20, "//": 20, "%": 20, "^": 40, "**": 40}
+RIGHT_ASSOCIATIVE = {"^", "**"}
+UNARY_PRECEDENCE = 30 # Between * and ^, so -2^2 is -(2^2)
+
+
+class Parser:
+    """
+    Pratt parser producing a compact AST of tuples:
+        ("num", value)  ("var", name)  ("neg", node)  ("bin", op, left, right)  ("call", name, args)
+    """
+    def __init__(self, text, decimal_mode=False, tokens=None):
+        self.text = text
+        self.tokens = tokenize(text) if tokens is None else tokens
+        self.index = 0
+        self.decimal_mode = decimal_mode
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        node = self.parse_expression(0)
+        if self.index < len(self.tokens):
+            _, token_text, position = self.tokens[self.index]
+            raise ExpressionError(f"Unexpected {token_text!r} at {position}")
+        return node
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else (None, None, len(self.text))
+
+    def advance(self):
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def expect(self, token_text):
+        kind, found, position = self.advance()
+        if found != token_text:
+            raise ExpressionError(f"Expected {token_text!r} at {position}")
+
+    def parse_expression(self, min_precedence):
+        node = self.parse_prefix()
+        while True:
+            kind, op, _ = self.peek()
+            precedence = BINARY_PRECEDENCE.get(op) if kind == "op" else None
+            if precedence is None or precedence <= min_precedence and not (
+                    op in RIGHT_ASSOCIATIVE and precedence == min_precedence):
+                return node
+            self.advance()
+            # Right-associative operators parse their right side at their own level
+            next_min = precedence - 1 if op in RIGHT_ASSOCIATIVE else precedence
+            node = ("bin", "^" if op == "**" else op, node, self.parse_expression(next_min))
+
+    def parse_prefix(self):
+        kind, token_text, position = self.advance()
+        if kind == "number":
+            return ("num", parse_number(token_text, self.decimal_mode))
+        if kind == "name":
+            if self.peek()[1] == "(":
+                self.advance()
+                args = []
+                if self.peek()[1] != ")":
+                    args.append(self.parse_expression(0))
+                    while self.peek()[1] == ",":
+                        self.advance()
+                        args.append(self.parse_expression(0))
+                self.expect(")")
+                return ("call", token_text, tuple(args))
+            return ("var", token_text)
+        if token_text == "(":
+            node = self.parse_expression(0)
+            self.expect(")")
+            return node
+        if token_text in ("-", "+"):
+            operand = self.parse_expression(UNARY_PRECEDENCE)
+            return ("neg", operand) if token_text == "-" else operand
+        if kind is None:
+            raise ExpressionError("Unexpected end of expression")
+        raise ExpressionError(f"Unexpected {token_text!r} at {position}")
+
+
+def parse_number(text, decimal_mode=False):
+    """Turns a number literal (or a stored result like "92") into int/float, or Decimal in decimal mode."""
+    text = str(text).strip()
+    try:
+        if decimal_mode:
+            return Decimal(text)
+        if re.fullmatch(r"[-+]?\d+", text):
+            return int(text)
+        return float(text)
+    except (ValueError, InvalidOperation) as e:
+        raise ExpressionError(f"Not a number: {text!r}") from e
+
+
+# --- Operators and functions ---
+# Whole-number powers with more digits than this are refused: 9^9^9 would otherwise
+# freeze the app for minutes (and Python can't print ints this long anyway)
+MAX_INTEGER_DIGITS = 4300
+INTEGER_LIMIT = 10 ** MAX_INTEGER_DIGITS # Smallest int with more digits than that
+
+def _power(base, exponent):
+    if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1
+            and exponent * math.log10(abs(base)) > MAX_INTEGER_DIGITS):
+        raise OverflowError("Result too large")
+    result = base ** exponent
+    if isinstance(result, complex): # (-8)^(1/3): Python's ** gives a complex root
+        raise ValueError("Negative number to a fractional power")
+    return result
+
+FLOAT_OPERATORS = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+    "//": operator.floordiv, "%": operator.mod, "^": _power,
+}
+DECIMAL_OPERATORS = FLOAT_OPERATORS # Decimal implements all of them natively
+
+FLOAT_FUNCTIONS = {
+    "sqrt": math.sqrt, "abs": abs, "round": round, "floor": math.floor, "ceil": math.ceil,
+    "exp": math.exp, "ln": math.log, "log": math.log10, "log2": math.log2,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan,
+    "min": min, "max": max,
+}
+
+def _via_float(function):
+    """Wraps a float-only function so it can be used in decimal mode."""
+    return lambda *args: Decimal(repr(function(*(float(arg) for arg in args))))
+
+DECIMAL_FUNCTIONS = {name: _via_float(function) for name, function in FLOAT_FUNCTIONS.items()}
+DECIMAL_FUNCTIONS.update({
+    "sqrt": lambda x: x.sqrt(), "abs": abs, "round": round, "exp": lambda x: x.exp(),
+    "ln": lambda x: x.ln(), "log": lambda x: x.log10(), "min": min, "max": max,
+    "floor": lambda x: Decimal(math.floor(x)), "ceil": lambda x: Decimal(math.ceil(x)),
+})
+
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+# Everything that can go wrong while computing a (valid) expression
+EVALUATION_ERRORS = (ArithmeticError, ValueError, TypeError, InvalidOperation)
+
+
+# --- Compiler ---
+class CompiledExpression:
+    """
+    A parsed expression turned into nested Python closures, ready to evaluate many times.
+    'variables' lists the names it needs (constants like pi are already folded in).
+    """
+    def __init__(self, text, decimal_mode=False, tokens=None):
+        self.text = text
+        self.decimal_mode = decimal_mode
+        try:
+            with localcontext(DECIMAL_CONTEXT):
+                self.tree = self._fold(Parser(text, decimal_mode, tokens).parse())
+                self.variables = frozenset(self._names(self.tree))
+                self._function = self._compile(self.tree)
+        except RecursionError:
+            # Every pass recurses once per nesting level: "-"*800+"1" or "1+"*2000+"1"
+            raise ExpressionError("Expression too complex") from None
+
+    def _names(self, node):
+        kind = node[0]
+        if kind == "var":
+            yield node[1]
+        elif kind == "neg":
+            yield from self._names(node[1])
+        elif kind == "bin":
+            yield from self._names(node[2])
+            yield from self._names(node[3])
+        elif kind == "call":
+            for arg in node[2]:
+                yield from self._names(arg)
+
+    def _fold(self, node):
+        """
+        Replaces constants (pi, e) and every subtree made only of numbers with its
+        value, so "2*pi*x" is computed as 6.28...*x on each evaluation.
+        """
+        kind = node[0]
+        if kind == "var":
+            if node[1] in CONSTANTS:
+                value = CONSTANTS[node[1]]
+                return ("num", Decimal(repr(value)) if self.decimal_mode else value)
+            return node
+        if kind == "neg":
+            children = [self._fold(node[1])]
+            folded = ("neg", children[0])
+        elif kind == "bin":
+            children = [self._fold(node[2]), self._fold(node[3])]
+            folded = ("bin", node[1], *children)
+        elif kind == "call":
+            children = [self._fold(arg) for arg in node[2]]
+            folded = ("call", node[1], tuple(children))
+        else:
+            return node
+        if all(child[0] == "num" for child in children):
+            try:
+                return ("num", self._compile(folded)({}))
+            except EVALUATION_ERRORS:
+                pass # e.g. 1/0: leave the error for evaluation time
+        return folded
+
+    def _compile(self, node):
+        """Returns a function env -> value for 'node'."""
+        kind = node[0]
+        if kind == "num":
+            value = node[1]
+            return lambda env: value
+
+        if kind == "var":
+            name = node[1]
+            def variable(env):
+                try:
+                    return env[name]
+                except KeyError:
+                    raise ExpressionError(f"Unknown variable {name!r}") from None
+            return variable
+
+        if kind == "neg":
+            operand = self._compile(node[1])
+            return lambda env: -operand(env)
+
+        if kind == "bin":
+            _, op, left_node, right_node = node
+            function = (DECIMAL_OPERATORS if self.decimal_mode else FLOAT_OPERATORS)[op]
+            # A number on one side is by far the most common case; skip its closure call
+            if right_node[0] == "num":
+                left, right_value = self._compile(left_node), right_node[1]
+                return lambda env: function(left(env), right_value)
+            if left_node[0] == "num":
+                left_value, right = left_node[1], self._compile(right_node)
+                return lambda env: function(left_value, right(env))
+            left, right = self._compile(left_node), self._compile(right_node)
+            return lambda env: function(left(env), right(env))
+
+        # kind == "call"
+        _, name, arg_nodes = node
+        functions = DECIMAL_FUNCTIONS if self.decimal_mode else FLOAT_FUNCTIONS
+        if name not in functions:
+            raise ExpressionError(f"Unknown function {name!r}")
+        function = functions[name]
+        args = [self._compile(arg) for arg in arg_nodes]
+        if len(args) == 1:
+            arg = args[0]
+            return lambda env: function(arg(env))
+        return lambda env: function(*[arg(env) for arg in args])
+
+    def evaluate(self, variables=None):
+        """Computes the value. 'variables' maps names (like 'x' or 'ans') to numbers."""
+        try:
+            if self.decimal_mode:
+                with localcontext(DECIMAL_CONTEXT):
+                    return self._function(variables or {})
+            return self._function(variables or {})
+        except ExpressionError:
+            raise
+        except EVALUATION_ERRORS as e:
+            raise ExpressionError(str(e) or type(e).__name__) from e
+        except RecursionError: # The closures nest as deep as the expression
+            raise ExpressionError("Expression too complex") from None
+
+    def evaluate_many(self, values, name="x", variables=None):
+        """
+        Yields the float result for each value of the variable 'name' (batch mode).
+        Values that can't be computed (1/0, sqrt(-1), ...) give nan instead of an error.
+        """
+        env = dict(variables or {})
+        function = self._function
+        nan = float("nan")
+        for value in values:
+            env[name] = value
+            try:
+                yield float(function(env))
+            except (*EVALUATION_ERRORS, RecursionError):
+                yield nan
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_expression(text, decimal_mode=False):
+    """Parses and compiles 'text', reusing the result for text seen recently."""
+    return CompiledExpression(text, decimal_mode)
+
+
+def evaluate(expression, variables=None, decimal_mode=False):
+    """
+    Evaluates an expression like "12*(3+4)/2", "sqrt(ans)^2" or "2*x + 1".
+    Supports + - * / // % ^ (or **), parentheses, functions (sqrt, sin, ln, log, min, ...),
+    the constants pi and e, and any variables passed in. There is no eval(), so
+    there is no way to run arbitrary code.
+    """
+    return compile_expression(expression.strip(), decimal_mode).evaluate(variables)
+
+
+# --- Live preview ---
+# Tokens that can't end an expression: "12*" previews as 12, "sqrt(" as nothing
+DANGLING = {"+", "-", "*", "/", "//", "%", "^", "**", "(", ","}
+
+
+def complete_tokens(tokens, text_length):
+    """
+    Turns the tokens of a half-typed expression into a complete one, for previews:
+    drops operators and open brackets left dangling at the end and closes the rest,
+    so "12*(3+4" becomes 12*(3+4). Returns a tuple of tokens.
+    """
+    end = len(tokens)
+    while end and tokens[end - 1][1] in DANGLING:
+        end -= 1
+    depth = 0
+    for _, token_text, _ in tokens[:end]:
+        if token_text == "(":
+            depth += 1
+        elif token_text == ")":
+            depth -= 1
+    return tuple(tokens[:end]) + (("op", ")", text_length),) * max(depth, 0)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_tokens(tokens, decimal_mode):
+    return CompiledExpression("".join(token[1] for token in tokens), decimal_mode, list(tokens))
+
+
+def preview(tokenizer, text, variables=None, decimal_mode=False):
+    """
+    The value of the expression typed so far, or None when there isn't one yet.
+    'tokenizer' is an IncrementalTokenizer kept between calls, so each keystroke
+    only re-tokenizes the end of the text. Expressions longer than PREVIEW_MAX_TOKENS
+    (or too deeply nested to compile) have no preview.
+    """
+    tokens = tokenizer.update(text)
+    if tokenizer.error is not None or len(tokens) > PREVIEW_MAX_TOKENS:
+        return None
+    tokens = complete_tokens(tokens, len(text))
+    if not tokens:
+        return None
+    try:
+        return _compile_tokens(tokens, decimal_mode).evaluate(variables)
+    except ExpressionError:
+        return None
+
+
+def format_result(value):
+    """Formats a result the way the calculator displays it."""
+    if isinstance(value, Decimal):
+        value = value.normalize(DECIMAL_CONTEXT)
+        # normalize() turns 100 into 1E+2; show plain digits for anything reasonably sized
+        return f"{value:f}" if abs(value.adjusted()) < DECIMAL_PRECISION else str(value)
+    if isinstance(value, int) and abs(value) >= INTEGER_LIMIT:
+        # 9^4000*9^4000: str() refuses ints this long (and nobody could read it)
+        raise ExpressionError("Result too large")
+    return str(value)
@@ -0,0 +1,33 @@
+import database
+
+
+class PreferencesService:
+    """
+    Reads and writes user preferences without the GUI.
+    Every write is committed right away (no write-behind, no worker thread).
+    'db_file' switches database.DATABASE_FILE for this process.
+    """
+    def __init__(self, db_file=None):
+        if db_file:
+            database.DATABASE_FILE = db_file
+        database.init_db()
+        self._users = {} # username -> UserPreferences
+
+    def user(self, username):
+        """Returns the (cached) UserPreferences for username, creating the user if needed."""
+        if username not in self._users:
+            self._users[username] = database.UserPreferences(username)
+        return self._users[username]
+
+    def get(self, username, tool_name, key, default=None):
+        return self.user(username).get_preference(tool_name, key, default)
+
+    def set(self, username, tool_name, key, value):
+        self.user(username).set_preference(tool_name, key, value)
+
+    def dump(self, username):
+        """All of a user's preferences as {tool_name: {key: value}}."""
+        return self.user(username).get_all_preferences()
+
+    def usernames(self, prefix=""):
+        return database.list_usernames(prefix)
@@ -0,0 +1,95 @@
+"""
+Snake replays: a game is fully described by its seed, board size and the ticks on
+which the snake turned, because the food placement comes from random.Random(seed).
+
+The turns are stored delta-encoded: each turn is (ticks since the previous turn) * 4
++ direction, written as a variable-length integer, so most turns take one byte.
+"""
+from .snake import SnakeGame, DIRECTIONS
+
+DIRECTION_CODES = list(DIRECTIONS) # "Left", "Right", "Up", "Down" -> 0..3
+
+
+class ReplayError(ValueError):
+    """Raised for replay data that can't be decoded."""
+
+
+def encode_turns(turns):
+    """[(tick, direction), ...] in tick order -> bytes."""
+    data = bytearray()
+    previous = 0
+    for tick, direction in turns:
+        value = (tick - previous) << 2 | DIRECTION_CODES.index(direction)
+        previous = tick
+        while value >= 0x80: # 7 bits per byte, high bit = "more bytes follow"
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+        data.append(value)
+    return bytes(data)
+
+
+def decode_turns(data):
+    """bytes from encode_turns() -> [(tick, direction), ...]."""
+    turns = []
+    tick = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        tick += value >> 2
+        turns.append((tick, DIRECTION_CODES[value & 3]))
+        value = shift = 0
+    if shift:
+        raise ReplayError("Replay data ends in the middle of a turn")
+    return turns
+
+
+class Replay:
+    """
+    A recorded game that can be re-simulated to any tick.
+    seek() moves forward by simulating only the ticks in between, and backwards by
+    simulating from the start, which is fast enough (a few microseconds per tick)
+    that no snapshots are needed.
+    """
+    def __init__(self, seed, cols, rows, turns, ticks=None):
+        self.seed = seed
+        self.cols = cols
+        self.rows = rows
+        self.turns = turns if not isinstance(turns, (bytes, bytearray)) else decode_turns(turns)
+        self.ticks = ticks # Length of the game, if known
+        self.restart()
+
+    @classmethod
+    def from_game(cls, game):
+        """The replay of a game played with a seed and record_turns=True."""
+        if game.seed is None or game.turn_log is None:
+            raise ReplayError("The game wasn't seeded and recorded")
+        return cls(game.seed, game.cols, game.rows, list(game.turn_log), game.ticks)
+
+    def encoded_turns(self):
+        return encode_turns(self.turns)
+
+    def restart(self):
+        self.game = SnakeGame(self.cols, self.rows, seed=self.seed)
+        self._next_turn = 0 # Index into self.turns
+
+    def advance(self, count=1):
+        """Plays 'count' more ticks (stopping at game over). Returns True if the snake ate."""
+        game = self.game
+        ate = False
+        for _ in range(count):
+            if game.game_over:
+                break
+            if self._next_turn < len(self.turns) and self.turns[self._next_turn][0] == game.ticks + 1:
+                game.direction = self.turns[self._next_turn][1] # Recorded turns are always legal
+                self._next_turn += 1
+            ate = game.step() or ate
+        return ate
+
+    def seek(self, tick):
+        """Puts the game at 'tick', re-simulating from the start if that's in the past."""
+        if tick < self.game.ticks:
+            self.restart()
+        self.advance(tick - self.game.ticks)
+        return self.game
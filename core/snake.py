@@ -0,0 +1,157 @@
+import random
+from collections import deque
+
+# Grid offsets for each direction name (the same names as the arrow keys)
+DIRECTIONS = {
+    "Left": (-1, 0),
+    "Right": (1, 0),
+    "Up": (0, -1),
+    "Down": (0, 1),
+}
+OPPOSITE = {"Left": "Right", "Right": "Left", "Up": "Down", "Down": "Up"}
+
+# Turns buffered ahead of the snake; each tick uses at most one
+INPUT_QUEUE_SIZE = 3
+
+# Default board size in cells (the Tk tool scales the cells to fit its canvas)
+DEFAULT_COLS = 20
+DEFAULT_ROWS = 20
+
+
+class SnakeGame:
+    """
+    The rules of Snake on a cols x rows grid, without any drawing.
+    Positions are (column, row) cells; snake[0] is the head.
+    'rng' is anything with randrange() (the random module by default); pass
+    'seed' instead to get a game that plays out the same way every time.
+
+    Every tick costs the same however long the snake or big the board is:
+    the body is a deque (add the head, drop the tail), and a free-cell index
+    (a list of free cells plus each cell's position in it, -1 when occupied)
+    answers "is this cell taken?" and "pick a random free cell" in O(1).
+    """
+    def __init__(self, cols=DEFAULT_COLS, rows=DEFAULT_ROWS, rng=None, seed=None, record_turns=False):
+        if cols < 6 or rows < 6:
+            raise ValueError("The board needs to be at least 6x6")
+        self.cols = cols
+        self.rows = rows
+        self.record_turns = record_turns
+        self.rng = rng if rng is not None else random
+        self.seed = None
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Starts a new game. With a seed, the food placement comes from random.Random(seed)."""
+        if seed is not None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+        self.snake = deque([(5, 5), (4, 5), (3, 5)]) # Initial snake segments
+        self.direction = "Right"
+        self.turns = deque() # Buffered turns, see queue_direction()
+        # With record_turns: (tick, direction) for every tick that moved in a new direction.
+        # Together with the seed that's everything needed to replay the game (core.replay).
+        self.turn_log = [] if self.record_turns else None
+        self._moving = self.direction
+        self.score = 0
+        self.game_over = False
+        self.won = False # Set when the snake fills the whole board
+        self.ticks = 0
+        self.food = None
+        # Free-cell index: cells are numbered row * cols + col
+        self._free = list(range(self.cols * self.rows))
+        self._free_position = list(self._free) # cell -> index in _free, or -1 if occupied
+        for cell in self.snake:
+            self._occupy(cell)
+        self.place_food()
+
+    # --- Free-cell index ---
+    def _occupy(self, cell):
+        number = cell[1] * self.cols + cell[0]
+        position = self._free_position[number]
+        last = self._free.pop() # Move the last free cell into the hole
+        if last != number:
+            self._free[position] = last
+            self._free_position[last] = position
+        self._free_position[number] = -1
+
+    def _release(self, cell):
+        number = cell[1] * self.cols + cell[0]
+        self._free_position[number] = len(self._free)
+        self._free.append(number)
+
+    def is_occupied(self, cell):
+        """True if a snake segment is on 'cell' (which must be on the board)."""
+        return self._free_position[cell[1] * self.cols + cell[0]] < 0
+
+    def free_cells(self):
+        return len(self._free)
+
+    def change_direction(self, new_direction):
+        """Turns the snake, ignoring an immediate reversal. Returns True if the direction changed."""
+        if new_direction in DIRECTIONS and new_direction != OPPOSITE[self.direction]:
+            self.direction = new_direction
+            return True
+        return False
+
+    def queue_direction(self, new_direction):
+        """
+        Buffers a turn for a coming tick (one turn per tick). It's checked against the
+        last buffered turn, so two quick presses within one tick (Up, then Left) both
+        count, and can never add up to a reversal. Returns True if the turn was queued.
+        """
+        last = self.turns[-1] if self.turns else self.direction
+        if (new_direction not in DIRECTIONS or new_direction in (last, OPPOSITE[last])
+                or len(self.turns) >= INPUT_QUEUE_SIZE):
+            return False
+        self.turns.append(new_direction)
+        return True
+
+    def step(self):
+        """
+        Advances the game by one tick. Returns True if the snake ate the food.
+        Sets game_over when the snake hits a wall or itself (or fills the board).
+        """
+        if self.game_over:
+            return False
+        self.ticks += 1
+        if self.turns:
+            self.direction = self.turns.popleft()
+        if self.direction != self._moving:
+            self._moving = self.direction
+            if self.turn_log is not None:
+                self.turn_log.append((self.ticks, self.direction))
+        dx, dy = DIRECTIONS[self.direction]
+        head_x, head_y = self.snake[0]
+        new_head = (head_x + dx, head_y + dy)
+        self.snake.appendleft(new_head)
+
+        # Check for collision with the wall (the head ends up just off the board)
+        if not (0 <= new_head[0] < self.cols and 0 <= new_head[1] < self.rows):
+            self._release(self.snake.pop())
+            self.game_over = True
+            return False
+
+        # Check for collision with food
+        ate = new_head == self.food
+        if not ate:
+            self._release(self.snake.pop()) # Remove tail (so moving into its cell is allowed)
+
+        # Check for collision with itself
+        if self.is_occupied(new_head):
+            self.game_over = True
+            return False
+        self._occupy(new_head)
+
+        if ate:
+            self.score += 1
+            self.place_food()
+        return ate
+
+    def place_food(self):
+        """Puts the food on a random free cell, in constant time. A full board wins the game."""
+        if not self._free:
+            self.food = None
+            self.won = self.game_over = True
+            return
+        number = self._free[self.rng.randrange(len(self._free))]
+        self.food = (number % self.cols, number // self.cols)
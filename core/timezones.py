@@ -0,0 +1,56 @@
+import datetime
+
+# Shown when pytz isn't installed (conversion itself needs pytz)
+FALLBACK_TIMEZONES = ["UTC", "America/New_York", "Europe/London", "Asia/Tokyo", "Australia/Sydney"]
+
+
+class TimezoneError(ValueError):
+    """Raised for a badly formatted time or an unknown timezone."""
+
+
+class TimezoneService:
+    """
+    Converts wall-clock times between timezones using pytz.
+    pytz is imported the first time the service is created, not when this module is.
+    """
+    def __init__(self):
+        try:
+            import pytz
+            self.pytz = pytz
+            self.available_timezones = list(pytz.common_timezones)
+        except ImportError:
+            self.pytz = None
+            self.available_timezones = list(FALLBACK_TIMEZONES)
+
+    @property
+    def available(self):
+        """True if pytz is installed and conversions can be made."""
+        return self.pytz is not None
+
+    def convert(self, time_str, from_tz_str, to_tz_str, date=None):
+        """
+        Converts "HH:MM" on 'date' (default: today) in from_tz_str to to_tz_str.
+        Returns a timezone-aware datetime.
+        """
+        if self.pytz is None:
+            raise TimezoneError("pytz library is required for timezone conversion.")
+        try:
+            hour, minute = map(int, time_str.split(':'))
+            day = date or datetime.date.today()
+            # Create a naive datetime object for the day with the input time
+            naive_dt = datetime.datetime(day.year, day.month, day.day, hour, minute)
+        except ValueError as e:
+            raise TimezoneError("Invalid time format (HH:MM).") from e
+
+        try:
+            from_tz = self.pytz.timezone(from_tz_str)
+            to_tz = self.pytz.timezone(to_tz_str)
+        except self.pytz.exceptions.UnknownTimeZoneError as e:
+            raise TimezoneError(f"Unknown timezone: {e}") from e
+
+        # Localize the naive datetime to the source timezone, then convert to the target timezone
+        return from_tz.localize(naive_dt).astimezone(to_tz)
+
+    @staticmethod
+    def format(dt):
+        return dt.strftime('%Y-%m-%d %H:%M:%S %Z%z')
@@ -1,26 +1,73 @@
 import sqlite3
 import json
 import os
+import re
+import sys
+import time
+from collections import OrderedDict
+
+from db_connection import manager as connection_manager
+from workers import SerialWorker, ImmediateWorker, ImmediatePump
 
 DATABASE_FILE = "digital_toolbox.db"
 
+# --- Write-behind settings ---
+# How long (in ms) to wait after the last change before committing the batch.
+FLUSH_DELAY_MS = 500
+
+# --- User sessions ---
+# How many users' preferences stay loaded in memory for quick switching.
+SESSION_CACHE_SIZE = 8
+
+# --- Schema ---
+# Bump when init_db gains a new migration step (stored in PRAGMA user_version).
+# 1: preferences moved from the users.preferences JSON blob to the preferences table
+# 2: calc_history table (and its full-text index, where SQLite has FTS5)
+# 3: snake_replays table
+# 4: scores table; Snake's high_score preference moved into it
+SCHEMA_VERSION = 4
+
+# --- Calculator history ---
+# Retention: entries older than this, or beyond this many per user, are pruned
+HISTORY_MAX_ENTRIES = 100_000
+HISTORY_MAX_AGE_DAYS = 365
+# Rows deleted per transaction while pruning, so other queued work can run in between
+PRUNE_BATCH_SIZE = 2000
+
+# --- Snake replays ---
+# Only the newest replays are kept per user (each is a few hundred bytes)
+REPLAYS_KEPT = 500
+
+# --- Scores ---
+# Legacy Snake high scores (from the preference) were all played on the 20x20 board
+LEGACY_SNAKE_GAME = "snake-20x20"
+
+UPSERT_PREFERENCE_SQL = '''
+    INSERT INTO preferences (user_id, tool_name, key, value) VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id, tool_name, key) DO UPDATE SET value = excluded.value
+'''
+
 def get_db_connection():
-    """Establishes and returns a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    # This allows you to access columns by name
-    conn.row_factory = sqlite3.Row
-    return conn
+    """
+    Returns the shared connection to the SQLite database.
+    The connection is opened (and tuned) once and then reused, so don't close it;
+    db_connection.manager.close_all() does that when the app exits.
+    """
+    return connection_manager.get_connection(DATABASE_FILE)
 
 def init_db():
     """
     Initializes the database and creates the necessary tables if they
     do not already exist.
+    Only the first call per database file does any work.
     """
+    if connection_manager.is_initialized(DATABASE_FILE):
+        return
     conn = get_db_connection()
     cursor = conn.cursor()
     
     # Create a 'users' table.
-    # The 'preferences' column will store a JSON string.
+    # The 'preferences' column is the legacy JSON blob, only read by the migration below.
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -28,73 +75,737 @@ def init_db():
             preferences TEXT
         )
     ''')
-    
+
+    # Create a 'preferences' table with one row per (user, tool, key).
+    # The composite primary key doubles as the index for per-tool lookups.
+    # 'value' holds the JSON encoding of a single preference value.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS preferences (
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            tool_name TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (user_id, tool_name, key)
+        ) WITHOUT ROWID
+    ''')
+
+    # Create a 'calc_history' table: one row per calculation, newest = highest id.
+    # (user_id, id) pages through a user's history newest first; (user_id, expression)
+    # answers "starts with" searches with a range query, like list_usernames().
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS calc_history (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            created_at REAL NOT NULL,
+            expression TEXT NOT NULL,
+            result TEXT NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS calc_history_user ON calc_history (user_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS calc_history_expression ON calc_history (user_id, expression)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS calc_history_created ON calc_history (user_id, created_at)")
+    _create_history_fts(conn)
+
+    # Create a 'snake_replays' table: one row per finished Snake game.
+    # A game is replayed from its seed and 'turns' (see core/replay.py for the encoding).
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS snake_replays (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            created_at REAL NOT NULL,
+            seed INTEGER NOT NULL,
+            cols INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            tick_ms INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            ticks INTEGER NOT NULL,
+            turns BLOB NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS snake_replays_user ON snake_replays (user_id, id)")
+
+    # Create a 'scores' table: one row per finished game, for every user.
+    # (game, score DESC) serves the leaderboard, (user_id, created_at) a user's recent
+    # games and (user_id, game, score DESC) their personal best, each with one index lookup.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY,
+            game TEXT NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            score INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS scores_leaderboard ON scores (game, score DESC, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS scores_user ON scores (user_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS scores_user_best ON scores (user_id, game, score DESC)")
+    _create_score_counts(conn)
+
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        _migrate_preference_blobs(conn)
+    if version < 4:
+        _migrate_snake_high_scores(conn)
+    if version < SCHEMA_VERSION:
+        # PRAGMA user_version records that the migrations have already run
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    conn.commit()
+    connection_manager.mark_initialized(DATABASE_FILE)
+
+def _create_history_fts(conn):
+    """
+    Adds a full-text index over calc_history (kept in sync by triggers), if this
+    SQLite was built with FTS5. Without it, "contains" searches fall back to LIKE.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'calc_history_fts'").fetchone() is not None
+    if not exists:
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE calc_history_fts USING fts5(
+                    expression, result, content='calc_history', content_rowid='id')
+            ''')
+        except sqlite3.OperationalError:
+            return # No FTS5 in this build
+        conn.execute("INSERT INTO calc_history_fts (calc_history_fts) VALUES ('rebuild')")
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS calc_history_fts_insert AFTER INSERT ON calc_history BEGIN
+            INSERT INTO calc_history_fts (rowid, expression, result) VALUES (new.id, new.expression, new.result);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS calc_history_fts_delete AFTER DELETE ON calc_history BEGIN
+            INSERT INTO calc_history_fts (calc_history_fts, rowid, expression, result)
+            VALUES ('delete', old.id, old.expression, old.result);
+        END
+    ''')
+
+def _has_history_fts(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'calc_history_fts'").fetchone() is not None
+
+def _create_score_counts(conn):
+    """
+    Adds score_counts: how many games of each game got each score, kept in sync with
+    'scores' by triggers. A rank is then a sum over the (few hundred) distinct scores
+    above it, however many millions of games were played.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS score_counts (
+            game TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            games INTEGER NOT NULL,
+            PRIMARY KEY (game, score)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS score_counts_insert AFTER INSERT ON scores BEGIN
+            INSERT INTO score_counts (game, score, games) VALUES (new.game, new.score, 1)
+            ON CONFLICT (game, score) DO UPDATE SET games = games + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS score_counts_delete AFTER DELETE ON scores BEGIN
+            UPDATE score_counts SET games = games - 1 WHERE game = old.game AND score = old.score;
+        END
+    ''')
+
+def _migrate_preference_blobs(conn):
+    """
+    One-time migration from the old layout, where each user's preferences were
+    a single JSON blob in users.preferences, to one row per key.
+    """
+    rows = conn.execute("SELECT id, preferences FROM users WHERE preferences IS NOT NULL").fetchall()
+    for row in rows:
+        try:
+            blob = json.loads(row['preferences'])
+        except ValueError:
+            continue # Unreadable blob, nothing we can recover
+        if not isinstance(blob, dict):
+            continue # Valid JSON but not {tool: {key: value}}, e.g. a bare string
+        conn.executemany(UPSERT_PREFERENCE_SQL, [
+            (row['id'], tool_name, key, json.dumps(value))
+            for tool_name, tool_prefs in blob.items() if isinstance(tool_prefs, dict)
+            for key, value in tool_prefs.items()
+        ])
+    # The blob column is kept (old code may still read it) but emptied so it can't go stale
+    conn.execute("UPDATE users SET preferences = NULL")
+
+def _migrate_snake_high_scores(conn):
+    """
+    One-time migration of the Snake tool's 'high_score' preference into 'scores',
+    as one game per user. The preference rows are removed so they can't go stale.
+    """
+    rows = conn.execute(
+        "SELECT user_id, value FROM preferences WHERE tool_name = 'Snake Game' AND key = 'high_score'").fetchall()
+    now = time.time()
+    for row in rows:
+        try:
+            score = int(json.loads(row['value']))
+        except (TypeError, ValueError, OverflowError): # Not a number, or Infinity
+            continue
+        if score > 0:
+            conn.execute("INSERT INTO scores (game, user_id, score, created_at) VALUES (?, ?, ?, ?)",
+                         (LEGACY_SNAKE_GAME, row['user_id'], score, now))
+    conn.execute("DELETE FROM preferences WHERE tool_name = 'Snake Game' AND key = 'high_score'")
+
+def list_usernames(prefix="", limit=50):
+    """
+    Returns up to 'limit' usernames starting with 'prefix', in alphabetical order.
+    The range condition lets SQLite answer from the index behind users.username's
+    UNIQUE constraint instead of scanning the table (LIKE would not use it).
+    """
+    conn = get_db_connection()
+    if prefix:
+        cursor = conn.execute(
+            "SELECT username FROM users WHERE username >= ? AND username < ? ORDER BY username LIMIT ?",
+            (prefix, prefix + "\U0010ffff", limit))
+    else:
+        cursor = conn.execute("SELECT username FROM users ORDER BY username LIMIT ?", (limit,))
+    return [row['username'] for row in cursor]
+
+# --- Persistence backends ---
+# Both run operations written as fn(conn, *args) and return a Future.
+class DatabaseWorker(SerialWorker):
+    """
+    Asynchronous backend: a single thread owns its own connection and runs the
+    queued operations in order, so the Tk main loop never waits on a slow disk
+    or a locked database for writes.
+    """
+    def __init__(self):
+        super().__init__(name="DatabaseWorker")
+
+    def submit(self, fn, *args):
+        return super().submit(_run_with_connection, fn, args)
+
+    def shutdown(self, wait=True):
+        # Close the worker's connection on its own thread, after the queued work is done
+        SerialWorker.submit(self, connection_manager.close_all)
+        super().shutdown(wait)
+
+class SynchronousDatabase(ImmediateWorker):
+    """Synchronous backend: runs each operation right away on the calling thread."""
+    def submit(self, fn, *args):
+        return super().submit(_run_with_connection, fn, args)
+
+def _run_with_connection(fn, args):
+    init_db() # No-op unless this database file hasn't been set up yet
+    return fn(get_db_connection(), *args)
+
+# --- Preference operations (run by a backend) ---
+def _select_or_create_user(conn, username):
+    """
+    Looks up the user's id in the database. If the user doesn't exist,
+    creates a new entry (with no preferences yet).
+    """
+    row = conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
+    if row:
+        return row['id']
+    # User does not exist, create them
+    cursor = conn.execute("INSERT INTO users (username) VALUES (?)", (username,))
+    conn.commit()
+    return cursor.lastrowid
+
+def _select_tool_preferences(conn, user_id, tool_name):
+    cursor = conn.execute(
+        "SELECT key, value FROM preferences WHERE user_id = ? AND tool_name = ?",
+        (user_id, tool_name))
+    return {row['key']: json.loads(row['value']) for row in cursor}
+
+def _select_all_preferences(conn, user_id):
+    prefs = {}
+    cursor = conn.execute("SELECT tool_name, key, value FROM preferences WHERE user_id = ?", (user_id,))
+    for row in cursor:
+        prefs.setdefault(row['tool_name'], {})[row['key']] = json.loads(row['value'])
+    return prefs
+
+def _upsert_preferences(conn, rows):
+    """Writes (user_id, tool_name, key, json value) rows in one transaction. Returns the time taken in ms."""
+    start = time.perf_counter()
+    conn.executemany(UPSERT_PREFERENCE_SQL, rows)
     conn.commit()
-    conn.close()
+    return (time.perf_counter() - start) * 1000
 
 # --- UserPreferences now lives in the database module ---
 class UserPreferences:
-    def __init__(self, username):
+    """
+    Holds one user's preferences in memory and saves them to the database.
+
+    With write_behind=True, set_preference only updates memory. The changes
+    are committed together by flush(), either when the debounce timer fires
+    or when the app calls flush() itself (tool switch, user switch, quit).
+    'scheduler' is anything with after()/after_cancel(), usually the Tk root.
+    Without a scheduler, pending changes wait for an explicit flush().
+
+    'backend' runs the SQL: a DatabaseWorker (writes don't block the caller)
+    or, by default, a SynchronousDatabase. Reads always wait for their answer.
+    'pump' brings finished writes back to the caller's thread (a TkFuturePump in the app).
+    When a write fails, its keys are marked changed again so the next flush() retries
+    them, and on_error(exception) is called on the caller's thread (by default the
+    error is printed to stderr).
+    """
+    def __init__(self, username, write_behind=False, flush_delay_ms=FLUSH_DELAY_MS, scheduler=None,
+                 backend=None, pump=None, on_error=None):
         self.username = username
-        self.conn = get_db_connection()
+        self.on_error = on_error
+        self.write_behind = write_behind
+        self.flush_delay_ms = flush_delay_ms
+        self.scheduler = scheduler
+        self.backend = backend if backend is not None else SynchronousDatabase()
+        self.pump = pump if pump is not None else ImmediatePump()
+        self._flush_job = None # after() id of the pending debounced flush
+
+        # Counters to check how many writes end up in each commit
+        self.stats = {
+            "writes": 0,          # set_preference calls
+            "pending_writes": 0,  # writes not yet handed to the backend
+            "commits": 0,         # commits actually made (one fsync each)
+            "flushes": 0,         # write-behind batches committed
+            "in_flight": 0,       # commits submitted but not finished yet
+            "errors": 0,
+            "last_error": None,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
         # Load or create the user on initialization
-        self.preferences = self._load_or_create_user()
+        self.user_id = self.backend.submit(_select_or_create_user, self.username).result()
+        # Per-tool preference dictionaries, loaded lazily the first time a tool asks
+        self.preferences = {}
+        # (tool_name, key) pairs changed in memory but not yet written (write-behind)
+        self._dirty_keys = set()
+        # Change subscribers: (tool_name, key) -> {subscription id: callback}
+        self._subscribers = {}
+        self._next_subscription_id = 0
 
-    def _load_or_create_user(self):
-        """
-        Loads user preferences from the database. If the user doesn't exist,
-        creates a new entry with default preferences.
-        """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT preferences FROM users WHERE username = ?", (self.username,))
-        row = cursor.fetchone()
-        
-        if row and row['preferences']:
-            # User exists, load their preferences
-            # The preferences are stored as a JSON string, so we parse it
-            return json.loads(row['preferences'])
-        else:
-            # User does not exist or has no prefs, create them with empty preferences
-            default_prefs = {}
-            # Convert the dictionary to a JSON string for storage
-            prefs_json = json.dumps(default_prefs)
-            if row: # User exists but prefs are NULL
-                 cursor.execute("UPDATE users SET preferences = ? WHERE username = ?", (prefs_json, self.username))
-            else: # User does not exist
-                 cursor.execute("INSERT INTO users (username, preferences) VALUES (?, ?)",
-                               (self.username, prefs_json))
-            self.conn.commit()
-            return default_prefs
+    def _load_tool(self, tool_name):
+        """Returns the cached preference dictionary for a tool, reading it from the DB on first use."""
+        tool_prefs = self.preferences.get(tool_name)
+        if tool_prefs is None:
+            tool_prefs = self.backend.submit(_select_tool_preferences, self.user_id, tool_name).result()
+            self.preferences[tool_name] = tool_prefs
+        return tool_prefs
 
     # --- NEW METHOD ---
     def get_tool_preferences(self, tool_name, default_prefs=None):
         """Gets the entire preference dictionary for a specific tool."""
         if default_prefs is None:
             default_prefs = {}
-        # Get the sub-dictionary for the tool, or return the default if not found.
-        return self.preferences.get(tool_name, default_prefs)
+        # Get the sub-dictionary for the tool, or return the default if nothing is stored.
+        return self._load_tool(tool_name) or default_prefs
+
+    def get_all_preferences(self):
+        """Loads every tool's preferences at once and returns {tool_name: {key: value}}."""
+        stored = self.backend.submit(_select_all_preferences, self.user_id).result()
+        for tool_name, tool_prefs in stored.items():
+            # Keep changes already made in memory (write-behind) over what's on disk
+            stored[tool_name] = dict(tool_prefs, **self.preferences.get(tool_name, {}))
+        self.preferences.update(stored)
+        return self.preferences
 
     def get_preference(self, tool_name, key, default=None):
         """Gets a specific preference value from within a tool's preferences."""
-        # Get the tool's preference dictionary first
-        tool_prefs = self.preferences.get(tool_name, {})
-        # Then get the specific key from that dictionary
-        return tool_prefs.get(key, default)
+        return self._load_tool(tool_name).get(key, default)
 
     def set_preference(self, tool_name, key, value):
-        """Sets a specific preference value and saves it to the database."""
-        if tool_name not in self.preferences:
-            self.preferences[tool_name] = {}
-        self.preferences[tool_name][key] = value
-        
-        # Save the entire updated preferences dictionary back to the DB
-        prefs_json = json.dumps(self.preferences)
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE users SET preferences = ? WHERE username = ?",
-                       (prefs_json, self.username))
-        self.conn.commit()
+        """Sets a specific preference value, saves it and notifies subscribers if it changed."""
+        tool_prefs = self._load_tool(tool_name)
+        changed = key not in tool_prefs or tool_prefs[key] != value
+        tool_prefs[key] = value
+        self.stats["writes"] += 1
+
+        if self.write_behind:
+            # Only remember which key changed; flush() writes it later
+            self._dirty_keys.add((tool_name, key))
+            self.stats["pending_writes"] += 1
+            self._schedule_flush()
+        else:
+            self._save_preferences([(tool_name, key)])
+
+        if changed:
+            self._publish(tool_name, key, value)
+
+    # --- Change notifications ---
+    def subscribe(self, tool_name, key, callback):
+        """
+        Registers callback(value) to be called whenever (tool_name, key) changes.
+        Returns a token for unsubscribe().
+        """
+        self._next_subscription_id += 1
+        token = (tool_name, key, self._next_subscription_id)
+        self._subscribers.setdefault((tool_name, key), {})[token] = callback
+        return token
+
+    def unsubscribe(self, token):
+        """Removes a subscription made with subscribe(). Unknown tokens are ignored."""
+        tool_name, key, _ = token
+        callbacks = self._subscribers.get((tool_name, key))
+        if callbacks is not None:
+            callbacks.pop(token, None)
+            if not callbacks:
+                del self._subscribers[(tool_name, key)]
+
+    def _publish(self, tool_name, key, value):
+        # Copy, since a callback may subscribe/unsubscribe while we loop
+        for callback in list(self._subscribers.get((tool_name, key), {}).values()):
+            callback(value)
+
+    def _schedule_flush(self):
+        """(Re)starts the debounce timer so a burst of writes becomes one commit."""
+        if self.scheduler is None:
+            return
+        if self._flush_job is not None:
+            self.scheduler.after_cancel(self._flush_job)
+        self._flush_job = self.scheduler.after(self.flush_delay_ms, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._flush_job = None
+        self.flush()
+
+    def flush(self):
+        """Hands all pending write-behind changes to the backend as a single transaction."""
+        if self._flush_job is not None:
+            self.scheduler.after_cancel(self._flush_job)
+            self._flush_job = None
+        if not self.stats["pending_writes"]:
+            return
+
+        # Reset first: with a synchronous backend a failed write re-marks its keys right away
+        keys, self._dirty_keys = self._dirty_keys, set()
+        self.stats["pending_writes"] = 0
+        self._save_preferences(keys, batch=True)
+
+    def _save_preferences(self, keys, batch=False):
+        """Upserts one row per changed (tool_name, key) pair, committed together."""
+        # Values are encoded now, on this thread, so later changes can't leak into this write
+        rows = [(self.user_id, tool_name, key, json.dumps(self.preferences[tool_name][key]))
+                for tool_name, key in keys]
+        self.stats["in_flight"] += 1
+        future = self.backend.submit(_upsert_preferences, rows)
+        keys = list(keys)
+        self.pump.watch(future, lambda f: self._on_saved(f, batch, keys))
+        return future
+
+    def _on_saved(self, future, batch, keys):
+        """Runs on the caller's thread (via the pump) once a write has finished."""
+        self.stats["in_flight"] -= 1
+        error = future.exception()
+        if error is not None:
+            self.stats["errors"] += 1
+            self.stats["last_error"] = repr(error)
+            # Not saved: keep the keys dirty so the next flush writes their current values
+            self._dirty_keys.update(keys)
+            self.stats["pending_writes"] += len(keys)
+            if self.on_error is not None:
+                self.on_error(error)
+            else:
+                print(f"Saving preferences of {self.username!r} failed: {error!r}", file=sys.stderr)
+            return
+
+        self.stats["commits"] += 1
+        if batch:
+            elapsed_ms = future.result()
+            self.stats["flushes"] += 1
+            self.stats["last_flush_ms"] = elapsed_ms
+            self.stats["max_flush_ms"] = max(self.stats["max_flush_ms"], elapsed_ms)
+            self.stats["total_flush_ms"] += elapsed_ms
 
     def close_connection(self):
-        """Closes the database connection."""
-        if self.conn:
-            self.conn.close()
+        """
+        Saves any pending changes and lets go of the database backend.
+        The connection itself is shared, so it stays open for the next user.
+        """
+        if self.backend:
+            self.flush()
+            self.backend = None
+
+
+class UserSessionCache:
+    """
+    Keeps the UserPreferences of the most recently used users loaded, so switching
+    back to one of them needs no database access at all.
+    When the cache is full, the least recently used session is flushed and dropped.
+    'factory' builds a new session for a username (defaults to UserPreferences).
+    """
+    def __init__(self, factory=UserPreferences, capacity=SESSION_CACHE_SIZE):
+        self.factory = factory
+        self.capacity = capacity
+        self._sessions = OrderedDict() # username -> UserPreferences, oldest first
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, username):
+        """Returns the session for 'username', loading it (and evicting another) if needed."""
+        session = self._sessions.get(username)
+        if session is not None:
+            self._sessions.move_to_end(username)
+            self.stats["hits"] += 1
+            return session
+
+        self.stats["misses"] += 1
+        session = self.factory(username)
+        self._sessions[username] = session
+        while len(self._sessions) > self.capacity:
+            _, evicted = self._sessions.popitem(last=False)
+            evicted.close_connection() # Flushes its pending writes first
+            self.stats["evictions"] += 1
+        return session
+
+    def flush_all(self):
+        """Commits pending write-behind changes of every loaded session."""
+        for session in self._sessions.values():
+            session.flush()
+
+    def close_all(self):
+        for session in self._sessions.values():
+            session.close_connection()
+        self._sessions.clear()
+
+
+
+# --- Calculator history operations (run by a backend) ---
+def _insert_history(conn, user_id, expression, result, created_at):
+    cursor = conn.execute(
+        "INSERT INTO calc_history (user_id, created_at, expression, result) VALUES (?, ?, ?, ?)",
+        (user_id, created_at, expression, result))
+    conn.commit()
+    return cursor.lastrowid
+
+def _history_filter(conn, user_id, search, mode):
+    """
+    Returns (FROM ... WHERE ... clause, parameters) for a user's history filtered by 'search'.
+    mode "prefix": expressions starting with 'search' (a range query on calc_history_expression).
+    mode "words": entries whose expression or result has words/numbers starting with each
+    word of 'search' (so "sqrt 2" finds "sqrt(2)*3"), answered by the FTS5 index.
+    Without FTS5 the words are matched anywhere with LIKE, which scans the user's rows.
+    """
+    words = re.findall(r"[^\W_]+", search) # Letters and digits, the way FTS5 splits words
+    if not search or (mode == "words" and not words):
+        return "FROM calc_history WHERE user_id = ?", [user_id]
+    if mode == "prefix":
+        return ("FROM calc_history WHERE user_id = ? AND expression >= ? AND expression < ?",
+                [user_id, search, search + "\U0010ffff"])
+    if _has_history_fts(conn):
+        match = " ".join(f'"{word}"*' for word in words)
+        return ("FROM calc_history WHERE user_id = ? AND id IN "
+                "(SELECT rowid FROM calc_history_fts WHERE calc_history_fts MATCH ?)", [user_id, match])
+    conditions = " AND ".join(["(expression LIKE ? OR result LIKE ?)"] * len(words))
+    params = [user_id]
+    for word in words:
+        params += ["%" + word + "%"] * 2
+    return f"FROM calc_history WHERE user_id = ? AND {conditions}", params
+
+def _count_history(conn, user_id, search, mode):
+    clause, params = _history_filter(conn, user_id, search, mode)
+    return conn.execute(f"SELECT COUNT(*) {clause}", params).fetchone()[0]
+
+def _select_history_page(conn, user_id, search, mode, offset, limit):
+    """Rows offset..offset+limit of the (filtered) history, newest first, as tuples."""
+    clause, params = _history_filter(conn, user_id, search, mode)
+    cursor = conn.execute(
+        f"SELECT id, created_at, expression, result {clause} ORDER BY id DESC LIMIT ? OFFSET ?",
+        params + [limit, offset])
+    return [tuple(row) for row in cursor]
+
+def _prune_history_batch(conn, user_id, max_entries, cutoff_time, batch_size):
+    """
+    Deletes up to batch_size of the user's entries that are older than cutoff_time or
+    beyond the newest max_entries. Returns how many rows were deleted.
+    """
+    cursor = conn.execute('''
+        DELETE FROM calc_history WHERE id IN (
+            SELECT id FROM calc_history WHERE user_id = ? AND created_at < ?
+            UNION
+            SELECT id FROM (SELECT id FROM calc_history WHERE user_id = ? ORDER BY id DESC LIMIT -1 OFFSET ?)
+            LIMIT ?)
+    ''', (user_id, cutoff_time, user_id, max_entries, batch_size))
+    conn.commit()
+    return cursor.rowcount
+
+
+class CalculationHistory:
+    """
+    One user's calculator history, stored in calc_history.
+    Like UserPreferences: writes go through 'backend' without waiting, reads wait
+    for their answer, and 'pump' brings finished work back to the caller's thread.
+    """
+    def __init__(self, user_id, backend=None, pump=None):
+        self.user_id = user_id
+        self.backend = backend if backend is not None else SynchronousDatabase()
+        self.pump = pump if pump is not None else ImmediatePump()
+        self.pruning = False
+
+    def add(self, expression, result, callback=None):
+        """Records a calculation. callback(row id) runs once it's saved."""
+        future = self.backend.submit(_insert_history, self.user_id, expression, result, time.time())
+        if callback is not None:
+            self.pump.watch(future, lambda f: f.exception() is None and callback(f.result()))
+        return future
+
+    def count(self, search="", mode="prefix"):
+        return self.backend.submit(_count_history, self.user_id, search, mode).result()
+
+    def page(self, offset, limit, search="", mode="prefix"):
+        """(id, created_at, expression, result) rows, newest first."""
+        return self.backend.submit(_select_history_page, self.user_id, search, mode, offset, limit).result()
+
+    def prune(self, max_entries=HISTORY_MAX_ENTRIES, max_age_days=HISTORY_MAX_AGE_DAYS,
+              batch_size=PRUNE_BATCH_SIZE, callback=None):
+        """
+        Applies the retention policy in the background, one batch per transaction.
+        The next batch is only queued once the previous one is back, so other
+        database work never waits behind a big cleanup. callback(total deleted) runs at the end.
+        """
+        if self.pruning:
+            return
+        self.pruning = True
+        cutoff_time = time.time() - max_age_days * 86400
+        deleted = [0]
+
+        def next_batch():
+            future = self.backend.submit(_prune_history_batch, self.user_id, max_entries, cutoff_time, batch_size)
+            self.pump.watch(future, on_batch)
+
+        def on_batch(future):
+            count = future.result() if future.exception() is None else 0
+            deleted[0] += count
+            if count == batch_size:
+                next_batch()
+                return
+            self.pruning = False
+            if callback is not None:
+                callback(deleted[0])
+
+        next_batch()
+
+
+# --- Snake replay operations (run by a backend) ---
+def _insert_replay(conn, user_id, created_at, seed, cols, rows, tick_ms, score, ticks, turns, keep):
+    """Saves a replay and drops the user's replays beyond the newest 'keep'."""
+    cursor = conn.execute('''
+        INSERT INTO snake_replays (user_id, created_at, seed, cols, rows, tick_ms, score, ticks, turns)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (user_id, created_at, seed, cols, rows, tick_ms, score, ticks, turns))
+    conn.execute('''
+        DELETE FROM snake_replays WHERE id IN (
+            SELECT id FROM snake_replays WHERE user_id = ? ORDER BY id DESC LIMIT -1 OFFSET ?)
+    ''', (user_id, keep))
+    conn.commit()
+    return cursor.lastrowid
+
+def _select_replays(conn, user_id, limit):
+    cursor = conn.execute('''
+        SELECT id, created_at, cols, rows, tick_ms, score, ticks FROM snake_replays
+        WHERE user_id = ? ORDER BY id DESC LIMIT ?
+    ''', (user_id, limit))
+    return [tuple(row) for row in cursor]
+
+def _select_replay(conn, user_id, replay_id):
+    return conn.execute('''
+        SELECT seed, cols, rows, tick_ms, score, ticks, turns FROM snake_replays
+        WHERE user_id = ? AND id = ?
+    ''', (user_id, replay_id)).fetchone()
+
+
+class SnakeReplays:
+    """
+    One user's recorded Snake games, stored in snake_replays.
+    Works like CalculationHistory: saves don't wait, reads do.
+    """
+    def __init__(self, user_id, backend=None, pump=None, keep=REPLAYS_KEPT):
+        self.user_id = user_id
+        self.backend = backend if backend is not None else SynchronousDatabase()
+        self.pump = pump if pump is not None else ImmediatePump()
+        self.keep = keep
+
+    def save(self, seed, cols, rows, tick_ms, score, ticks, turns, callback=None):
+        """Records a finished game; 'turns' is the encoded turn stream. callback(row id) runs once it's saved."""
+        future = self.backend.submit(_insert_replay, self.user_id, time.time(), seed, cols, rows,
+                                     tick_ms, score, ticks, bytes(turns), self.keep)
+        if callback is not None:
+            self.pump.watch(future, lambda f: f.exception() is None and callback(f.result()))
+        return future
+
+    def recent(self, limit=50):
+        """(id, created_at, cols, rows, tick_ms, score, ticks) rows, newest first."""
+        return self.backend.submit(_select_replays, self.user_id, limit).result()
+
+    def load(self, replay_id):
+        """(seed, cols, rows, tick_ms, score, ticks, turns bytes), or None if it's gone."""
+        row = self.backend.submit(_select_replay, self.user_id, replay_id).result()
+        if row is None:
+            return None
+        seed, cols, rows, tick_ms, score, ticks, turns = row
+        return seed, cols, rows, tick_ms, score, ticks, bytes(turns)
+
+
+# --- Score operations (run by a backend) ---
+def _insert_score(conn, game, user_id, score, created_at):
+    cursor = conn.execute("INSERT INTO scores (game, user_id, score, created_at) VALUES (?, ?, ?, ?)",
+                          (game, user_id, score, created_at))
+    conn.commit()
+    return cursor.lastrowid
+
+def _select_top_scores(conn, game, limit):
+    """The best 'limit' games (earliest first on ties), read straight off scores_leaderboard."""
+    cursor = conn.execute('''
+        SELECT users.username, scores.score, scores.created_at
+        FROM scores JOIN users ON users.id = scores.user_id
+        WHERE scores.game = ? ORDER BY scores.score DESC, scores.created_at LIMIT ?
+    ''', (game, limit))
+    return [tuple(row) for row in cursor]
+
+def _select_personal_best(conn, user_id, game):
+    row = conn.execute(
+        "SELECT score FROM scores WHERE user_id = ? AND game = ? ORDER BY score DESC LIMIT 1",
+        (user_id, game)).fetchone()
+    return row[0] if row is not None else 0
+
+def _select_rank(conn, game, score):
+    """(rank of 'score' among all games of 'game', number of games), from score_counts."""
+    row = conn.execute('''
+        SELECT COALESCE(SUM(CASE WHEN score > ? THEN games END), 0), COALESCE(SUM(games), 0)
+        FROM score_counts WHERE game = ?
+    ''', (score, game)).fetchone()
+    return row[0] + 1, row[1]
+
+def _select_recent_scores(conn, user_id, game, limit):
+    cursor = conn.execute('''
+        SELECT score, created_at FROM scores WHERE user_id = ? AND game = ?
+        ORDER BY created_at DESC LIMIT ?
+    ''', (user_id, game, limit))
+    return [tuple(row) for row in cursor]
+
+
+class GameScores:
+    """
+    One user's view of the shared 'scores' table: every finished game is added,
+    and the leaderboard and rank queries cover all users.
+    'game' names the game and variant, e.g. "snake-20x20". Saves don't wait, reads do.
+    """
+    def __init__(self, user_id, backend=None, pump=None):
+        self.user_id = user_id
+        self.backend = backend if backend is not None else SynchronousDatabase()
+        self.pump = pump if pump is not None else ImmediatePump()
+
+    def add(self, game, score, callback=None):
+        """Records a finished game. callback(row id) runs once it's saved."""
+        future = self.backend.submit(_insert_score, game, self.user_id, score, time.time())
+        if callback is not None:
+            self.pump.watch(future, lambda f: f.exception() is None and callback(f.result()))
+        return future
+
+    def top(self, game, limit=10):
+        """(username, score, created_at) of the best games by anyone."""
+        return self.backend.submit(_select_top_scores, game, limit).result()
+
+    def personal_best(self, game):
+        return self.backend.submit(_select_personal_best, self.user_id, game).result()
+
+    def rank(self, game, score):
+        """(rank, total games): where 'score' places among all games played."""
+        return self.backend.submit(_select_rank, game, score).result()
+
+    def recent(self, game, limit=10):
+        """This user's latest (score, created_at), newest first."""
+        return self.backend.submit(_select_recent_scores, self.user_id, game, limit).result()
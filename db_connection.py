@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+import time
+
+# --- Connection tuning ---
+# Applied once to every new connection.
+# WAL lets readers and the writer work at the same time and turns most commits
+# into a sequential append; synchronous=NORMAL only fsyncs at checkpoints in WAL mode.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 64 * 1024 * 1024,  # 64 MB memory-mapped reads
+    "cache_size": -8000,            # negative = size in KiB, so ~8 MB page cache
+    "foreign_keys": "ON",
+}
+
+# Number of prepared statements sqlite3 keeps compiled per connection
+STATEMENT_CACHE_SIZE = 256
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports how long each statement took to the manager's timing hooks."""
+    def execute(self, sql, parameters=()):
+        hooks = self.connection.timing_hooks
+        if not hooks:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _run_hooks(hooks, "execute", sql, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        hooks = self.connection.timing_hooks
+        if not hooks:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _run_hooks(hooks, "executemany", sql, start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (and commits) are timed."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Shared list owned by the ConnectionManager; empty means "don't time anything"
+        self.timing_hooks = []
+
+    def cursor(self, factory=TimedCursor):
+        # Connection.execute() goes through cursor() too, so this covers both
+        return super().cursor(factory)
+
+    def commit(self):
+        if not self.timing_hooks:
+            return super().commit()
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _run_hooks(self.timing_hooks, "commit", None, start)
+
+
+def _run_hooks(hooks, kind, sql, start):
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for hook in hooks:
+        hook(kind, sql, elapsed_ms)
+
+
+class ConnectionManager:
+    """
+    Keeps one long-lived, tuned connection per database file (and per thread,
+    since sqlite3 connections can't be shared between threads by default).
+    Also remembers which files already had their schema set up, so init code
+    only runs once per process.
+    """
+    def __init__(self, pragmas=None, cached_statements=STATEMENT_CACHE_SIZE):
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        self.cached_statements = cached_statements
+        self._connections = {}  # (path, thread id) -> TimedConnection
+        self._initialized = set()  # paths whose schema is known to be up to date
+        self._lock = threading.Lock()
+        # Called as hook(kind, sql, elapsed_ms), kind is "execute", "executemany" or "commit"
+        self.timing_hooks = []
+        # Simple counters, handy to confirm connections are actually reused
+        self.stats = {"connects": 0, "reuses": 0, "connect_ms": 0.0}
+
+    def get_connection(self, path):
+        """Returns the shared connection for 'path', opening and tuning it on first use."""
+        key = (path, threading.get_ident())
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is not None:
+                self.stats["reuses"] += 1
+                return conn
+
+        start = time.perf_counter()
+        conn = sqlite3.connect(path, factory=TimedConnection, cached_statements=self.cached_statements)
+        # This allows you to access columns by name
+        conn.row_factory = sqlite3.Row
+        conn.timing_hooks = self.timing_hooks
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        with self._lock:
+            self._connections[key] = conn
+            self.stats["connects"] += 1
+            self.stats["connect_ms"] += (time.perf_counter() - start) * 1000
+        return conn
+
+    def is_initialized(self, path):
+        return path in self._initialized
+
+    def mark_initialized(self, path):
+        self._initialized.add(path)
+
+    def add_timing_hook(self, hook):
+        self.timing_hooks.append(hook)
+
+    def remove_timing_hook(self, hook):
+        if hook in self.timing_hooks:
+            self.timing_hooks.remove(hook)
+
+    def close_all(self):
+        """Closes every connection opened by this thread (e.g. when the app exits)."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            keys = [key for key in self._connections if key[1] == thread_id]
+            conns = [self._connections.pop(key) for key in keys]
+            for path, _ in keys:
+                self._initialized.discard(path)
+        for conn in conns:
+            conn.close()
+
+
+# The process-wide manager used by database.py
+manager = ConnectionManager()
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+# --- Cache limits ---
+# How many hidden tool frames to keep around
+FRAME_CACHE_SIZE = 6
+# Total widgets allowed across all hidden frames (a rough stand-in for memory use)
+FRAME_CACHE_WIDGET_BUDGET = 1500
+
+
+def count_widgets(widget):
+    """Counts a widget and all of its descendants."""
+    count = 1
+    stack = list(widget.winfo_children())
+    while stack:
+        child = stack.pop()
+        count += 1
+        stack.extend(child.winfo_children())
+    return count
+
+
+class ToolFrameCache:
+    """
+    Keeps hidden tool frames alive so showing a tool again is a re-pack instead of
+    a full build_ui(). Frames are keyed by tool class and evicted least recently
+    used first when there are too many frames or too many widgets in total.
+    Tools with cacheable = False are destroyed instead of being kept.
+    """
+    def __init__(self, max_frames=FRAME_CACHE_SIZE, widget_budget=FRAME_CACHE_WIDGET_BUDGET):
+        self.max_frames = max_frames
+        self.widget_budget = widget_budget
+        self._frames = OrderedDict() # tool class -> (frame, widget count), oldest first
+        self._widget_count = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def take(self, tool_class):
+        """Removes and returns the cached frame for tool_class, or None if there isn't one."""
+        entry = self._frames.pop(tool_class, None)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        frame, widgets = entry
+        self._widget_count -= widgets
+        self.stats["hits"] += 1
+        return frame
+
+    def put(self, frame):
+        """Stores a hidden (already pack_forget'ed) frame, or destroys it if it can't be cached."""
+        if not getattr(frame, "cacheable", True) or self.max_frames <= 0:
+            frame.destroy()
+            return
+        widgets = count_widgets(frame)
+        self._frames[type(frame)] = (frame, widgets)
+        self._widget_count += widgets
+        self._evict()
+
+    def _evict(self):
+        while self._frames and (len(self._frames) > self.max_frames
+                                or self._widget_count > self.widget_budget):
+            _, (frame, widgets) = self._frames.popitem(last=False)
+            self._widget_count -= widgets
+            self.stats["evictions"] += 1
+            frame.destroy()
+
+    def discard(self, should_discard):
+        """Destroys the cached frames whose tool class matches should_discard(tool_class)."""
+        for tool_class in [cls for cls in self._frames if should_discard(cls)]:
+            frame, widgets = self._frames.pop(tool_class)
+            self._widget_count -= widgets
+            frame.destroy()
+
+    def clear(self):
+        """Destroys every cached frame (e.g. after switching users)."""
+        for frame, _ in self._frames.values():
+            frame.destroy()
+        self._frames.clear()
+        self._widget_count = 0
+
+    def __len__(self):
+        return len(self._frames)
@@ -0,0 +1,110 @@
+import json
+import time
+from collections import deque
+
+# How many recent samples each percentile window keeps
+SAMPLE_WINDOW = 500
+# Callbacks running longer than this are logged as slow (roughly three frames at 60 Hz)
+SLOW_CALLBACK_MS = 50
+# How many slow callbacks are remembered for the report
+SLOW_LOG_SIZE = 100
+# Where the File menu's "Dump Latency Report" writes by default
+DEFAULT_REPORT_FILE = "latency_report.json"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (fraction between 0 and 1)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+class LatencyMonitor:
+    """
+    Measures how long Tk callbacks run (handler duration) and how late timers
+    fire (scheduling lag), keeping rolling percentiles per tool.
+
+    current_tool is a function returning the name of the visible tool; callbacks
+    that don't name their tool (menu commands, global hotkeys) are charged to it.
+    """
+    def __init__(self, current_tool=lambda: None, window=SAMPLE_WINDOW, slow_ms=SLOW_CALLBACK_MS):
+        self.current_tool = current_tool
+        self.window = window
+        self.slow_ms = slow_ms
+        self.durations = {}  # tool name -> deque of handler durations (ms)
+        self.lags = {}       # tool name -> deque of timer lateness (ms)
+        self.labels = {}     # "tool: label" -> {"calls", "total_ms", "max_ms"}
+        self.slow_callbacks = deque(maxlen=SLOW_LOG_SIZE)
+        self.started_at = time.time()
+
+    def wrap(self, callback, label, tool=None):
+        """Returns a version of callback that records how long each call takes."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                self.record(label, (time.perf_counter() - start) * 1000, tool)
+        return timed
+
+    def record(self, label, elapsed_ms, tool=None):
+        """Records one handler run."""
+        tool = tool or self.current_tool() or "App"
+        self.durations.setdefault(tool, deque(maxlen=self.window)).append(elapsed_ms)
+        stats = self.labels.setdefault(f"{tool}: {label}", {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if elapsed_ms >= self.slow_ms:
+            self.slow_callbacks.append({"time": time.strftime("%H:%M:%S"), "tool": tool,
+                                        "label": label, "ms": round(elapsed_ms, 3)})
+
+    def record_lag(self, lag_ms, tool=None):
+        """Records how late a timer callback started compared to when it was due."""
+        tool = tool or self.current_tool() or "App"
+        self.lags.setdefault(tool, deque(maxlen=self.window)).append(lag_ms)
+
+    def on_scheduler_job(self, job, lag_ms, elapsed_ms):
+        """Hook for TkScheduler.run_hooks."""
+        owner, name = job.key
+        # Tool jobs are charged to their tool, app jobs to "App", ownerless ones to the visible tool
+        tool = getattr(owner, "tool_name", "App") if owner is not None else None
+        self.record(f"timer {name}", elapsed_ms, tool)
+        self.record_lag(lag_ms, tool)
+
+    # --- Reporting ---
+    def report(self):
+        return {
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "slow_threshold_ms": self.slow_ms,
+            "handlers": {tool: summarize(samples) for tool, samples in self.durations.items()},
+            "timer_lag": {tool: summarize(samples) for tool, samples in self.lags.items()},
+            "by_label": {label: dict(stats, avg_ms=round(stats["total_ms"] / stats["calls"], 3))
+                         for label, stats in self.labels.items()},
+            "slow_callbacks": list(self.slow_callbacks),
+        }
+
+    def dump(self, path=DEFAULT_REPORT_FILE):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def status_text(self):
+        """One-line summary for the visible tool, for the status bar."""
+        tool = self.current_tool() or "App"
+        handlers = summarize(self.durations.get(tool, ()))
+        lag = summarize(self.lags.get(tool, ()))
+        return (f"{tool}: handler p50 {handlers['p50_ms']:.1f} ms, p95 {handlers['p95_ms']:.1f} ms"
+                f" | timer lag p95 {lag['p95_ms']:.1f} ms | slow callbacks: {len(self.slow_callbacks)}")
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Where --profile writes its report when no path is given
+DEFAULT_PROFILE_FILE = "startup_profile.json"
+
+
+class Profiler:
+    """
+    Records how long startup phases and tool switches take.
+
+    write() saves a Chrome trace-event file (open it in chrome://tracing or
+    https://ui.perfetto.dev) whose "summary" section is plain JSON, so two
+    releases can be compared with any diff tool.
+    When enabled is False every method is a cheap no-op.
+    'origin' is the perf_counter() value that counts as time zero (process start).
+    """
+    def __init__(self, enabled=True, origin=None):
+        self.enabled = enabled
+        self.origin = time.perf_counter() if origin is None else origin
+        self.events = []  # trace events, timestamps in microseconds since origin
+        self.phases = {}  # phase name -> duration in ms
+        self.marks = {}   # mark name -> ms since origin
+        self.tool_switches = {}  # tool name -> [duration in ms, ...]
+        self._pid = os.getpid()
+
+    def _us(self, t):
+        return round((t - self.origin) * 1_000_000)
+
+    def record(self, name, start, end, category="startup", **args):
+        """Records a phase that ran from perf_counter() 'start' to 'end'."""
+        if not self.enabled:
+            return
+        self.events.append({"name": name, "cat": category, "ph": "X", "pid": self._pid, "tid": 0,
+                            "ts": self._us(start), "dur": self._us(end) - self._us(start), "args": args})
+        if category == "startup":
+            self.phases[name] = (end - start) * 1000
+
+    @contextmanager
+    def phase(self, name, category="startup", **args):
+        """Times the body of a 'with' block as one phase."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), category, **args)
+
+    def mark(self, name):
+        """Records a single point in time (e.g. 'first_idle')."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.events.append({"name": name, "cat": "mark", "ph": "i", "s": "g", "pid": self._pid, "tid": 0,
+                            "ts": self._us(now)})
+        self.marks[name] = (now - self.origin) * 1000
+
+    def record_tool_switch(self, tool_name, start, end, cached=False):
+        """Records one show_tool() call."""
+        if not self.enabled:
+            return
+        self.record(f"show_tool {tool_name}", start, end, "tool_switch", cached=cached)
+        self.tool_switches.setdefault(tool_name, []).append((end - start) * 1000)
+
+    def watch_first_frame(self, root):
+        """Marks 'first_frame' once the window is mapped and Tk has gone idle for the first time."""
+        if not self.enabled:
+            return
+        def on_map(event):
+            if event.widget is root and "first_frame" not in self.marks:
+                root.after_idle(lambda: self.mark("first_frame"))
+        root.bind("<Map>", on_map, add="+")
+
+    def summary(self):
+        switches = {}
+        for tool_name, durations in self.tool_switches.items():
+            ordered = sorted(durations)
+            switches[tool_name] = {
+                "count": len(ordered),
+                "min_ms": round(ordered[0], 3),
+                "median_ms": round(ordered[len(ordered) // 2], 3),
+                "max_ms": round(ordered[-1], 3),
+            }
+        return {
+            "phases_ms": {name: round(ms, 3) for name, ms in self.phases.items()},
+            "marks_ms": {name: round(ms, 3) for name, ms in self.marks.items()},
+            "tool_switches": switches,
+        }
+
+    def write(self, path=DEFAULT_PROFILE_FILE):
+        """Writes the trace events plus the summary to 'path' as JSON."""
+        report = {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "summary": self.summary(),
+            "metadata": {"python": sys.version.split()[0], "platform": sys.platform,
+                         "written_at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return path
@@ -0,0 +1,108 @@
+import importlib
+import os
+import sys
+
+from tools import registry
+
+# Only modules in this package are ever reloaded
+TOOLS_PACKAGE = "tools"
+# Modules every tool depends on: when one of these changes, all loaded tools are reloaded too
+CORE_MODULES = ("tools.toolbase", "tools.registry")
+# How often (in ms) the app's --watch mode checks the tool sources for changes
+WATCH_INTERVAL_MS = 1000
+
+
+class ToolReloader:
+    """
+    Re-imports changed tools.* modules in place, keeping the root window, the
+    database connection and the user session alive (unlike a full restart).
+    Cached frames built from reloaded modules are destroyed, and the visible
+    tool is rebuilt from its new class.
+    """
+    def __init__(self, app):
+        self.app = app
+        self._mtimes = {} # module name -> source mtime when it was last (re)loaded
+        self._snapshot()
+
+    def _tool_modules(self):
+        """Loaded tools.* modules that come from a source file."""
+        return {name: module for name, module in list(sys.modules.items())
+                if (name == TOOLS_PACKAGE or name.startswith(TOOLS_PACKAGE + "."))
+                and getattr(module, "__file__", None)}
+
+    @staticmethod
+    def _mtime(module):
+        try:
+            return os.path.getmtime(module.__file__)
+        except OSError:
+            return None
+
+    def _snapshot(self):
+        """Records the source mtime of every loaded tool module not seen before."""
+        for name, module in self._tool_modules().items():
+            if name not in self._mtimes:
+                self._mtimes[name] = self._mtime(module)
+
+    def changed_modules(self):
+        """Names of loaded tool modules whose source changed since they were loaded."""
+        self._snapshot()
+        return [name for name, module in self._tool_modules().items()
+                if self._mtime(module) != self._mtimes.get(name)]
+
+    def reload(self, module_names=None):
+        """
+        Reloads the given modules (default: the changed ones) and rebuilds affected frames.
+        Returns the names of the modules that were reloaded.
+        """
+        if module_names is None:
+            module_names = self.changed_modules()
+        if not module_names:
+            return []
+
+        loaded = self._tool_modules()
+        names = set(module_names) & set(loaded)
+        if names & set(CORE_MODULES):
+            names |= set(loaded) # Every tool subclasses ToolBase / is listed in the registry
+        names.discard(TOOLS_PACKAGE) # tools/__init__.py holds nothing to reload
+
+        # Core modules first, so the tools pick up the new ToolBase when they are re-executed
+        ordered = [name for name in CORE_MODULES if name in names]
+        ordered += sorted(name for name in names if name not in CORE_MODULES)
+
+        importlib.invalidate_caches()
+        for name in ordered:
+            # Remember the new mtime first, so a file with an error isn't retried until it changes again
+            self._mtimes[name] = self._mtime(loaded[name])
+            importlib.reload(loaded[name])
+
+        if "tools.registry" in names:
+            registry.load_plugins() # The reload reset the registry to the built-in tools
+        # Forget the old classes; the next load() picks up the reloaded module
+        for spec in registry.all_tools():
+            if spec.module in names:
+                spec.tool_class = None
+
+        self._rebuild_frames(set(ordered))
+        return ordered
+
+    def _rebuild_frames(self, reloaded):
+        app = self.app
+        app.frame_cache.discard(lambda tool_class: tool_class.__module__ in reloaded)
+
+        frame = app.current_tool_frame
+        if frame is None or type(frame).__module__ not in reloaded:
+            return
+        tool_class = type(frame)
+        if hasattr(frame, 'on_hide'):
+            frame.on_hide()
+        frame.destroy()
+        app.current_tool_frame = None
+        app.show_tool(self._registry_name(tool_class) or "Homepage")
+
+    @staticmethod
+    def _registry_name(tool_class):
+        """Finds the registry name of a tool class, or None if it isn't registered."""
+        for spec in registry.all_tools():
+            if spec.module == tool_class.__module__ and spec.class_name == tool_class.__name__:
+                return spec.name
+        return None
@@ -0,0 +1,183 @@
+import sys
+import time
+
+
+class Job:
+    """One scheduled callback. 'key' is (owner, name), so each owner has its own names."""
+    def __init__(self, key, callback, period_ms=None):
+        self.key = key
+        self.callback = callback
+        self.period_ms = period_ms # None for one-shot jobs
+        self.after_id = None       # Only used by one-shot jobs
+
+    @property
+    def label(self):
+        owner, name = self.key
+        if owner is None:
+            return name
+        return f"{getattr(owner, 'tool_name', type(owner).__name__)}.{name}"
+
+
+class TkScheduler:
+    """
+    App-level timer service, so tools don't each keep their own after() chains.
+
+    - Jobs are named: scheduling a name that already exists replaces it instead of
+      starting a second loop.
+    - Jobs belong to an owner (usually a tool) and cancel_owner() stops all of them,
+      which ToolBase does in on_hide()/destroy().
+    - Periodic jobs with the same period share a single Tk timer.
+    - stats() reports job counts and how long each callback takes.
+    """
+    def __init__(self, root):
+        self.root = root
+        self._jobs = {}    # (owner, name) -> Job
+        self._groups = {}  # period_ms -> {"jobs": {key: Job}, "after_id": ..., "due": perf_counter deadline}
+        self._runtimes = {} # job label -> {"calls": int, "total_ms": float, "max_ms": float}
+        # Called as hook(job, lag_ms, elapsed_ms) after every job run; lag is how late the timer fired
+        self.run_hooks = []
+
+    # --- Scheduling ---
+    def every(self, period_ms, callback, name, owner=None):
+        """
+        Calls callback() every period_ms until cancelled. Replaces an existing job with the same name.
+        A job joining a period that is already running fires on that timer's next tick,
+        so its first call may come early.
+        """
+        key = (owner, name)
+        existing = self._jobs.get(key)
+        if existing is not None and existing.period_ms == period_ms:
+            existing.callback = callback # Same timer, just a new callback
+            return existing
+        self.cancel(name, owner)
+
+        job = Job(key, callback, period_ms)
+        self._jobs[key] = job
+        group = self._groups.get(period_ms)
+        if group is None:
+            group = {"jobs": {}, "after_id": None, "due": time.perf_counter() + period_ms / 1000}
+            group["after_id"] = self.root.after(period_ms, self._run_group, period_ms)
+            self._groups[period_ms] = group
+        group["jobs"][key] = job
+        return job
+
+    def once(self, delay_ms, callback, name, owner=None):
+        """Calls callback() once after delay_ms. Scheduling the same name again restarts the delay (debounce)."""
+        self.cancel(name, owner)
+        key = (owner, name)
+        job = Job(key, callback)
+        due = time.perf_counter() + delay_ms / 1000
+        job.after_id = self.root.after(delay_ms, self._run_once, job, due)
+        self._jobs[key] = job
+        return job
+
+    def cancel(self, name, owner=None):
+        """Stops a job. Unknown names are ignored."""
+        job = self._jobs.pop((owner, name), None)
+        if job is None:
+            return
+        if job.period_ms is None:
+            self.root.after_cancel(job.after_id)
+            return
+        group = self._groups[job.period_ms]
+        del group["jobs"][job.key]
+        if not group["jobs"]: # Last job with this period: stop the shared timer too
+            self.root.after_cancel(group["after_id"])
+            del self._groups[job.period_ms]
+
+    def cancel_owner(self, owner):
+        """Stops every job belonging to 'owner'."""
+        for job_owner, name in [key for key in self._jobs if key[0] is owner]:
+            self.cancel(name, job_owner)
+
+    def is_scheduled(self, name, owner=None):
+        return (owner, name) in self._jobs
+
+    # --- Running ---
+    def _run_group(self, period_ms):
+        group = self._groups.get(period_ms)
+        if group is None:
+            return
+        # Schedule the next tick first, aiming at the original deadline so lateness doesn't pile up
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - group["due"]) * 1000)
+        group["due"] += period_ms / 1000
+        if group["due"] < now: # Fell more than a whole period behind; don't try to catch up
+            group["due"] = now + period_ms / 1000
+        group["after_id"] = self.root.after(max(0, round((group["due"] - now) * 1000)), self._run_group, period_ms)
+
+        # Copy, since a callback may cancel or add jobs
+        for job in list(group["jobs"].values()):
+            if self._jobs.get(job.key) is job:
+                self._run(job, lag_ms)
+
+    def _run_once(self, job, due):
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+            self._run(job, max(0.0, (time.perf_counter() - due) * 1000))
+
+    def _run(self, job, lag_ms):
+        start = time.perf_counter()
+        try:
+            job.callback()
+        except Exception:
+            # Same as an exception in a plain after() callback: report it and keep going
+            self.root.report_callback_exception(*sys.exc_info())
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        runtime = self._runtimes.setdefault(job.label, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        runtime["calls"] += 1
+        runtime["total_ms"] += elapsed_ms
+        runtime["max_ms"] = max(runtime["max_ms"], elapsed_ms)
+        for hook in self.run_hooks:
+            hook(job, lag_ms, elapsed_ms)
+
+    # --- Reporting ---
+    def stats(self):
+        """Job counts, number of Tk timers in use and per-callback runtimes."""
+        periodic = sum(1 for job in self._jobs.values() if job.period_ms is not None)
+        return {
+            "jobs": len(self._jobs),
+            "periodic_jobs": periodic,
+            "one_shot_jobs": len(self._jobs) - periodic,
+            "tk_timers": len(self._groups) + len(self._jobs) - periodic,
+            "callbacks": {label: dict(runtime, avg_ms=runtime["total_ms"] / runtime["calls"])
+                          for label, runtime in self._runtimes.items()},
+        }
+
+
+class FixedTimestep:
+    """
+    Counts how many fixed-length steps are due, on a monotonic clock, so a game runs
+    at the same wall-clock speed even when its timer fires late: a late callback just
+    runs two steps instead of one. Steps are counted from start(), so lateness never
+    accumulates. After a long stall (more than max_catch_up steps behind) the rest of
+    the backlog is dropped instead of being fast-forwarded through.
+    """
+    # A timer firing this early (Tk rounds to whole ms) still counts as on time
+    TOLERANCE_S = 0.002
+
+    def __init__(self, period_ms, max_catch_up=5, clock=time.perf_counter):
+        self.period_ms = period_ms
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.start()
+
+    def start(self):
+        self.origin = self.clock()
+        self.steps = 0      # Steps handed out since start()
+        self.caught_up = 0  # Extra steps run because a callback came late
+        self.dropped = 0    # Steps skipped after stalls
+
+    def due(self):
+        """How many steps to run now (0 if the timer fired early)."""
+        target = int((self.clock() - self.origin + self.TOLERANCE_S) * 1000 / self.period_ms)
+        count = target - self.steps
+        if count > self.max_catch_up:
+            self.dropped += count - self.max_catch_up
+            count = self.max_catch_up
+            self.origin += (target - self.steps - count) * self.period_ms / 1000 # Forget the backlog
+            target = self.steps + count
+        self.steps = max(self.steps, target)
+        if count > 1:
+            self.caught_up += count - 1
+        return max(count, 0)
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules (database, workers, core, ...) live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from db_connection import manager as connection_manager
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    """Points database.DATABASE_FILE at a fresh file for one test."""
+    path = str(tmp_path / "toolbox.db")
+    monkeypatch.setattr(database, "DATABASE_FILE", path)
+    yield path
+    connection_manager.close_all()
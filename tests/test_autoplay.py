@@ -0,0 +1,60 @@
+import pytest
+
+from core.autoplay import POLICIES, hamiltonian_cycle, play_game, run_benchmark, format_report
+
+
+@pytest.mark.parametrize("cols, rows", [(4, 4), (6, 5), (5, 6)])
+def test_hamiltonian_cycle_visits_every_cell_once(cols, rows):
+    cycle = hamiltonian_cycle(cols, rows)
+    assert len(cycle) == cols * rows
+    cell, seen = (0, 0), set()
+    for _ in range(cols * rows):
+        seen.add(cell)
+        next_cell = cycle[cell]
+        assert abs(next_cell[0] - cell[0]) + abs(next_cell[1] - cell[1]) == 1
+        cell = next_cell
+    assert cell == (0, 0) and len(seen) == cols * rows
+
+
+def test_hamiltonian_cycle_needs_an_even_side():
+    with pytest.raises(ValueError):
+        hamiltonian_cycle(5, 5)
+
+
+@pytest.mark.parametrize("cols, rows", [(10, 10), (20, 20)])
+def test_hamiltonian_fills_the_board_within_the_default_cap(cols, rows):
+    result = play_game("hamiltonian", cols, rows, seed=3)
+    assert result["won"] and not result["truncated"]
+    assert result["score"] == cols * rows - 3 # The snake starts 3 cells long
+
+
+def test_capped_games_are_truncated_not_lost():
+    result = play_game("hamiltonian", 10, 10, seed=1, max_ticks=50)
+    assert result["ticks"] == 50
+    assert result["truncated"] and not result["won"]
+
+
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_games_are_reproducible(policy):
+    first = play_game(policy, 10, 10, seed=7)
+    second = play_game(policy, 10, 10, seed=7)
+    assert (first["score"], first["ticks"]) == (second["score"], second["ticks"])
+
+
+def test_benchmark_report():
+    report = run_benchmark("greedy", games=30, cols=10, rows=10, workers=1)
+    assert report["games"] == 30
+    assert report["score"]["min"] <= report["score"]["median"] <= report["score"]["max"]
+    assert sum(count for _, _, count in report["histogram"]) == 30
+    assert "30 games of greedy on 10x10" in format_report(report)
+
+
+def test_benchmark_counts_truncated_games():
+    report = run_benchmark("hamiltonian", games=3, cols=10, rows=10, workers=1, max_ticks=100)
+    assert report["truncated"] == 3 and report["wins"] == 0
+    assert "3 games hit the tick limit" in format_report(report)
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        run_benchmark("random", games=1)
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from core.batch import BatchError, parse_column, parse_range, read_csv_column, run_batch
+
+EXPRESSIONS = ["x^2 - 3*x", "1/x", "sqrt(x)", "round(x, 2)", "round(x)", "round(x, 2.5)", "round(x, x)",
+               "x + 10^400", "min(x, 2, max(x, -1))", "ln(x) + log(x)", "x // 0.3 + x % 0.3", "2 + 3"]
+VALUES = [-2.5, -1, 0, 0.125, 1.005, 2, 3.14159, 1e6]
+
+
+def same(a, b):
+    """Equal, or both not computable (NumPy gives inf for 1/0 where Python gives nan)."""
+    if not (math.isfinite(a) and math.isfinite(b)):
+        return not math.isfinite(a) and not math.isfinite(b)
+    return a == pytest.approx(b, rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_numpy_and_python_engines_agree(expression):
+    pytest.importorskip("numpy")
+    python = run_batch(expression, values=VALUES, use_numpy=False)
+    vectorized = run_batch(expression, values=VALUES)
+    assert vectorized.engine == "numpy"
+    for x, a, b in zip(VALUES, python.ys, vectorized.ys):
+        assert same(float(a), float(b)), (expression, x, a, b)
+
+
+def test_range():
+    assert parse_range("0..1 step 0.1") == (0.0, 0.1, 11)
+    assert parse_range("x = -5..5") == (-5.0, 1.0, 11)
+    result = run_batch("2*x", value_range=parse_range("1..4"), use_numpy=False)
+    assert list(result.ys) == [2, 4, 6, 8]
+    assert result.stats["sum"] == 20
+
+
+@pytest.mark.parametrize("text", ["0..inf", "0..nan", "-inf..0", "0..1e300 step 1e-300",
+                                  "-1e308..1e308 step 1e-10", "0..10 step 0", "5..1", "0..1e9", "1..x"])
+def test_bad_ranges(text):
+    with pytest.raises(BatchError):
+        parse_range(text)
+
+
+def test_column():
+    assert list(parse_column("1, 2;3\n4\t5")) == [1, 2, 3, 4, 5]
+    with pytest.raises(BatchError):
+        parse_column("1, two")
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("name,value\na,1.5\nb,\nc,-2\n", encoding="utf-8")
+    assert list(read_csv_column(str(path))) == [1.5, -2]
+    assert list(read_csv_column(str(path), "value")) == [1.5, -2]
+    with pytest.raises(BatchError):
+        read_csv_column(str(path), "name")
+
+
+@pytest.mark.parametrize("content", [b"\xff\xfe\x001,2\n", b"a,\"b\x00\n"])
+def test_unreadable_csv(tmp_path, content):
+    path = tmp_path / "bad.csv"
+    path.write_bytes(content)
+    with pytest.raises(BatchError):
+        read_csv_column(str(path))
+
+
+def test_missing_csv(tmp_path):
+    with pytest.raises(BatchError):
+        read_csv_column(str(tmp_path / "missing.csv"))
+    with pytest.raises(BatchError):
+        read_csv_column(str(tmp_path)) # A folder
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_variables_too_big_for_a_float(use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    # 'ans' after 9^4301 is an int with thousands of digits
+    result = run_batch("x + ans", values=[1, 2], variables={"ans": 9 ** 4301}, use_numpy=use_numpy)
+    assert all(math.isnan(y) for y in result.ys)
+    result = run_batch("x * 2", values=[1, 2], variables={"ans": 9 ** 4301}, use_numpy=use_numpy)
+    assert list(result.ys) == [2, 4]
+    result = run_batch("x + ans", values=[1], variables={"ans": 2}, use_numpy=use_numpy)
+    assert list(result.ys) == [3]
@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core.__main__ import main
+
+
+def run(capsys, *argv):
+    status = main(list(argv))
+    out, err = capsys.readouterr()
+    return status, out, err
+
+
+def test_calc(capsys):
+    status, out, _ = run(capsys, "calc", "12*(3+4)", "2^10", "--echo")
+    assert status == 0
+    assert out.splitlines() == ["12*(3+4) = 84", "2^10 = 1024"]
+
+
+def test_calc_errors(capsys):
+    status, out, err = run(capsys, "calc", "1/0", "9^4000*9^4000", "1+1")
+    assert status == 1
+    assert out.splitlines() == ["Error", "Error", "2"]
+    assert "Result too large" in err
+
+
+def test_calc_reads_stdin(capsys, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("1+2\n\n3*4\n"))
+    status, out, _ = run(capsys, "calc")
+    assert status == 0
+    assert out.splitlines() == ["3", "12"]
+
+
+def test_snake_is_reproducible(capsys):
+    _, first, _ = run(capsys, "snake", "--moves", "RRDDL", "--seed", "1")
+    _, second, _ = run(capsys, "snake", "--moves", "RRDDL", "--seed", "1")
+    assert first == second
+    state = json.loads(first)
+    assert state["ticks"] == 5 and not state["game_over"]
+
+
+def test_snake_hits_the_wall(capsys):
+    _, out, _ = run(capsys, "snake", "--moves", "." * 100, "--seed", "1")
+    state = json.loads(out)
+    assert state["game_over"] and state["ticks"] < 100
+
+
+def test_tz(capsys):
+    pytest.importorskip("pytz")
+    status, out, _ = run(capsys, "tz", "12:00", "UTC", "UTC")
+    assert status == 0 and "12:00" in out
+
+
+def test_prefs(capsys, db_file):
+    assert run(capsys, "prefs", "set", "alice", "Clock", "theme", "dark", "--db", db_file)[0] == 0
+    assert run(capsys, "prefs", "set", "alice", "Clock", "size", "12", "--db", db_file)[0] == 0
+    _, out, _ = run(capsys, "prefs", "get", "alice", "Clock", "size", "--db", db_file)
+    assert json.loads(out) == 12
+    _, out, _ = run(capsys, "prefs", "dump", "alice", "--db", db_file)
+    assert json.loads(out) == {"Clock": {"theme": "dark", "size": 12}}
+    _, out, _ = run(capsys, "prefs", "users", "al", "--db", db_file)
+    assert out.splitlines() == ["alice"]
+
+
+def test_prefs_needs_a_key(capsys):
+    with pytest.raises(SystemExit):
+        main(["prefs", "get", "alice"])
+
+
+def test_core_never_imports_tkinter():
+    code = ("import sys, core.__main__, core.expression, core.batch, core.snake, core.autoplay, "
+            "core.replay, core.diff, core.preferences; "
+            "sys.exit('tkinter' in sys.modules)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
@@ -0,0 +1,161 @@
+import json
+import random
+import sqlite3
+
+import database
+
+
+def make_legacy_db(path, blobs):
+    """A database from before the preferences table: one JSON blob per user."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE, preferences TEXT)")
+    conn.executemany("INSERT INTO users (username, preferences) VALUES (?, ?)", blobs.items())
+    conn.commit()
+    conn.close()
+
+
+def all_preferences(username):
+    return database.UserPreferences(username).get_all_preferences()
+
+
+# --- Preference blob migration ---
+def test_blobs_become_one_row_per_key(db_file):
+    make_legacy_db(db_file, {
+        "alice": json.dumps({"Clock": {"theme": "dark", "24h": True}, "Calculator": {"last_result": "42"}}),
+        "bob": json.dumps({"Snake Game": {"speed": [1, 2]}}),
+    })
+    database.init_db()
+    assert all_preferences("alice") == {"Clock": {"theme": "dark", "24h": True}, "Calculator": {"last_result": "42"}}
+    assert all_preferences("bob") == {"Snake Game": {"speed": [1, 2]}}
+
+    conn = database.get_db_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE preferences IS NOT NULL").fetchone()[0] == 0
+
+
+def test_unusable_blobs_are_skipped(db_file):
+    make_legacy_db(db_file, {
+        "broken": "{not json",
+        "string": json.dumps("dark"),
+        "list": json.dumps([1, 2, 3]),
+        "mixed": json.dumps({"Clock": "dark", "Calculator": {"decimal_mode": True}}),
+    })
+    database.init_db()
+    for username in ("broken", "string", "list"):
+        assert all_preferences(username) == {}
+    assert all_preferences("mixed") == {"Calculator": {"decimal_mode": True}}
+
+
+def test_migration_runs_once(db_file):
+    make_legacy_db(db_file, {"alice": json.dumps({"Clock": {"theme": "dark"}})})
+    database.init_db()
+    database.UserPreferences("alice").set_preference("Clock", "theme", "light")
+    database.connection_manager.close_all() # Next init_db() starts over, as on the next app start
+    database.init_db()
+    assert all_preferences("alice") == {"Clock": {"theme": "light"}}
+
+
+def test_fresh_database(db_file):
+    database.init_db()
+    assert all_preferences("new user") == {}
+    assert database.list_usernames() == ["new user"]
+
+
+# --- Scores ---
+def add_games(scores, game, values):
+    for value in values:
+        scores.add(game, value)
+
+
+def test_rank_counts_better_games_by_everyone(db_file):
+    database.init_db()
+    alice = database.GameScores(database.UserPreferences("alice").user_id)
+    bob = database.GameScores(database.UserPreferences("bob").user_id)
+    add_games(alice, "snake-20x20", [10, 30, 30, 5])
+    add_games(bob, "snake-20x20", [30, 50])
+    add_games(bob, "snake-10x10", [99])
+
+    assert alice.rank("snake-20x20", 60) == (1, 6)
+    assert alice.rank("snake-20x20", 50) == (1, 6) # Ties share the better rank
+    assert alice.rank("snake-20x20", 30) == (2, 6)
+    assert alice.rank("snake-20x20", 29) == (5, 6)
+    assert alice.rank("snake-20x20", 0) == (7, 6)
+    assert alice.rank("snake-15x15", 10) == (1, 0)
+
+
+def test_rank_matches_a_full_count(db_file):
+    database.init_db()
+    scores = database.GameScores(database.UserPreferences("alice").user_id)
+    values = [random.Random(seed).randrange(200) for seed in range(500)]
+    add_games(scores, "snake-20x20", values)
+    for score in (0, 17, 100, 150, 199, 250):
+        assert scores.rank("snake-20x20", score) == (1 + sum(value > score for value in values), len(values))
+
+
+def test_rank_follows_deleted_games(db_file):
+    database.init_db()
+    scores = database.GameScores(database.UserPreferences("alice").user_id)
+    add_games(scores, "snake-20x20", [10, 20, 30])
+    database.get_db_connection().execute("DELETE FROM scores WHERE score = 30")
+    assert scores.rank("snake-20x20", 15) == (2, 2)
+
+
+def test_leaderboard_and_personal_best(db_file):
+    database.init_db()
+    alice = database.GameScores(database.UserPreferences("alice").user_id)
+    bob = database.GameScores(database.UserPreferences("bob").user_id)
+    add_games(alice, "snake-20x20", [10, 40])
+    add_games(bob, "snake-20x20", [25])
+    assert [(name, score) for name, score, _ in alice.top("snake-20x20", 2)] == [("alice", 40), ("bob", 25)]
+    assert alice.personal_best("snake-20x20") == 40
+    assert bob.personal_best("snake-10x10") == 0
+    assert [score for score, _ in alice.recent("snake-20x20")] == [40, 10]
+
+
+def test_snake_high_scores_move_to_the_scores_table(db_file):
+    make_legacy_db(db_file, {"alice": None, "bob": None, "carol": None})
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE preferences (user_id INTEGER NOT NULL, tool_name TEXT NOT NULL, key TEXT NOT NULL, "
+                 "value TEXT, PRIMARY KEY (user_id, tool_name, key)) WITHOUT ROWID")
+    conn.executemany("INSERT INTO preferences VALUES (?, 'Snake Game', 'high_score', ?)",
+                     [(1, "42"), (2, '"oops"'), (3, "Infinity")])
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+    conn.close()
+
+    database.init_db()
+    scores = database.GameScores(1)
+    assert scores.personal_best(database.LEGACY_SNAKE_GAME) == 42
+    assert scores.rank(database.LEGACY_SNAKE_GAME, 0) == (2, 1)
+    assert all_preferences("alice") == {}
+
+
+# --- Write-behind preferences ---
+class FailingDatabase(database.SynchronousDatabase):
+    """Synchronous backend whose preference writes fail while 'broken' is set."""
+    broken = True
+
+    def submit(self, fn, *args):
+        if fn is database._upsert_preferences and self.broken:
+            return super().submit(_raise_locked)
+        return super().submit(fn, *args)
+
+
+def _raise_locked(conn):
+    raise sqlite3.OperationalError("database is locked")
+
+
+def test_failed_preference_write_is_reported_and_retried(db_file):
+    backend = FailingDatabase()
+    errors = []
+    prefs = database.UserPreferences("alice", write_behind=True, backend=backend, on_error=errors.append)
+    prefs.set_preference("Clock", "theme", "dark")
+    prefs.flush()
+    assert [str(e) for e in errors] == ["database is locked"]
+    assert prefs.stats["errors"] == 1 and prefs.stats["pending_writes"] == 1
+    assert all_preferences("alice") == {}
+
+    backend.broken = False
+    prefs.flush()
+    assert prefs.stats["pending_writes"] == 0
+    assert all_preferences("alice") == {"Clock": {"theme": "dark"}}
@@ -0,0 +1,167 @@
+import difflib
+import random
+import time
+
+import pytest
+
+from core.__main__ import main
+from core.diff import (ALGORITHMS, NO_NEWLINE_MARKER, DiffError, LineSource, diff_hunks, diff_sources,
+                       intern_lines, matching_blocks, unified_diff)
+
+
+def random_lines(rng, count, alphabet):
+    return [rng.choice(alphabet) for _ in range(count)]
+
+
+def edit(rng, lines, alphabet, edits):
+    lines = list(lines)
+    for _ in range(edits):
+        position = rng.randrange(len(lines) + 1)
+        kind = rng.randrange(3)
+        if kind == 0 and position < len(lines):
+            lines[position] = rng.choice(alphabet)
+        elif kind == 1:
+            lines[position:position] = random_lines(rng, rng.randrange(1, 4), alphabet)
+        else:
+            del lines[position:position + rng.randrange(1, 4)]
+    return lines
+
+
+def sources(old_lines, new_lines):
+    return (LineSource.from_text("".join(line + "\n" for line in old_lines), "old"),
+            LineSource.from_text("".join(line + "\n" for line in new_lines), "new"))
+
+
+def apply_hunks(old_lines, new_lines, hunks):
+    rebuilt, position = [], 0
+    for _, i1, i2, j1, j2 in hunks:
+        rebuilt += old_lines[position:i1] + new_lines[j1:j2]
+        position = i2
+    return rebuilt + old_lines[position:]
+
+
+def changed_lines(hunks):
+    return sum(i2 - i1 + j2 - j1 for _, i1, i2, j1, j2 in hunks)
+
+
+CASES = [(seed, alphabet) for seed in range(40) for alphabet in ("ab", "abcdefgh", [f"line {n}" for n in range(500)])]
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+@pytest.mark.parametrize("seed, alphabet", CASES)
+def test_hunks_turn_old_into_new(algorithm, seed, alphabet):
+    rng = random.Random(seed)
+    old_lines = random_lines(rng, rng.randrange(0, 120), alphabet)
+    new_lines = edit(rng, old_lines, alphabet, rng.randrange(0, 12))
+    old, new = sources(old_lines, new_lines)
+    a, b = intern_lines(old, new)
+    previous_end = (0, 0)
+    for i, j, length in matching_blocks(a, b, algorithm):
+        assert i >= previous_end[0] and j >= previous_end[1] and old_lines[i:i + length] == new_lines[j:j + length]
+        previous_end = (i + length, j + length)
+    hunks = list(diff_sources(old, new, algorithm))
+    assert apply_hunks(old_lines, new_lines, hunks) == new_lines
+
+    opcodes = [op for op in difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes()
+               if op[0] != "equal"]
+    assert (hunks == []) == (opcodes == [])
+    if algorithm == "myers": # Shortest edit script: never more changed lines than difflib
+        assert changed_lines(hunks) <= changed_lines(opcodes)
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_simple_edits_match_difflib(algorithm):
+    old_lines = [f"line {n}" for n in range(50)]
+    new_lines = old_lines[:10] + ["inserted"] + old_lines[10:30] + old_lines[32:45] + ["changed"] + old_lines[46:]
+    old, new = sources(old_lines, new_lines)
+    expected = [op for op in difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes() if op[0] != "equal"]
+    assert list(diff_sources(old, new, algorithm)) == expected
+    assert list(unified_diff(old, new)) == [line.rstrip("\n") for line in
+                                            difflib.unified_diff(old_lines, new_lines, "old", "new", lineterm="")]
+
+
+def test_unknown_algorithm():
+    with pytest.raises(DiffError):
+        list(diff_hunks([1], [2], "quick"))
+
+
+def test_lines_are_split_on_newlines_only():
+    source = LineSource.from_text("one\r\ntwo\x0cthree\n\nlast")
+    assert source.lines(0, len(source)) == ["one", "two\x0cthree", "", "last"]
+    assert source.missing_newline
+
+
+# --- Final newline ---
+def diff_text(old_text, new_text):
+    return list(unified_diff(LineSource.from_text(old_text, "old"), LineSource.from_text(new_text, "new")))
+
+
+def test_only_the_final_newline_differs():
+    assert diff_text("a\nb\nc", "a\nb\nc\n") == [
+        "--- old", "+++ new", "@@ -1,3 +1,3 @@", " a", " b", "-c", NO_NEWLINE_MARKER, "+c"]
+    assert diff_text("a\nb\nc\n", "a\nb\nc") == [
+        "--- old", "+++ new", "@@ -1,3 +1,3 @@", " a", " b", "-c", "+c", NO_NEWLINE_MARKER]
+
+
+def test_unchanged_last_line_without_newline():
+    assert diff_text("a\nb\nc", "a\nX\nc") == [
+        "--- old", "+++ new", "@@ -1,3 +1,3 @@", " a", "-b", "+X", " c", NO_NEWLINE_MARKER]
+    assert diff_text("a\nb\nc", "a\nb\nc") == []
+
+
+def test_empty_file_against_one_without_newline():
+    assert diff_text("", "x") == ["--- old", "+++ new", "@@ -0,0 +1 @@", "+x", NO_NEWLINE_MARKER]
+    assert diff_text("x", "") == ["--- old", "+++ new", "@@ -1 +0,0 @@", "-x", NO_NEWLINE_MARKER]
+
+
+def test_cli_exit_status(tmp_path, capsys):
+    paths = {}
+    for name, text in {"a": "a\nb\nc", "same": "a\nb\nc", "b": "a\nb\nc\n", "empty": ""}.items():
+        paths[name] = tmp_path / name
+        paths[name].write_bytes(text.encode())
+    assert main(["diff", str(paths["a"]), str(paths["same"])]) == 0
+    assert capsys.readouterr().out == ""
+    assert main(["diff", str(paths["a"]), str(paths["b"])]) == 1
+    assert NO_NEWLINE_MARKER in capsys.readouterr().out
+    assert main(["diff", str(paths["empty"]), str(paths["empty"])]) == 0
+    assert main(["diff", str(paths["a"]), str(tmp_path / "missing")]) == 2
+
+
+# --- Unrelated inputs ---
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_disjoint_files_are_one_replacement(algorithm):
+    old, new = sources([f"old {n}" for n in range(30_000)], [f"new {n}" for n in range(10_000)])
+    start = time.perf_counter()
+    assert list(diff_sources(old, new, algorithm)) == [("replace", 0, 30_000, 0, 10_000)]
+    assert time.perf_counter() - start < 5 # Was minutes of capped Myers searches
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_mostly_unrelated_files(algorithm):
+    rng = random.Random(3)
+    old_lines = ["-- heartbeat --" if rng.random() < 0.05 else f"old {n}" for n in range(10_000)]
+    new_lines = ["-- heartbeat --" if rng.random() < 0.05 else f"new {n}" for n in range(10_000)]
+    old, new = sources(old_lines, new_lines)
+    start = time.perf_counter()
+    hunks = list(diff_sources(old, new, algorithm))
+    assert time.perf_counter() - start < 10
+    assert apply_hunks(old_lines, new_lines, hunks) == new_lines
+    matched = len(old_lines) - sum(i2 - i1 for _, i1, i2, _, _ in hunks)
+    assert matched > 0.8 * min(old_lines.count("-- heartbeat --"), new_lines.count("-- heartbeat --"))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_sparse_matches_stay_minimal(seed):
+    # Few matching pairs: Myers answers through the sparse LCS, which must still be exact
+    rng = random.Random(seed)
+    old_lines = [f"a{rng.randrange(400)}" for _ in range(rng.randrange(50, 300))]
+    new_lines = [f"a{rng.randrange(400)}" for _ in range(rng.randrange(50, 300))]
+    old, new = sources(old_lines, new_lines)
+    hunks = list(diff_sources(old, new, "myers"))
+    assert apply_hunks(old_lines, new_lines, hunks) == new_lines
+    lcs = [[0] * (len(new_lines) + 1) for _ in range(len(old_lines) + 1)]
+    for i in range(len(old_lines) - 1, -1, -1):
+        for j in range(len(new_lines) - 1, -1, -1):
+            lcs[i][j] = (lcs[i + 1][j + 1] + 1 if old_lines[i] == new_lines[j]
+                         else max(lcs[i + 1][j], lcs[i][j + 1]))
+    assert changed_lines(hunks) == len(old_lines) + len(new_lines) - 2 * lcs[0][0]
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+import pytest
+
+from core.expression import (PREVIEW_MAX_TOKENS, ExpressionError, IncrementalTokenizer, compile_expression,
+                             evaluate, format_result, preview)
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("12*(3+4)/2", 42), ("2^3^2", 512), ("-2^2", -4), ("2**10", 1024), ("7//2 + 7%2", 4),
+    ("min(3, 1, 2) + max(1, 5)", 6), ("sqrt(16) + abs(-1)", 5), ("2*x + 1", 7),
+])
+def test_evaluate(expression, expected):
+    assert evaluate(expression, {"x": 3}) == expected
+
+
+def test_decimal_mode():
+    assert evaluate("0.1 + 0.2", decimal_mode=True) == Decimal("0.3")
+    assert format_result(evaluate("1/3", decimal_mode=True)) == "0." + "3" * 50
+
+
+@pytest.mark.parametrize("decimal_mode", [False, True])
+@pytest.mark.parametrize("expression", ["(-8)^(1/3)", "(-2)^0.5", "x^0.5"])
+def test_negative_number_to_a_fractional_power(expression, decimal_mode):
+    with pytest.raises(ExpressionError):
+        evaluate(expression, {"x": -4}, decimal_mode)
+
+
+def test_real_powers_still_work():
+    assert evaluate("(-8)^2") == 64
+    assert evaluate("(-2)^-1") == -0.5
+    assert evaluate("8^(1/3)") == pytest.approx(2)
+
+
+def test_batch_gives_nan_for_complex_results():
+    values = list(compile_expression("x^0.5").evaluate_many([-4, 4]))
+    assert values[0] != values[0] and values[1] == 2
+
+
+@pytest.mark.parametrize("expression", ["", "1 +", "(1", "2 $ 3", "foo(1)", "y + 1", "1/0", "9^9^9"])
+def test_errors(expression):
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", ["-" * 800 + "1", "1+" * 2000 + "1", "(" * 600 + "1" + ")" * 600])
+def test_deep_expressions_are_too_complex(expression):
+    with pytest.raises(ExpressionError, match="too complex"):
+        evaluate(expression)
+
+
+def test_moderately_deep_expressions_still_work():
+    assert evaluate("1+" * 300 + "1") == 301
+    assert evaluate("-" * 100 + "1") == 1
+
+
+# --- Live preview ---
+def test_preview_completes_what_is_typed():
+    tokenizer = IncrementalTokenizer()
+    assert preview(tokenizer, "2*(3+4") == 14
+    assert preview(tokenizer, "2*(3+4)-") == 14
+    assert preview(tokenizer, "2 $") is None
+
+
+def test_preview_skips_long_and_deep_expressions():
+    tokenizer = IncrementalTokenizer()
+    assert preview(tokenizer, "-" * 150 + "1") == 1
+    assert preview(tokenizer, "-" * 800 + "1") is None
+    assert preview(tokenizer, "1+" * (PREVIEW_MAX_TOKENS // 2) + "1") is None
+    assert preview(tokenizer, "1+1") == 2
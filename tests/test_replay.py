@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from core.autoplay import BfsPolicy
+from core.replay import Replay, ReplayError, decode_turns, encode_turns
+from core.snake import DIRECTIONS, SnakeGame
+
+
+def state(game):
+    return list(game.snake), game.food, game.score, game.ticks, game.game_over, game.won
+
+
+def play_recorded(seed, cols=12, rows=10):
+    """A finished game with random key presses (several per tick at times), recorded."""
+    keys = random.Random(seed)
+    game = SnakeGame(cols, rows, seed=seed, record_turns=True)
+    policy = BfsPolicy(game)
+    while not game.game_over and game.ticks < 5000:
+        if keys.random() < 0.1:
+            for _ in range(keys.randrange(1, 4)):
+                game.change_direction(keys.choice(list(DIRECTIONS)))
+        else:
+            direction = policy.choose()
+            if direction is not None:
+                game.change_direction(direction)
+        game.step()
+    return game
+
+
+def test_encoding_round_trip():
+    turns = [(1, "Up"), (2, "Left"), (30, "Down"), (30 + 10**6, "Right")]
+    data = encode_turns(turns)
+    assert decode_turns(data) == turns
+    assert len(encode_turns(turns[:3])) == 3 # Gaps under 32 ticks take one byte each
+
+
+def test_truncated_data():
+    data = encode_turns([(1, "Up"), (1000, "Left")])
+    with pytest.raises(ReplayError):
+        decode_turns(data[:-1])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_replay_reaches_the_same_state(seed):
+    game = play_recorded(seed)
+    recorded = Replay.from_game(game)
+    replay = Replay(game.seed, game.cols, game.rows, recorded.encoded_turns(), game.ticks)
+    assert state(replay.seek(game.ticks)) == state(game)
+
+
+def test_seek_back_and_forth():
+    game = play_recorded(5)
+    replay = Replay.from_game(game)
+    middle = state(replay.seek(game.ticks // 2))
+    replay.seek(game.ticks)
+    assert state(replay.seek(game.ticks // 2)) == middle
+    replay.seek(3)
+    assert state(replay.seek(game.ticks)) == state(game)
+
+
+def test_unseeded_games_cant_be_replayed():
+    with pytest.raises(ReplayError):
+        Replay.from_game(SnakeGame(record_turns=True))
+    with pytest.raises(ReplayError):
+        Replay.from_game(SnakeGame(seed=1))
@@ -1,11 +1,27 @@
+import sys
+import time
 import tkinter as tk
-from tkinter import ttk
+from collections import OrderedDict
+from tkinter import ttk, filedialog, font as tkfont
 
 from .toolbase import ToolBase
+from core.expression import evaluate, format_result, parse_number, preview, IncrementalTokenizer, ExpressionError
+from core.batch import run_batch, parse_range, parse_column, read_csv_column, BatchError
+from workers import SerialWorker
+import database
+
+# Rows shown per page in the batch results table
+BATCH_PAGE_SIZE = 100
+# History rows read from the database per query, and how many such pages stay in memory
+HISTORY_PAGE_SIZE = 100
+HISTORY_PAGES_KEPT = 10
+# The live preview waits this long after a keystroke, so a burst of keys (or a paste) is computed once
+PREVIEW_DELAY_MS = 10
 
 class CalculatorTool(ToolBase):
     def __init__(self, master, app_controller):
-        default_prefs = {"last_result": 0, "window_size": "300x400"}
+        default_prefs = {"last_result": 0, "window_size": "300x400", "decimal_mode": False,
+                         "batch_expression": "x^2", "batch_range": "0..100 step 1"}
         super().__init__(master, app_controller, "Calculator", default_prefs)
 
     def build_ui(self):
@@ -13,19 +29,48 @@ class CalculatorTool(ToolBase):
         
         self.expression = ""
         self.equation = tk.StringVar()
+        self.preview_text = tk.StringVar()
+        self.tokenizer = IncrementalTokenizer() # Remembers the tokens between keystrokes
+        # Like StatCalculator: every change to the display (typed or clicked) updates the preview
+        self.equation.trace_add("write", self.on_expression_changed)
+
+        # History of this user's calculations, on the right
+        app = self.app_controller
+        self.history = database.CalculationHistory(app.user_prefs.user_id, backend=app.db_worker, pump=app.db_pump)
+        self.history_panel = HistoryPanel(self, self)
+        self.history_panel.pack(side="right", fill="y", padx=(0, 10), pady=10)
+        self.history.prune(callback=lambda deleted: deleted and self.history_panel.refresh())
+
+        # Keypad and batch mode live in separate tabs
+        notebook = ttk.Notebook(self)
+        notebook.pack(expand=True, fill="both")
+        keypad = ttk.Frame(notebook)
+        notebook.add(keypad, text="Keypad")
+        self.batch_panel = BatchPanel(notebook, self)
+        notebook.add(self.batch_panel, text="Batch")
 
         # Entry field for display
-        display_frame = ttk.Frame(self)
+        display_frame = ttk.Frame(keypad)
         display_frame.pack(pady=10, padx=10, fill="x")
         
-        self.display_entry = ttk.Entry(display_frame, textvariable=self.equation, font=('arial', 20, 'bold'), state='readonly', justify='right')
+        self.display_entry = ttk.Entry(display_frame, textvariable=self.equation, font=('arial', 20, 'bold'), justify='right')
         self.display_entry.pack(fill="x", expand=True)
+        self.bind_key(self.display_entry, "<Return>", lambda event: self.on_button_click('='))
+        self.bind_key(self.display_entry, "<Escape>", lambda event: self.on_button_click('C'))
+        ttk.Label(display_frame, textvariable=self.preview_text, foreground="gray", anchor="e").pack(fill="x")
+
+        # Decimal mode: exact decimal arithmetic (0.1+0.2 = 0.3) instead of floats
+        self.decimal_mode = tk.BooleanVar()
+        ttk.Checkbutton(display_frame, text="Decimal mode", variable=self.decimal_mode,
+                        command=lambda: self.save_pref("decimal_mode", self.decimal_mode.get())).pack(anchor="e")
+        self.subscribe_pref("decimal_mode", lambda value: self.decimal_mode.set(bool(value)), False)
 
         # Button grid
-        buttons_frame = ttk.Frame(self)
+        buttons_frame = ttk.Frame(keypad)
         buttons_frame.pack(expand=True, fill="both", padx=5, pady=5)
 
         buttons = [
+            ('(', 0, 0), (')', 0, 1), ('^', 0, 2), ('ans', 0, 3),
             ('7', 1, 0), ('8', 1, 1), ('9', 1, 2), ('/', 1, 3),
             ('4', 2, 0), ('5', 2, 1), ('6', 2, 2), ('*', 2, 3),
             ('1', 3, 0), ('2', 3, 1), ('3', 3, 2), ('-', 3, 3),
@@ -34,7 +79,7 @@ class CalculatorTool(ToolBase):
         ]
 
         for (text, row, col, *span) in buttons:
-            action = lambda x=text: self.on_button_click(x)
+            action = self.instrumented(f"button {text}", lambda x=text: self.on_button_click(x))
             button = ttk.Button(buttons_frame, text=text, command=action, style="Calc.TButton")
             if span:
                 button.grid(row=row, column=col, columnspan=span[1], sticky="nsew", padx=2, pady=2)
@@ -42,7 +87,7 @@ class CalculatorTool(ToolBase):
                 button.grid(row=row, column=col, sticky="nsew", padx=2, pady=2)
         
         # Configure row/column weights for resizing
-        for i in range(6): # 6 rows including display
+        for i in range(6): # 6 rows of buttons
             buttons_frame.grid_rowconfigure(i, weight=1)
         for i in range(4): # 4 columns
             buttons_frame.grid_columnconfigure(i, weight=1)
@@ -63,22 +108,303 @@ class CalculatorTool(ToolBase):
             self.equation.set("")
         elif char == '=':
             try:
-                # Avoid using eval directly in a real-world app due to security risks.
-                # For this controlled environment, it's simpler.
-                # A safer approach would be to parse and calculate the expression manually.
-                result = str(eval(self.expression))
+                # core.expression only understands arithmetic, unlike eval()
+                expression = self.expression
+                result = format_result(evaluate(expression, self.variables(), self.decimal_mode.get()))
+                self.history.add(expression, result, callback=lambda row_id: self.history_panel.refresh())
                 self.equation.set(result)
                 self.save_pref("last_result", result)
                 self.expression = result # So user can continue calculation with the result
-            except Exception as e:
+            except ExpressionError:
                 self.equation.set("Error")
                 self.expression = ""
+                self.display_entry.select_range(0, "end") # Typing replaces the "Error"
         else:
             self.expression += str(char)
             self.equation.set(self.expression)
 
+    def on_expression_changed(self, *args):
+        """Called on every change to the display; the preview itself is debounced."""
+        self.expression = self.equation.get()
+        self.schedule_once("preview", PREVIEW_DELAY_MS, self.update_preview)
+
+    def update_preview(self):
+        text = self.equation.get()
+        value = preview(self.tokenizer, text, self.variables(), self.decimal_mode.get())
+        try:
+            result = format_result(value) if value is not None else ""
+        except ExpressionError:
+            result = ""
+        # Nothing to add when the display already shows just the number
+        self.preview_text.set(f"= {result}" if result and result != text.strip() else "")
+
+    def variables(self):
+        """Names usable in expressions: 'ans' is the last result."""
+        try:
+            ans = parse_number(self.get_pref("last_result", 0) or 0, self.decimal_mode.get())
+        except ExpressionError:
+            ans = 0
+        return {"ans": ans}
+
+    def destroy(self):
+        self.batch_panel.shutdown()
+        super().destroy()
+
     def on_show(self):
         super().on_show()
         # Example: Apply window size preference if stored
         # size = self.get_pref("window_size", "300x400")
         # self.app_controller.root.geometry(size) # This might be better handled at app level
+
+
+class HistoryPanel(ttk.Frame):
+    """
+    The user's calculation history, newest first, with a search box.
+    Only the rows that fit in the list are ever inserted; they're read from
+    calc_history a page at a time and the scrollbar is driven by hand, so a
+    history of 100k entries opens and scrolls as fast as one of ten.
+    Double-click an entry to put its expression back on the display.
+    """
+    def __init__(self, master, tool):
+        super().__init__(master)
+        self.tool = tool
+        self.history = tool.history
+        self.first = 0 # Index of the top visible row
+        self.total = 0 # Rows matching the current search
+        self.pages = OrderedDict() # page number -> rows, least recently used first
+
+        ttk.Label(self, text="History").pack(anchor="w")
+        search_frame = ttk.Frame(self)
+        search_frame.pack(fill="x", pady=(0, 5))
+        self.search = tk.StringVar()
+        self.search.trace_add("write", lambda *args: tool.schedule_once("history_search", 150, self.refresh))
+        ttk.Entry(search_frame, textvariable=self.search, width=16).pack(side="left", fill="x", expand=True)
+        self.mode = tk.StringVar(value="starts with")
+        mode_box = ttk.Combobox(search_frame, textvariable=self.mode, values=["starts with", "words"],
+                                state="readonly", width=10)
+        mode_box.pack(side="left", padx=(5, 0))
+        mode_box.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+
+        list_frame = ttk.Frame(self)
+        list_frame.pack(fill="both", expand=True)
+        self.list_font = tkfont.nametofont("TkFixedFont")
+        self.listbox = tk.Listbox(list_frame, width=32, activestyle="none", font=self.list_font)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.listbox.bind("<Configure>", lambda event: self.render())
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll_to(self.first - event.delta // 40))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_to(self.first - 3)) # Linux wheel up
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_to(self.first + 3)) # Linux wheel down
+        tool.bind_key(self.listbox, "<Double-Button-1>", self.on_pick)
+        self.status = tk.StringVar()
+        ttk.Label(self, textvariable=self.status).pack(anchor="w")
+        self.refresh()
+
+    def refresh(self):
+        """Re-counts the matching rows and drops cached pages (after a search or a new entry)."""
+        if not self.winfo_exists():
+            return # The tool was closed while a database callback was on its way
+        mode = "prefix" if self.mode.get() == "starts with" else "words"
+        self.query = (self.search.get().strip(), mode)
+        self.total = self.history.count(*self.query)
+        self.pages.clear()
+        self.status.set(f"{self.total:,} entries")
+        self.scroll_to(self.first)
+
+    def visible_rows(self):
+        return max(1, self.listbox.winfo_height() // self.list_font.metrics("linespace"))
+
+    def row(self, index):
+        """(id, created_at, expression, result) of row 'index', reading its page if needed."""
+        page_number, position = divmod(index, HISTORY_PAGE_SIZE)
+        rows = self.pages.get(page_number)
+        if rows is None:
+            rows = self.history.page(page_number * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE, *self.query)
+            self.pages[page_number] = rows
+            if len(self.pages) > HISTORY_PAGES_KEPT:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(page_number)
+        return rows[position] if position < len(rows) else None
+
+    def scroll_to(self, first):
+        self.first = max(0, min(first, self.total - self.visible_rows()))
+        self.render()
+
+    def render(self):
+        """Fills the list with just the visible rows and updates the scrollbar."""
+        visible = self.visible_rows()
+        self.listbox.delete(0, "end")
+        for index in range(self.first, min(self.total, self.first + visible)):
+            row = self.row(index)
+            if row is not None:
+                self.listbox.insert("end", f"{row[2]} = {row[3]}")
+        if self.total:
+            self.scrollbar.set(self.first / self.total, min(1.0, (self.first + visible) / self.total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif unit == "pages":
+            self.scroll_to(self.first + int(amount) * self.visible_rows())
+        else:
+            self.scroll_to(self.first + int(amount))
+
+    def on_pick(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            row = self.row(self.first + selection[0])
+            if row is not None:
+                self.tool.equation.set(row[2])
+                self.tool.display_entry.icursor("end")
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(row[1]))
+                self.status.set(f"From {created}")
+
+
+class BatchPanel(ttk.Frame):
+    """
+    Batch mode: applies one expression in x to a range, a pasted column or a CSV file.
+    The work runs on a background thread (NumPy if installed, pure Python otherwise)
+    and the results come back through the app's future pump, one page at a time.
+    """
+    def __init__(self, master, tool):
+        super().__init__(master)
+        self.tool = tool
+        self.worker = None # SerialWorker, started on the first run
+        self.pending = None # Future of the newest run; older results are ignored
+        self.result = None
+        self.page_index = 0
+
+        # --- Expression ---
+        expression_frame = ttk.Frame(self)
+        expression_frame.pack(fill="x", padx=10, pady=(10, 5))
+        ttk.Label(expression_frame, text="f(x) =").pack(side="left")
+        self.batch_expression = tk.StringVar(value=tool.get_pref("batch_expression", "x^2"))
+        expression_entry = ttk.Entry(expression_frame, textvariable=self.batch_expression)
+        expression_entry.pack(side="left", fill="x", expand=True, padx=5)
+        expression_entry.bind("<Return>", lambda event: self.run())
+
+        # --- Input: range, pasted column or CSV file ---
+        input_frame = ttk.LabelFrame(self, text="Values of x")
+        input_frame.pack(fill="x", padx=10, pady=5)
+        input_frame.columnconfigure(1, weight=1)
+        self.source = tk.StringVar(value="range")
+
+        ttk.Radiobutton(input_frame, text="Range", variable=self.source, value="range").grid(row=0, column=0, sticky="w")
+        self.range_text = tk.StringVar(value=tool.get_pref("batch_range", "0..100 step 1"))
+        ttk.Entry(input_frame, textvariable=self.range_text).grid(row=0, column=1, columnspan=2, sticky="ew", padx=5, pady=2)
+
+        ttk.Radiobutton(input_frame, text="Column", variable=self.source, value="column").grid(row=1, column=0, sticky="nw")
+        self.column_text = tk.Text(input_frame, height=4, width=30)
+        self.column_text.grid(row=1, column=1, columnspan=2, sticky="ew", padx=5, pady=2)
+        self.column_text.bind("<KeyRelease>", lambda event: self.source.set("column"))
+
+        ttk.Radiobutton(input_frame, text="CSV file", variable=self.source, value="csv").grid(row=2, column=0, sticky="w")
+        self.csv_path = tk.StringVar()
+        ttk.Entry(input_frame, textvariable=self.csv_path).grid(row=2, column=1, sticky="ew", padx=5, pady=2)
+        ttk.Button(input_frame, text="Browse...", command=self.browse_csv).grid(row=2, column=2, padx=5)
+        ttk.Label(input_frame, text="Column (name or number, optional):").grid(row=3, column=0, columnspan=2, sticky="w")
+        self.csv_column = tk.StringVar()
+        ttk.Entry(input_frame, textvariable=self.csv_column, width=12).grid(row=3, column=2, padx=5, pady=2)
+
+        # --- Run and summary ---
+        run_frame = ttk.Frame(self)
+        run_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Button(run_frame, text="Run", command=self.tool.instrumented("batch run", self.run)).pack(side="left")
+        self.status = tk.StringVar()
+        ttk.Label(run_frame, textvariable=self.status).pack(side="left", padx=10)
+        self.stats_text = tk.StringVar()
+        ttk.Label(self, textvariable=self.stats_text, justify="left").pack(fill="x", padx=10)
+
+        # --- Results, one page at a time ---
+        self.table = ttk.Treeview(self, columns=("n", "x", "fx"), show="headings", height=10)
+        for column, heading, width in (("n", "#", 70), ("x", "x", 120), ("fx", "f(x)", 160)):
+            self.table.heading(column, text=heading)
+            self.table.column(column, width=width, anchor="e")
+        self.table.pack(expand=True, fill="both", padx=10, pady=5)
+
+        pages_frame = ttk.Frame(self)
+        pages_frame.pack(pady=(0, 10))
+        ttk.Button(pages_frame, text="< Prev", command=lambda: self.show_page(self.page_index - 1)).pack(side="left")
+        self.page_label = tk.StringVar()
+        ttk.Label(pages_frame, textvariable=self.page_label, width=20, anchor="center").pack(side="left", padx=5)
+        ttk.Button(pages_frame, text="Next >", command=lambda: self.show_page(self.page_index + 1)).pack(side="left")
+
+    def browse_csv(self):
+        path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if path:
+            self.csv_path.set(path)
+            self.source.set("csv")
+
+    def run(self):
+        """Starts a batch on the worker thread; a newer run replaces one still in progress."""
+        expression = self.batch_expression.get()
+        self.tool.save_pref("batch_expression", expression)
+        self.tool.save_pref("batch_range", self.range_text.get())
+        source = self.source.get()
+        if source == "range":
+            source_args = (self.range_text.get(),)
+        elif source == "column":
+            source_args = (self.column_text.get("1.0", "end"),)
+        else:
+            source_args = (self.csv_path.get(), self.csv_column.get().strip())
+        variables = self.tool.variables() # run_batch turns 'ans' into a float (nan if it's too big)
+
+        if self.pending is not None:
+            self.pending.cancel() # Only stops it if it hasn't started yet
+        if self.worker is None:
+            self.worker = SerialWorker("CalculatorBatch")
+        self.pending = self.worker.submit(_load_and_run, expression, source, source_args, variables)
+        self.status.set("Running...")
+        self.tool.app_controller.db_pump.watch(self.pending, self.on_batch_done)
+
+    def on_batch_done(self, future):
+        if future is not self.pending:
+            return # Superseded by a newer run
+        self.pending = None
+        try:
+            self.result = future.result()
+        except BatchError as e:
+            self.status.set(f"Error: {e}")
+            return
+        except Exception as e: # A bug (or MemoryError): don't leave the status at "Running..."
+            self.status.set(f"Batch failed: {e!r}")
+            self._root().report_callback_exception(*sys.exc_info()) # Full traceback on stderr
+            return
+        engine = "NumPy" if self.result.engine == "numpy" else "pure Python"
+        self.status.set(f"{len(self.result):,} values in {self.result.elapsed_ms:.0f} ms ({engine})")
+        stats = self.result.stats
+        if stats["valid"]:
+            self.stats_text.set(f"min {stats['min']:.10g}   max {stats['max']:.10g}   sum {stats['sum']:.10g}\n"
+                                f"mean {stats['mean']:.10g}   stdev {stats['stdev']:.10g}   "
+                                f"({stats['count'] - stats['valid']:,} not computable)")
+        else:
+            self.stats_text.set("No computable results")
+        self.show_page(0)
+
+    def show_page(self, index):
+        if self.result is None:
+            return
+        page_count = self.result.page_count(BATCH_PAGE_SIZE)
+        self.page_index = max(0, min(index, page_count - 1))
+        self.table.delete(*self.table.get_children())
+        for position, x, fx in self.result.page(self.page_index, BATCH_PAGE_SIZE):
+            self.table.insert("", "end", values=(position + 1, f"{x:.10g}", f"{fx:.10g}"))
+        self.page_label.set(f"Page {self.page_index + 1:,} of {page_count:,}")
+
+    def shutdown(self):
+        if self.worker is not None:
+            self.worker.shutdown(wait=False)
+            self.worker = None
+
+
+def _load_and_run(expression, source, source_args, variables):
+    """Runs on the batch worker thread: reads the x values, then evaluates the batch."""
+    if source == "range":
+        return run_batch(expression, value_range=parse_range(*source_args), variables=variables)
+    if source == "column":
+        return run_batch(expression, values=parse_column(*source_args), variables=variables)
+    return run_batch(expression, values=read_csv_column(*source_args), variables=variables)
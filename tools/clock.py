@@ -16,21 +16,37 @@ class ClockTool(ToolBase):
 
         self.date_label = ttk.Label(self, text="", font=("Helvetica", 18))
         self.date_label.pack(pady=10, padx=20)
+
+        # Preferences are pushed to us when they change (e.g. from the Settings menu),
+        # so the once-a-second loop below never has to look them up.
+        self.time_format = "24h"
+        self.show_date = True
+        self.subscribe_pref("format", self.on_format_changed, "24h")
+        self.subscribe_pref("show_date", self.on_show_date_changed, True)
         
-        self.update_clock()
+        self.render_clock() # Ticking starts in on_show()
+
+    def on_format_changed(self, value):
+        self.time_format = value
+        self.render_clock() # Apply immediately instead of waiting for the next tick
 
-    def update_clock(self):
+    def on_show_date_changed(self, value):
+        self.show_date = value
+        self.render_clock()
+
+    def render_clock(self):
+        """Draws the current time (and date) using the cached preferences."""
         # Note: Timezone handling with pytz would be more robust.
         # For simplicity, this uses local time or a basic UTC offset if we were to implement it.
         # For now, it's just system local time.
         
-        current_time = time.strftime('%H:%M:%S' if self.get_pref("format", "24h") == "24h" else '%I:%M:%S %p')
+        current_time = time.strftime('%H:%M:%S' if self.time_format == "24h" else '%I:%M:%S %p')
         
         # Ensure time_label exists before configuring (it should, as build_ui is called first)
         if hasattr(self, 'time_label') and self.time_label:
             self.time_label.config(text=current_time)
 
-        if self.get_pref("show_date", True):
+        if self.show_date:
             current_date = time.strftime('%A, %B %d, %Y')
             # Ensure date_label exists and is mapped before configuring
             if hasattr(self, 'date_label') and self.date_label:
@@ -41,8 +57,9 @@ class ClockTool(ToolBase):
             if hasattr(self, 'date_label') and self.date_label and self.date_label.winfo_ismapped():
                 self.date_label.pack_forget() # Hide if not showing date
 
-        self.after(1000, self.update_clock) # Update every second
-
     def on_show(self):
         super().on_show()
-        self.update_clock() # Ensure clock starts/resumes updating and applies prefs
+        self.render_clock()
+        # Update every second. The job has a fixed name, so showing the clock again never
+        # starts a second loop, and ToolBase cancels it when the clock is hidden.
+        self.schedule_every("tick", 1000, self.render_clock)
@@ -1,11 +1,359 @@
+import sys
+import time
 import tkinter as tk
-from tkinter import ttk
+import tkinter.font as tkfont
+from collections import OrderedDict
+from tkinter import ttk, filedialog
 from .toolbase import ToolBase
+from core.diff import (ALGORITHMS, LineSource, SideBySide, DiffError, diff_sources, intraline_spans,
+                       ROW_EQUAL, ROW_DELETE, ROW_INSERT, ROW_REPLACE)
+from workers import SerialWorker
+
+# Rows rendered above and below the visible ones, so small scrolls only move the view
+OVERSCAN_ROWS = 40
+# Rows per mouse wheel step
+WHEEL_ROWS = 3
+# Unchanged rows kept above a change when jumping to it
+HUNK_CONTEXT = 3
+# Longer lines are cut for display (and for their intra-line diff)
+MAX_LINE_CHARS = 2000
+# Intra-line diffs remembered, by row
+INLINE_CACHE_SIZE = 5000
+
+# Background colors of the row kinds, per side (old, new)
+ROW_COLORS = {
+    ROW_DELETE: ("#ffd7d7", "#eeeeee"),
+    ROW_INSERT: ("#eeeeee", "#d7ffd7"),
+    ROW_REPLACE: ("#fff3c4", "#fff3c4"),
+}
+INLINE_COLORS = ("#ffaaaa", "#99e699")
+
 
 class DiffChecker(ToolBase):
+    """
+    Side-by-side comparison of two text files, built for very large ones.
+    The diff runs on a background thread (core.diff, memory-mapped), and the view is
+    virtualized: the two Text widgets only ever hold the visible rows plus
+    OVERSCAN_ROWS on each side, and the scrollbar is driven by hand through the
+    SideBySide row index. Colors and intra-line differences are only worked out
+    for the rows being rendered.
+    """
     def __init__(self, master, app_controller):
-        super().__init__(master, app_controller, "Diff Checker")
+        default_prefs = {"old_path": "", "new_path": "", "algorithm": ALGORITHMS[0], "inline_unit": "words"}
+        self.layout = None # SideBySide of the last comparison
+        self.worker = None # SerialWorker, started on the first comparison
+        self.pending = None # Future of the newest comparison; older results are ignored
+        self.top = 0 # First visible row
+        self.rendered = (0, 0) # Rows currently in the Text widgets
+        self.anchor_row = -1 # Where next/previous change navigation continues from
+        self.inline_cache = OrderedDict() # row -> (old spans, new spans), least recently used first
+        super().__init__(master, app_controller, "Diff Checker", default_prefs)
 
     def build_ui(self):
-        label = ttk.Label(self, text=f"{self.tool_name} - TODO")
-        label.pack(padx=20, pady=20)
\ No newline at end of file
+        # --- Files ---
+        file_frame = ttk.Frame(self)
+        file_frame.pack(fill="x", padx=10, pady=(10, 0))
+        file_frame.columnconfigure(1, weight=1)
+        self.old_path = tk.StringVar(value=self.get_pref("old_path", ""))
+        self.new_path = tk.StringVar(value=self.get_pref("new_path", ""))
+        for row, (label, variable) in enumerate((("Old file:", self.old_path), ("New file:", self.new_path))):
+            ttk.Label(file_frame, text=label).grid(row=row, column=0, sticky="w")
+            entry = ttk.Entry(file_frame, textvariable=variable)
+            entry.grid(row=row, column=1, sticky="ew", padx=5, pady=2)
+            entry.bind("<Return>", lambda event: self.compare())
+            ttk.Button(file_frame, text="Browse...",
+                       command=lambda variable=variable: self.browse(variable)).grid(row=row, column=2)
+
+        # --- Options and navigation ---
+        options_frame = ttk.Frame(self)
+        options_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(options_frame, text="Algorithm:").pack(side="left")
+        self.algorithm = tk.StringVar(value=self.get_pref("algorithm", ALGORITHMS[0]))
+        ttk.Combobox(options_frame, textvariable=self.algorithm, values=list(ALGORITHMS),
+                     state="readonly", width=10).pack(side="left", padx=5)
+        ttk.Label(options_frame, text="Inline:").pack(side="left")
+        self.inline_unit = tk.StringVar(value=self.get_pref("inline_unit", "words"))
+        unit_box = ttk.Combobox(options_frame, textvariable=self.inline_unit, values=["words", "chars"],
+                                state="readonly", width=6)
+        unit_box.pack(side="left", padx=5)
+        unit_box.bind("<<ComboboxSelected>>", self.on_inline_unit_changed)
+        ttk.Button(options_frame, text="Compare", command=self.instrumented("Compare", self.compare)).pack(side="left", padx=5)
+        ttk.Button(options_frame, text="< Previous change", command=self.previous_change).pack(side="left")
+        ttk.Button(options_frame, text="Next change >", command=self.next_change).pack(side="left", padx=5)
+        ttk.Label(options_frame, text="Go to line:").pack(side="left", padx=(10, 0))
+        self.goto_line = tk.StringVar()
+        goto_entry = ttk.Entry(options_frame, textvariable=self.goto_line, width=10)
+        goto_entry.pack(side="left", padx=5)
+        goto_entry.bind("<Return>", lambda event: self.go_to_line())
+
+        self.status = tk.StringVar(value="Choose two files and press Compare.")
+        ttk.Label(self, textvariable=self.status).pack(anchor="w", padx=10)
+
+        # --- Side-by-side view ---
+        view_frame = ttk.Frame(self)
+        view_frame.pack(fill="both", expand=True, padx=10, pady=(5, 10))
+        view_frame.rowconfigure(0, weight=1)
+        view_frame.columnconfigure(0, weight=1)
+        view_frame.columnconfigure(1, weight=1)
+        self.text_font = tkfont.nametofont("TkFixedFont")
+        self.scrollbar = ttk.Scrollbar(view_frame, orient="vertical", command=self.on_scrollbar)
+        self.hscrollbar = ttk.Scrollbar(view_frame, orient="horizontal", command=self.on_hscroll)
+        self.texts = []
+        for column, side in enumerate(("old", "new")):
+            text = tk.Text(view_frame, wrap="none", font=self.text_font, width=60, height=25,
+                           state="disabled", xscrollcommand=self.hscrollbar.set if side == "old" else None)
+            text.grid(row=0, column=column, sticky="nsew", padx=(0, 2))
+            text.tag_configure("gutter", foreground="gray")
+            for kind, colors in ROW_COLORS.items():
+                text.tag_configure(f"row{kind}", background=colors[column])
+            text.tag_configure("inline", background=INLINE_COLORS[column])
+            text.tag_raise("inline")
+            text.bind("<Configure>", lambda event: self.scroll_to(self.top))
+            # The rows are ours to scroll, not the Text's own
+            text.bind("<MouseWheel>", lambda event: self.scroll_by(-event.delta // 120 * WHEEL_ROWS))
+            text.bind("<Button-4>", lambda event: self.scroll_by(-WHEEL_ROWS)) # Linux wheel up
+            text.bind("<Button-5>", lambda event: self.scroll_by(WHEEL_ROWS)) # Linux wheel down
+            self.bind_key(text, "<Down>", lambda event: self.scroll_by(1))
+            self.bind_key(text, "<Up>", lambda event: self.scroll_by(-1))
+            self.bind_key(text, "<Next>", lambda event: self.scroll_by(self.visible_rows()))
+            self.bind_key(text, "<Prior>", lambda event: self.scroll_by(-self.visible_rows()))
+            self.bind_key(text, "<Control-Home>", lambda event: self.scroll_by(-self.top))
+            self.bind_key(text, "<Control-End>", lambda event: self.scroll_by(self.total_rows()))
+            self.bind_key(text, "<KeyPress-n>", lambda event: self.next_change())
+            self.bind_key(text, "<KeyPress-p>", lambda event: self.previous_change())
+            self.texts.append(text)
+        self.scrollbar.grid(row=0, column=2, sticky="ns")
+        self.hscrollbar.grid(row=1, column=0, columnspan=2, sticky="ew")
+
+    # --- Comparing ---
+    def browse(self, variable):
+        path = filedialog.askopenfilename(parent=self, title="Choose a file")
+        if path:
+            variable.set(path)
+
+    def compare(self):
+        """Starts a comparison on the worker thread; a newer one replaces one still in progress."""
+        old_path, new_path = self.old_path.get().strip(), self.new_path.get().strip()
+        if not old_path or not new_path:
+            self.status.set("Choose two files to compare.")
+            return
+        self.save_pref("old_path", old_path)
+        self.save_pref("new_path", new_path)
+        self.save_pref("algorithm", self.algorithm.get())
+        if self.pending is not None:
+            self.pending.cancel() # Only stops it if it hasn't started yet
+        if self.worker is None:
+            self.worker = SerialWorker("DiffChecker")
+        self.pending = self.worker.submit(_compare, old_path, new_path, self.algorithm.get())
+        self.status.set("Comparing...")
+        self.app_controller.db_pump.watch(self.pending, self.on_compare_done)
+
+    def on_compare_done(self, future):
+        if future is not self.pending or not self.winfo_exists():
+            # Superseded by a newer comparison, or the tool was closed meanwhile: just unmap the files
+            if not future.cancelled() and future.exception() is None:
+                future.result()[0].close()
+            return
+        self.pending = None
+        try:
+            layout, elapsed_ms = future.result()
+        except DiffError as e:
+            self.status.set(f"Error: {e}")
+            return
+        except Exception as e: # A bug (or MemoryError): don't leave the status at "Comparing..."
+            self.status.set(f"Compare failed: {e!r}")
+            self._root().report_callback_exception(*sys.exc_info()) # Full traceback on stderr
+            return
+        if self.layout is not None:
+            self.layout.close()
+        self.layout = layout
+        self.inline_cache.clear()
+        self.rendered = (0, 0)
+        self.anchor_row = -1
+        self.gutter_width = len(str(max(len(layout.old), len(layout.new), 1)))
+        self.summary = (f"{len(layout.hunk_rows):,} changes - {len(layout.old):,} vs {len(layout.new):,} lines "
+                        f"({elapsed_ms:.0f} ms)")
+        self.scroll_to(0)
+
+    # --- Scrolling ---
+    def total_rows(self):
+        return self.layout.rows if self.layout is not None else 0
+
+    def visible_rows(self):
+        return max(1, self.texts[0].winfo_height() // self.text_font.metrics("linespace"))
+
+    def scroll_by(self, rows):
+        self.anchor_row = None # Navigation continues from what's on screen
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def scroll_to(self, top):
+        """Shows rows from 'top'; only re-renders when they aren't already in the widgets."""
+        if self.layout is None:
+            return
+        visible = self.visible_rows()
+        self.top = max(0, min(top, self.total_rows() - visible))
+        start, stop = self.rendered
+        covered = start <= self.top and min(self.top + visible, self.total_rows()) <= stop
+        if not covered or start == stop:
+            self.render(visible) # Otherwise the rows are already there (in the overscan)
+        for text in self.texts:
+            text.yview(f"{self.top - self.rendered[0] + 1}.0")
+        total = self.total_rows()
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        self.update_status()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_by(int(float(amount) * self.total_rows()) - self.top)
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.visible_rows())
+        else:
+            self.scroll_by(int(amount))
+
+    def on_hscroll(self, *args):
+        for text in self.texts:
+            text.xview(*args)
+
+    # --- Rendering ---
+    def render(self, visible):
+        """Puts the visible rows plus the overscan into both Text widgets, with their colors."""
+        start = max(0, self.top - OVERSCAN_ROWS)
+        stop = min(self.total_rows(), self.top + visible + OVERSCAN_ROWS)
+        self.rendered = (start, stop)
+        sources = (self.layout.old, self.layout.new)
+        width = self.gutter_width
+        lines = ([], [])
+        colored = [] # (line in the widget, kind)
+        inline = [] # (line in the widget, old spans, new spans)
+        for row, kind, old_index, new_index in self.layout.rows_between(start, stop):
+            texts = []
+            for side, index in enumerate((old_index, new_index)):
+                if index is None:
+                    texts.append(None)
+                    lines[side].append("")
+                    continue
+                text = sources[side].line(index)
+                if len(text) > MAX_LINE_CHARS:
+                    text = text[:MAX_LINE_CHARS] + "..."
+                texts.append(text)
+                lines[side].append(f"{index + 1:>{width}} {text}")
+            widget_line = row - start + 1
+            if kind != ROW_EQUAL:
+                colored.append((widget_line, kind))
+            if kind == ROW_REPLACE and None not in texts:
+                inline.append((widget_line, *self.inline_diff(row, *texts)))
+
+        for side, text in enumerate(self.texts):
+            text.config(state="normal")
+            text.delete("1.0", "end")
+            text.insert("1.0", "\n".join(lines[side]))
+            for line_number in range(1, len(lines[side]) + 1):
+                if lines[side][line_number - 1]:
+                    text.tag_add("gutter", f"{line_number}.0", f"{line_number}.{width}")
+            for line_number, kind in colored:
+                # Up to the start of the next line, so the color spans the whole width
+                text.tag_add(f"row{kind}", f"{line_number}.0", f"{line_number + 1}.0")
+            for line_number, *spans in inline:
+                for span_start, span_end in spans[side]:
+                    text.tag_add("inline", f"{line_number}.{width + 1 + span_start}",
+                                 f"{line_number}.{width + 1 + span_end}")
+            text.config(state="disabled")
+
+    def inline_diff(self, row, old_text, new_text):
+        """(old spans, new spans) of a changed row, worked out the first time it's rendered."""
+        spans = self.inline_cache.get(row)
+        if spans is None:
+            spans = intraline_spans(old_text, new_text, self.inline_unit.get())
+            self.inline_cache[row] = spans
+            if len(self.inline_cache) > INLINE_CACHE_SIZE:
+                self.inline_cache.popitem(last=False)
+        else:
+            self.inline_cache.move_to_end(row)
+        return spans
+
+    def on_inline_unit_changed(self, event=None):
+        self.save_pref("inline_unit", self.inline_unit.get())
+        self.inline_cache.clear()
+        if self.layout is not None:
+            self.render(self.visible_rows())
+            self.scroll_to(self.top)
+
+    def update_status(self):
+        if self.layout is None:
+            return
+        visible = self.visible_rows()
+        position = f"rows {self.top + 1:,}-{min(self.top + visible, self.total_rows()):,} of {self.total_rows():,}"
+        reference = self.anchor_row if self.anchor_row is not None and self.anchor_row >= 0 else self.top
+        current = self.layout.hunk_number(reference)
+        self.status.set(f"{self.summary} - {position} - change {current:,} of {len(self.layout.hunk_rows):,}")
+
+    # --- Navigation ---
+    def _navigation_row(self):
+        """The row next/previous change counts from: the last change jumped to, or the top of the view."""
+        if self.anchor_row is not None:
+            return self.anchor_row
+        return self.top + HUNK_CONTEXT - 1 if self.top > 0 else -1
+
+    def next_change(self):
+        if self.layout is not None:
+            self.jump_to_change(self.layout.next_hunk(self._navigation_row()))
+        return "break"
+
+    def previous_change(self):
+        if self.layout is not None:
+            self.jump_to_change(self.layout.previous_hunk(self._navigation_row()))
+        return "break"
+
+    def jump_to_change(self, row):
+        if row is None:
+            self.bell()
+            return
+        self.scroll_to(row - HUNK_CONTEXT)
+        self.anchor_row = row
+        self.update_status()
+
+    def go_to_line(self):
+        """Scrolls to a line number of the old file."""
+        if self.layout is None:
+            return
+        try:
+            line = int(self.goto_line.get())
+        except ValueError:
+            self.bell()
+            return
+        self.anchor_row = None
+        self.scroll_to(self.layout.row_for_line(max(line - 1, 0), "old") - HUNK_CONTEXT)
+
+    def destroy(self):
+        if self.pending is not None:
+            self.pending.cancel() # A comparison still running is closed by on_compare_done
+            self.pending = None
+        if self.worker is not None:
+            self.worker.shutdown(wait=False)
+            self.worker = None
+        if self.layout is not None:
+            self.layout.close()
+            self.layout = None
+        super().destroy()
+
+
+def _compare(old_path, new_path, algorithm):
+    """
+    Runs on the diff worker thread: maps and indexes both files, diffs them and lays out the rows.
+    All hunks are found here, before anything is shown: the scrollbar needs the total row
+    count and next/previous the hunk positions. SideBySide keeps only a few array entries
+    per hunk, so the hunks stream into it without ever being held as a list.
+    """
+    start = time.perf_counter()
+    old = LineSource.open(old_path)
+    try:
+        new = LineSource.open(new_path)
+    except DiffError:
+        old.close()
+        raise
+    layout = SideBySide(old, new, diff_sources(old, new, algorithm))
+    return layout, (time.perf_counter() - start) * 1000
@@ -4,13 +4,9 @@ from tkinter import ttk
 # --- Relative Imports ---
 # Import the base class that this tool inherits from.
 from .toolbase import ToolBase
-# Import all the other tool classes that you want to navigate to.
-from .testzonetool import TestZoneTool
-from .calculator import CalculatorTool
-from .clock import ClockTool
-from .buttoncommand import ButtonCommand
-from .charactersheet import CharacterSheet
-from .TEST_StatCalc import StatCalculator
+# The registry knows every tool without importing it, so the homepage
+# doesn't pay for loading the tools it links to.
+from . import registry
 
 class Homepage(ToolBase):
     def __init__(self, master, app_controller):
@@ -31,29 +27,21 @@ class Homepage(ToolBase):
         button_frame.grid(row=1, column=0, pady=10)
         
         # --- Data for Navigation Buttons ---
-        # Create a list of tuples. Each tuple contains:
-        # 1. The text to display on the button.
-        # 2. The class of the tool to open when the button is clicked.
-        tool_buttons = [
-            ("Calculator", CalculatorTool),
-            ("Clock", ClockTool),
-            ("Button Command", ButtonCommand),
-            ("Test Zone", TestZoneTool),
-            ("Character Sheet", CharacterSheet),
-            ("TestCalc", StatCalculator)
-        ]
+        # Every registered tool marked homepage=True gets a button.
+        # Each ToolSpec holds the button text and the registry name of the tool to open.
+        tool_buttons = registry.homepage_tools()
 
         # --- Create Buttons in a Loop ---
         # Loop through the data structure (tool_buttons) to create each button.
         # This avoids repeating the button creation code.
-        for button_text, tool_class in tool_buttons:
-            # The 'command' uses a lambda function. The 'tool=tool_class' is a special
-            # technique to ensure that each button gets the correct tool_class
+        for spec in tool_buttons:
+            # The 'command' uses a lambda function. The 'name=spec.name' is a special
+            # technique to ensure that each button gets the correct tool name
             # from this specific loop iteration.
             button = ttk.Button(
                 button_frame,
-                text=button_text,
-                command=lambda tool=tool_class: self.app_controller.show_tool(tool)
+                text=spec.homepage_label,
+                command=lambda name=spec.name: self.app_controller.show_tool(name)
             )
             # Pack each button into the button_frame.
-            button.pack(pady=5, ipadx=35, ipady=5, fill='both')
\ No newline at end of file
+            button.pack(pady=5, ipadx=35, ipady=5, fill='both')
@@ -0,0 +1,113 @@
+import importlib
+import json
+import os
+import time
+import warnings
+
+# --- Import budget ---
+# Importing a single tool module should take less than this. Slower imports are
+# reported with a warning, since every tool import lands on a user's click.
+IMPORT_BUDGET_MS = 100
+
+# Folder of plugin manifests (*.json), relative to the project root
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plugins")
+
+
+class ToolSpec:
+    """
+    Everything the app needs to know about a tool without importing it.
+    name:        unique key, used by show_tool("name")
+    label:       text for the Tools menu and the homepage button
+    module:      dotted module path, imported on first load()
+    class_name:  the ToolBase subclass inside that module
+    menu:        listed in the Tools menu
+    homepage:    gets a button on the Homepage
+    """
+    def __init__(self, name, label, module, class_name, menu=True, homepage=False, homepage_label=None):
+        self.name = name
+        self.label = label
+        self.module = module
+        self.class_name = class_name
+        self.menu = menu
+        self.homepage = homepage
+        self.homepage_label = homepage_label or label
+        self.tool_class = None # Filled in by load()
+
+    def load(self):
+        """Imports the tool's module (only the first time) and returns the tool class."""
+        if self.tool_class is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.module)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            import_times[self.module] = elapsed_ms
+            if elapsed_ms > IMPORT_BUDGET_MS:
+                warnings.warn(f"Importing {self.module} took {elapsed_ms:.0f} ms "
+                              f"(budget {IMPORT_BUDGET_MS} ms)", RuntimeWarning)
+            self.tool_class = getattr(module, self.class_name)
+        return self.tool_class
+
+
+# name -> ToolSpec, in registration order (which is also menu/homepage order)
+_tools = {}
+# module path -> how long its first import took, in ms
+import_times = {}
+
+
+def register_tool(name, label, module, class_name, menu=True, homepage=False, homepage_label=None):
+    """Adds (or replaces) a tool in the registry. Nothing is imported yet."""
+    spec = ToolSpec(name, label, module, class_name, menu, homepage, homepage_label)
+    _tools[name] = spec
+    return spec
+
+
+def get_tool(name):
+    """Returns the ToolSpec registered under 'name' (KeyError if there is none)."""
+    return _tools[name]
+
+
+def load_tool(name):
+    """Returns the tool class registered under 'name', importing it if needed."""
+    return _tools[name].load()
+
+
+def all_tools():
+    return list(_tools.values())
+
+
+def menu_tools():
+    return [spec for spec in _tools.values() if spec.menu]
+
+
+def homepage_tools():
+    return [spec for spec in _tools.values() if spec.homepage]
+
+
+def load_plugins(plugin_dir=PLUGIN_DIR):
+    """
+    Registers every plugin manifest found in plugin_dir. A manifest is a JSON file
+    with the register_tool() arguments, for example:
+        {"name": "Notes", "label": "Notes", "module": "plugins.notes", "class_name": "NotesTool"}
+    The plugin's module is only imported when the tool is first opened.
+    """
+    if not os.path.isdir(plugin_dir):
+        return
+    for filename in sorted(os.listdir(plugin_dir)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(plugin_dir, filename), encoding="utf-8") as f:
+            register_tool(**json.load(f))
+
+
+# --- Built-in tools ---
+register_tool("Homepage", "Homepage", "tools.homepage", "Homepage")
+register_tool("Calculator", "Calculator", "tools.calculator", "CalculatorTool", homepage=True)
+register_tool("Clock", "Clock", "tools.clock", "ClockTool", homepage=True)
+register_tool("Timezone Calculator", "Timezone Calculator", "tools.timezoneconverter", "TimezoneTool")
+register_tool("Snake Game", "Snake Game", "tools.snakegame", "SnakeGameTool")
+register_tool("Test Zone", "Test Zone", "tools.testzonetool", "TestZoneTool", homepage=True)
+register_tool("Button Command", "Button Command", "tools.buttoncommand", "ButtonCommand", homepage=True)
+register_tool("Diff Checker", "Diff Checker", "tools.diffchecker", "DiffChecker")
+register_tool("Character Sheet", "Character Sheet", "tools.charactersheet", "CharacterSheet",
+              menu=False, homepage=True)
+register_tool("Stat Modifier Calculator", "Stat Modifier Calculator", "tools.TEST_StatCalc", "StatCalculator",
+              menu=False, homepage=True, homepage_label="TestCalc")
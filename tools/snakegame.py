@@ -1,11 +1,124 @@
+import random
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import ttk
 from .toolbase import ToolBase
-import random
+import database
+from core.snake import SnakeGame, DEFAULT_COLS, DEFAULT_ROWS
+from core.replay import Replay, encode_turns
+from scheduler import FixedTimestep
+
+# How many recent frames the frame-time counter averages over
+FRAME_TIME_WINDOW = 100
+# Board sizes offered in the tool, in cells; the canvas stays the same size and the cells shrink
+BOARD_SIZES = ["20x20", "40x40", "100x100", "200x200"]
+# Speed levels: ms per tick. The game keeps this pace in wall-clock time even when
+# a tick fires late (see scheduler.FixedTimestep).
+SPEED_LEVELS = {"Classic": 200, "Quick": 120, "Fast": 80, "Very fast": 50, "Insane": 30}
+# How many recorded games the replay list shows
+REPLAY_LIST_SIZE = 50
+# Ticks per recorded tick for the "Watch 10x" button
+FAST_REPLAY_SPEED = 10
+# Entries in the game-over leaderboard
+LEADERBOARD_SIZE = 5
+
+
+class SnakeRenderer:
+    """
+    Draws a SnakeGame on a canvas in retained mode: the rectangles for the segments
+    and the food oval are created once and kept between frames. On a normal tick the
+    tail rectangle is moved to the new head (or one rectangle is added when the snake
+    grew) and the food is moved, so a frame touches the same few canvas items however
+    long the snake is. Anything else (a new game, a jump) re-syncs every segment,
+    still reusing the existing items.
+    """
+    def __init__(self, canvas, cell_size, snake_color, food_color, bg_color):
+        self.canvas = canvas
+        self.cell_size = cell_size
+        self.snake_color = snake_color
+        self.food_color = food_color
+        self.bg_color = bg_color
+        # Outlines separate the segments, but would cover tiny cells completely
+        self.outline = bg_color if cell_size >= 6 else ""
+        self.items = deque() # Canvas item of each segment, head first
+        self.food_item = None
+        self.food_cell = None
+        self.ticks = None # game.ticks when last drawn
+        self.frame_times = deque(maxlen=FRAME_TIME_WINDOW) # ms per draw()
+
+    def _box(self, cell):
+        size = self.cell_size
+        return cell[0] * size, cell[1] * size, (cell[0] + 1) * size, (cell[1] + 1) * size
+
+    def draw(self, game):
+        """Brings the canvas up to date with 'game'."""
+        start = time.perf_counter()
+        grew = len(game.snake) - len(self.items)
+        steps = game.ticks - self.ticks if self.ticks is not None else 0
+        if 1 <= steps <= len(game.snake) and 0 <= grew <= steps:
+            # One new head per tick; oldest first. Segments all look alike, so which
+            # ticks grew the snake doesn't matter, only how many did.
+            for index in range(steps - 1, -1, -1):
+                self._advance(game.snake[index], index < grew)
+        else:
+            self._resync(game.snake)
+        self.ticks = game.ticks
+        self._draw_food(game.food)
+        self.frame_times.append((time.perf_counter() - start) * 1000)
+
+    def _advance(self, head, grew):
+        """One tick forward: a new head cell, and the tail follows unless the snake grew."""
+        if grew:
+            item = self.canvas.create_rectangle(*self._box(head), fill=self.snake_color,
+                                                outline=self.outline, tags="snake")
+        else:
+            item = self.items.pop() # Recycle the tail as the new head
+            self.canvas.coords(item, *self._box(head))
+        self.items.appendleft(item)
+
+    def _resync(self, cells):
+        while len(self.items) > len(cells):
+            self.canvas.delete(self.items.pop())
+        for index, cell in enumerate(cells):
+            if index < len(self.items):
+                self.canvas.coords(self.items[index], *self._box(cell))
+            else:
+                self.items.append(self.canvas.create_rectangle(*self._box(cell), fill=self.snake_color,
+                                                               outline=self.outline, tags="snake"))
+
+    def _draw_food(self, cell):
+        if cell == self.food_cell:
+            return
+        was_hidden = self.food_cell is None
+        self.food_cell = cell
+        if cell is None:
+            if self.food_item is not None:
+                self.canvas.itemconfigure(self.food_item, state="hidden")
+        elif self.food_item is None:
+            self.food_item = self.canvas.create_oval(*self._box(cell), fill=self.food_color,
+                                                     outline=self.outline, tags="food")
+        else:
+            self.canvas.coords(self.food_item, *self._box(cell))
+            if was_hidden:
+                self.canvas.itemconfigure(self.food_item, state="normal")
+
+    def invalidate(self):
+        """Makes the next draw() re-sync every segment (e.g. for a new game)."""
+        self.ticks = None
+
+    def set_snake_color(self, color):
+        self.snake_color = color
+        self.canvas.itemconfigure("snake", fill=color)
+
+    def frame_stats(self):
+        """(last, average, max) draw time in ms over the recent frames."""
+        if not self.frame_times:
+            return 0.0, 0.0, 0.0
+        return self.frame_times[-1], sum(self.frame_times) / len(self.frame_times), max(self.frame_times)
+
 
 class SnakeGameTool(ToolBase):
-    GAME_SPEED = 200
-    GRID_SIZE = 20
     CANVAS_WIDTH = 400
     CANVAS_HEIGHT = 400
     SNAKE_COLOR = "green"
@@ -13,144 +126,315 @@ class SnakeGameTool(ToolBase):
     BG_COLOR = "black"
 
     def __init__(self, master, app_controller):
-        default_prefs = {"high_score": 0, "snake_color": "green"}
-        super().__init__(master, app_controller, "Snake Game", default_prefs)
-        self.snake = []
-        self.food = None
-        self.direction = "Right"
-        self.score = 0
-        self.game_over_flag = False
+        default_prefs = {"snake_color": "green", "board_size": BOARD_SIZES[0], "speed": "Classic"}
+        # Game state is set up before super().__init__() because build_ui (called from there)
+        # subscribes to preferences, and those callbacks refresh the score label right away.
+        # The rules live in core.snake (in grid cells); this tool draws the game and handles input.
+        # Every game is seeded and records its turns, so it can be saved as a replay.
+        self.live_game = SnakeGame(DEFAULT_COLS, DEFAULT_ROWS, record_turns=True)
+        self.live_game.game_over = True # Nothing running until 'Start Game'
+        self.game = self.live_game # The game on screen: live_game, or a replay's game
+        self.replay = None # The Replay being watched, if any
+        self.replay_id = None
+        self.timestep = None # FixedTimestep of the running game or replay
+        self.period_ms = SPEED_LEVELS["Classic"]
+        self.score_label = None
         # self.canvas = None # Initialized in build_ui
+        super().__init__(master, app_controller, "Snake Game", default_prefs)
 
     def build_ui(self):
         # super().destroy() # REMOVED as per previous fix
 
-        self.score_label = ttk.Label(self, text=f"Score: 0  High Score: {self.get_pref('high_score', 0)}", font=("Arial", 14))
+        self.score_label = ttk.Label(self, text="Score: 0  High Score: 0", font=("Arial", 14))
         self.score_label.pack(pady=5)
 
+        # Cached preference values, kept current by subscriptions instead of
+        # being looked up on every frame.
+        self.snake_color = self.SNAKE_COLOR
+        self.subscribe_pref("snake_color", self.on_snake_color_changed, self.SNAKE_COLOR)
+
+        # Every finished game goes into the shared scores table, one leaderboard per board size
+        app = self.app_controller
+        self.scores = database.GameScores(app.user_prefs.user_id, backend=app.db_worker, pump=app.db_pump)
+        self.high_score = self.scores.personal_best(self.score_key(self.live_game))
+        self.update_score_label()
+
         self.canvas = tk.Canvas(self, width=self.CANVAS_WIDTH, height=self.CANVAS_HEIGHT, bg=self.BG_COLOR, bd=0, highlightthickness=0)
         self.canvas.pack(pady=10)
+        self.renderer = self.make_renderer()
+
+        # Frame-time counter: how long drawing each tick takes (stays flat as the snake grows)
+        self.frame_label = ttk.Label(self, text="", foreground="gray")
+        self.frame_label.pack()
         
-        self.start_button = ttk.Button(self, text="Start Game", command=self.start_game)
+        self.start_button = ttk.Button(self, text="Start Game", command=self.instrumented("Start Game", self.start_game))
         self.start_button.pack(pady=5)
 
+        # Board size (cells per side); takes effect with the next game
+        board_frame = ttk.Frame(self)
+        board_frame.pack()
+        ttk.Label(board_frame, text="Board:").pack(side="left")
+        self.board_size = tk.StringVar()
+        board_box = ttk.Combobox(board_frame, textvariable=self.board_size, values=BOARD_SIZES, state="readonly", width=8)
+        board_box.pack(side="left", padx=5)
+        board_box.bind("<<ComboboxSelected>>", lambda event: self.save_pref("board_size", self.board_size.get()))
+        # (The high score shown is for the board of the last game, until the next one starts)
+        self.subscribe_pref("board_size", self.board_size.set, BOARD_SIZES[0])
+
+        # Speed level; takes effect with the next game
+        ttk.Label(board_frame, text="Speed:").pack(side="left", padx=(10, 0))
+        self.speed = tk.StringVar()
+        speed_box = ttk.Combobox(board_frame, textvariable=self.speed, values=list(SPEED_LEVELS), state="readonly", width=9)
+        speed_box.pack(side="left", padx=5)
+        speed_box.bind("<<ComboboxSelected>>", lambda event: self.save_pref("speed", self.speed.get()))
+        self.subscribe_pref("speed", self.speed.set, "Classic")
+
         # Bind arrow keys
         # Important: Binding needs to be on a widget that can take focus, or globally on the root.
         # For simplicity, we'll bind to the canvas and ensure it can get focus.
         self.canvas.focus_set() # Make canvas focusable
-        self.canvas.bind("<KeyPress-Left>", lambda e: self.change_direction("Left"))
-        self.canvas.bind("<KeyPress-Right>", lambda e: self.change_direction("Right"))
-        self.canvas.bind("<KeyPress-Up>", lambda e: self.change_direction("Up"))
-        self.canvas.bind("<KeyPress-Down>", lambda e: self.change_direction("Down"))
+        self.bind_key(self.canvas, "<KeyPress-Left>", lambda e: self.change_direction("Left"))
+        self.bind_key(self.canvas, "<KeyPress-Right>", lambda e: self.change_direction("Right"))
+        self.bind_key(self.canvas, "<KeyPress-Up>", lambda e: self.change_direction("Up"))
+        self.bind_key(self.canvas, "<KeyPress-Down>", lambda e: self.change_direction("Down"))
         
         # Instructions
         self.instructions_label = ttk.Label(self, text="Use arrow keys to control the snake. Press 'Start Game'.")
         self.instructions_label.pack(pady=5)
 
+        # --- Replays ---
+        # Finished games are saved as seed + turns and re-simulated to watch them
+        self.replays = database.SnakeReplays(app.user_prefs.user_id, backend=app.db_worker, pump=app.db_pump)
+        replay_frame = ttk.Frame(self)
+        replay_frame.pack(pady=5)
+        ttk.Label(replay_frame, text="Replays:").pack(side="left")
+        self.replay_choice = tk.StringVar()
+        self.replay_box = ttk.Combobox(replay_frame, textvariable=self.replay_choice, state="readonly", width=32)
+        self.replay_box.pack(side="left", padx=5)
+        ttk.Button(replay_frame, text="Watch", command=lambda: self.watch_replay(1)).pack(side="left")
+        ttk.Button(replay_frame, text=f"Watch {FAST_REPLAY_SPEED}x",
+                   command=lambda: self.watch_replay(FAST_REPLAY_SPEED)).pack(side="left", padx=5)
+        ttk.Button(replay_frame, text="Pause", command=self.pause_replay).pack(side="left")
+        # Dragging the slider jumps to that tick
+        self.replay_tick = None # Last tick shown on the slider
+        self.tick_scale = tk.Scale(self, from_=0, to=0, orient="horizontal", length=self.CANVAS_WIDTH,
+                                   showvalue=True, label="Replay tick", command=self.on_seek)
+        self.tick_scale.pack()
+        self.replay_rows = []
+        self.refresh_replays()
+
+    def make_renderer(self):
+        cell_size = min(self.CANVAS_WIDTH // self.game.cols, self.CANVAS_HEIGHT // self.game.rows)
+        return SnakeRenderer(self.canvas, cell_size, self.snake_color, self.FOOD_COLOR, self.BG_COLOR)
+
+    def show_game(self, game):
+        """Puts 'game' on screen, with a new renderer if its board size differs."""
+        if (game.cols, game.rows) != (self.game.cols, self.game.rows):
+            self.canvas.delete("snake", "food")
+            self.game = game
+            self.renderer = self.make_renderer() # New cell size
+        self.game = game
+        self.renderer.invalidate()
+
     def start_game(self):
-        self.game_over_flag = False
-        self.score = 0
-        self.direction = "Right"
-        self.snake = [(100, 100), (80, 100), (60, 100)] # Initial snake segments
+        self.stop_replay()
+        cols, rows = (int(n) for n in self.board_size.get().split("x"))
+        if (cols, rows) != (self.live_game.cols, self.live_game.rows):
+            self.live_game = SnakeGame(cols, rows, record_turns=True) # New board size
+            self.high_score = self.scores.personal_best(self.score_key(self.live_game))
+        # A fresh seed per game; together with the recorded turns it reproduces the game
+        self.live_game.reset(seed=random.getrandbits(32))
+        self.show_game(self.live_game)
         self.update_score_label()
-        self.create_food()
         if self.canvas: # Ensure canvas exists
             self.canvas.delete("game_over") # Clear game over message
         self.start_button.config(state="disabled")
         self.instructions_label.config(text="Game in progress...")
         if self.canvas: # Ensure canvas exists
             self.canvas.focus_set() # Ensure canvas has focus for key bindings
-        self.game_loop()
+        # The scheduler runs the loop until end_game() cancels it (or the tool is hidden/destroyed).
+        # The timer only wakes the loop up; FixedTimestep decides how many ticks are due.
+        period_ms = SPEED_LEVELS.get(self.speed.get(), SPEED_LEVELS["Classic"])
+        self.period_ms = period_ms
+        self.timestep = FixedTimestep(period_ms)
+        self.schedule_every("game_loop", period_ms, self.game_loop)
+        self.draw_elements()
 
     def game_loop(self):
-        if not self.winfo_exists() or self.game_over_flag : # Stop if widget is destroyed or game over
-            if self.game_over_flag and self.winfo_exists(): # only show game over if widget still exists
-                 self.show_game_over()
-            if self.winfo_exists(): # only configure button if widget still exists
-                self.start_button.config(state="normal")
-                self.instructions_label.config(text="Game Over! Press 'Start Game' to play again.")
-            return
-
-        head_x, head_y = self.snake[0]
-        if self.direction == "Left":
-            new_head = (head_x - self.GRID_SIZE, head_y)
-        elif self.direction == "Right":
-            new_head = (head_x + self.GRID_SIZE, head_y)
-        elif self.direction == "Up":
-            new_head = (head_x, head_y - self.GRID_SIZE)
-        elif self.direction == "Down":
-            new_head = (head_x, head_y + self.GRID_SIZE)
-        else: # Should not happen
-            new_head = (head_x, head_y)
-
-
-        self.snake.insert(0, new_head)
-
-        # Check for collision with food
-        if new_head == self.food:
-            self.score += 1
+        steps = self.timestep.due()
+        if not steps:
+            return # Woke up a little early
+        ate = False
+        for _ in range(steps):
+            if self.game.game_over:
+                break
+            ate = self.game.step() or ate # True when the snake ate
+        if ate:
             self.update_score_label()
-            self.create_food()
-        else:
-            self.snake.pop() # Remove tail
-
-        # Check for collisions (wall or self)
-        if (new_head[0] < 0 or new_head[0] >= self.CANVAS_WIDTH or
-            new_head[1] < 0 or new_head[1] >= self.CANVAS_HEIGHT or
-            new_head in self.snake[1:]):
-            self.game_over_flag = True
-            if self.score > self.get_pref('high_score', 0):
-                self.save_pref('high_score', self.score)
+
+        if self.game.game_over:
+            self.scores.add(self.score_key(self.game), self.game.score) # Before the leaderboard reads it
+            self.high_score = max(self.high_score, self.game.score)
             self.update_score_label() # Update high score display immediately
+            self.save_replay()
 
         self.draw_elements()
-        if self.winfo_exists(): # Check if widget exists before scheduling next call
-            self.after(self.GAME_SPEED, self.game_loop)
+        if self.game.game_over:
+            self.end_game()
 
-
-    def create_food(self):
-        while True:
-            x = random.randrange(0, self.CANVAS_WIDTH // self.GRID_SIZE) * self.GRID_SIZE
-            y = random.randrange(0, self.CANVAS_HEIGHT // self.GRID_SIZE) * self.GRID_SIZE
-            self.food = (x, y)
-            if self.food not in self.snake: # Ensure food doesn't spawn on snake
-                break
+    def end_game(self, leaderboard=True):
+        """Stops the game loop and shows the game over screen."""
+        self.cancel_job("game_loop")
+        self.show_game_over(leaderboard)
+        self.start_button.config(state="normal")
+        self.instructions_label.config(text="Game Over! Press 'Start Game' to play again.")
 
     def draw_elements(self):
         if self.canvas and self.canvas.winfo_exists(): # Ensure canvas exists
-            self.canvas.delete(tk.ALL) # Clear canvas
-            # Draw snake
-            snake_color_pref = self.get_pref("snake_color", self.SNAKE_COLOR)
-            for x, y in self.snake:
-                self.canvas.create_rectangle(x, y, x + self.GRID_SIZE, y + self.GRID_SIZE, fill=snake_color_pref, outline=self.BG_COLOR)
-            # Draw food
-            if self.food:
-                self.canvas.create_oval(self.food[0], self.food[1], self.food[0] + self.GRID_SIZE, self.food[1] + self.GRID_SIZE, fill=self.FOOD_COLOR, outline=self.BG_COLOR)
+            self.renderer.draw(self.game)
+            last, average, worst = self.renderer.frame_stats()
+            late = f" - {self.timestep.caught_up} late ticks caught up" if self.timestep else ""
+            self.frame_label.config(text=f"Frame: {last:.2f} ms (avg {average:.2f}, max {worst:.2f}) "
+                                         f"- {len(self.game.snake)} segments{late}")
 
     def change_direction(self, new_direction):
-        # Prevent immediate reversal
-        if new_direction == "Left" and self.direction != "Right":
-            self.direction = new_direction
-        elif new_direction == "Right" and self.direction != "Left":
-            self.direction = new_direction
-        elif new_direction == "Up" and self.direction != "Down":
-            self.direction = new_direction
-        elif new_direction == "Down" and self.direction != "Up":
-            self.direction = new_direction
-        # print(f"Direction changed to: {self.direction}") # For debugging
+        # Buffered: each tick takes one turn, and the game prevents reversals
+        if self.replay is None: # Replays only follow their recorded turns
+            self.game.queue_direction(new_direction)
+
+    # --- Replays ---
+    def save_replay(self):
+        game = self.live_game
+        self.replays.save(game.seed, game.cols, game.rows, self.period_ms, game.score, game.ticks,
+                          encode_turns(game.turn_log), callback=lambda replay_id: self.refresh_replays())
+
+    def refresh_replays(self):
+        if not self.replay_box.winfo_exists():
+            return # Saved after the tool was destroyed
+        self.replay_rows = self.replays.recent(REPLAY_LIST_SIZE)
+        labels = [f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(created_at))} - "
+                  f"score {score} ({cols}x{rows})"
+                  for _, created_at, cols, rows, _, score, _ in self.replay_rows]
+        self.replay_box.config(values=labels)
+        if labels and self.replay_choice.get() not in labels:
+            self.replay_choice.set(labels[0])
+
+    def selected_replay_id(self):
+        index = self.replay_box.current()
+        return self.replay_rows[index][0] if 0 <= index < len(self.replay_rows) else None
+
+    def watch_replay(self, speed):
+        """Plays the selected replay at 'speed' ticks per recorded tick, from where it was left."""
+        replay_id = self.selected_replay_id()
+        if replay_id is None:
+            return
+        if self.app_controller.scheduler.is_scheduled("game_loop", owner=self):
+            self.live_game.game_over = True # Watching a replay ends the current game
+            self.end_game(leaderboard=False)
+        if self.replay is None or self.replay_id != replay_id:
+            row = self.replays.load(replay_id)
+            if row is None:
+                self.refresh_replays() # Pruned in the meantime
+                return
+            seed, cols, rows, tick_ms, score, ticks, turns = row
+            self.replay = Replay(seed, cols, rows, turns, ticks)
+            self.replay_id = replay_id
+            self.replay_tick_ms = tick_ms
+            self.tick_scale.config(to=ticks)
+        elif self.replay.game.game_over:
+            self.replay.restart() # Watch again from the start
+        self.replay_speed = speed
+        self.show_replay_frame()
+        self.timestep = FixedTimestep(self.replay_tick_ms)
+        self.schedule_every("replay_loop", self.replay_tick_ms, self.replay_loop)
+        self.instructions_label.config(text=f"Watching a replay ({speed}x)...")
+
+    def replay_loop(self):
+        steps = self.timestep.due()
+        if steps:
+            self.replay.advance(steps * self.replay_speed)
+            self.show_replay_frame()
+        if self.replay.game.game_over:
+            self.pause_replay()
+
+    def show_replay_frame(self):
+        """Draws the replay's current tick (restart() and seek() may have made a new game object)."""
+        if self.replay.game is not self.game:
+            self.show_game(self.replay.game)
+        self.canvas.delete("game_over")
+        self.draw_elements()
+        self.update_score_label()
+        self.replay_tick = self.game.ticks
+        self.tick_scale.set(self.replay_tick)
+        if self.game.game_over:
+            self.show_game_over()
+
+    def on_seek(self, value):
+        tick = int(float(value))
+        if self.replay is None or tick == self.replay_tick:
+            return # Not watching, or just the loop moving the slider
+        # Re-simulates headlessly up to that tick (from the start when going back)
+        self.replay.seek(tick)
+        if self.app_controller.scheduler.is_scheduled("replay_loop", owner=self):
+            self.timestep.start() # Carry on from here without catching up
+        self.show_replay_frame()
+
+    def pause_replay(self):
+        self.cancel_job("replay_loop")
+        if self.replay is not None:
+            self.instructions_label.config(text="Replay paused. Drag the slider to jump to a tick.")
+
+    def stop_replay(self):
+        """Leaves replay mode (the next Start Game shows the live game again)."""
+        self.cancel_job("replay_loop")
+        self.replay = None
+        self.replay_tick = None
+
+    def on_snake_color_changed(self, value):
+        self.snake_color = value
+        if getattr(self, "renderer", None) is not None: # Not created yet during build_ui
+            self.renderer.set_snake_color(value)
+
+    @staticmethod
+    def score_key(game):
+        """The scores table's name for this game: scores are only comparable on the same board."""
+        return f"snake-{game.cols}x{game.rows}"
+
+    def leaderboard_text(self):
+        """Top scores on this board, and where the game just played ranks among all of them."""
+        key = self.score_key(self.game)
+        lines = [f"Top scores ({self.game.cols}x{self.game.rows})"]
+        for place, (username, score, _) in enumerate(self.scores.top(key, LEADERBOARD_SIZE), start=1):
+            lines.append(f"{place}. {username}  {score}")
+        rank, total = self.scores.rank(key, self.game.score)
+        best_rank, _ = self.scores.rank(key, self.high_score)
+        lines.append("")
+        lines.append(f"This game: #{rank:,} of {total:,}")
+        lines.append(f"Your best: {self.high_score} (#{best_rank:,})")
+        return "\n".join(lines)
 
     def update_score_label(self):
         if self.score_label and self.score_label.winfo_exists():
-            self.score_label.config(text=f"Score: {self.score}  High Score: {self.get_pref('high_score', 0)}")
+            self.score_label.config(text=f"Score: {self.game.score}  High Score: {self.high_score}")
 
-    def show_game_over(self):
+    def show_game_over(self, leaderboard=False):
         if self.canvas and self.canvas.winfo_exists(): # Ensure canvas exists
-            self.canvas.create_text(self.CANVAS_WIDTH / 2, self.CANVAS_HEIGHT / 2,
+            if not leaderboard:
+                self.canvas.create_text(self.CANVAS_WIDTH / 2, self.CANVAS_HEIGHT / 2,
+                                        text="GAME OVER", fill="white", font=("Arial", 30, "bold"), tags="game_over")
+                return
+            self.canvas.create_text(self.CANVAS_WIDTH / 2, self.CANVAS_HEIGHT / 4,
                                     text="GAME OVER", fill="white", font=("Arial", 30, "bold"), tags="game_over")
+            self.canvas.create_text(self.CANVAS_WIDTH / 2, self.CANVAS_HEIGHT * 5 / 8, text=self.leaderboard_text(),
+                                    fill="white", font=("Arial", 12), justify="center", tags="game_over")
 
     def on_hide(self):
-        super().on_hide()
-        self.game_over_flag = True # Stop game loop if tool is switched
+        game_running = self.app_controller.scheduler.is_scheduled("game_loop", owner=self)
+        super().on_hide() # Also cancels the game loop
+        self.pause_replay()
+        if game_running:
+            self.game.game_over = True # Switching tools ends the current game
+            self.end_game(leaderboard=False)
 
     def on_show(self):
         super().on_show()
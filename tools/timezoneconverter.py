@@ -1,27 +1,23 @@
 import tkinter as tk
 from tkinter import ttk
 from .toolbase import ToolBase
+from core.timezones import TimezoneService, TimezoneError
 import datetime
 
 class TimezoneTool(ToolBase):
     def __init__(self, master, app_controller):
         # Note: pytz is recommended for robust timezone handling.
         # pip install pytz
-        # For this example, we'll simulate it or use basic datetime features.
+        # The conversion itself lives in core.timezones; this tool is just the UI for it.
         default_prefs = {"default_from_tz": "UTC", "default_to_tz": "America/New_York"}
+        # Created before super().__init__() because build_ui (called from there) needs the timezone list
+        self.timezones = TimezoneService()
+        self.available_timezones = self.timezones.available_timezones
         super().__init__(master, app_controller, "Timezone Calculator", default_prefs)
-        # Try to import pytz, if not available, use a message
-        try:
-            import pytz
-            self.pytz = pytz
-            self.available_timezones = self.pytz.common_timezones
-        except ImportError:
-            self.pytz = None
-            self.available_timezones = ["UTC", "America/New_York", "Europe/London", "Asia/Tokyo", "Australia/Sydney"] # Sample list
 
     def build_ui(self):
         
-        if not self.pytz:
+        if not self.timezones.available:
             ttk.Label(self, text="pytz library not found. Timezone functionality will be limited.\nInstall with: pip install pytz", foreground="red").pack(pady=10)
 
         main_frame = ttk.Frame(self)
@@ -45,7 +41,7 @@ class TimezoneTool(ToolBase):
         self.to_tz_combo.set(self.get_pref("default_to_tz", self.available_timezones[1] if len(self.available_timezones) > 1 else "America/New_York"))
         
         # Convert Button
-        convert_button = ttk.Button(main_frame, text="Convert", command=self.convert_time)
+        convert_button = ttk.Button(main_frame, text="Convert", command=self.instrumented("Convert", self.convert_time))
         convert_button.grid(row=3, column=0, columnspan=2, pady=10)
 
         # Result Display
@@ -59,34 +55,14 @@ class TimezoneTool(ToolBase):
         from_tz_str = self.from_tz_combo.get()
         to_tz_str = self.to_tz_combo.get()
 
-        if not self.pytz:
-            self.result_label.config(text="Error: pytz library is required for timezone conversion.")
-            return
-
         try:
-            hour, minute = map(int, input_time_str.split(':'))
-            # Create a naive datetime object for today with the input time
-            now = datetime.datetime.now()
-            naive_dt = datetime.datetime(now.year, now.month, now.day, hour, minute)
-
-            from_tz = self.pytz.timezone(from_tz_str)
-            to_tz = self.pytz.timezone(to_tz_str)
-
-            # Localize the naive datetime to the source timezone
-            localized_dt = from_tz.localize(naive_dt)
+            converted_dt = self.timezones.convert(input_time_str, from_tz_str, to_tz_str)
+        except TimezoneError as e:
+            self.result_label.config(text=f"Error: {e}")
+            return
 
-            # Convert to the target timezone
-            converted_dt = localized_dt.astimezone(to_tz)
-            
-            self.result_label.config(text=f"Converted Time: {converted_dt.strftime('%Y-%m-%d %H:%M:%S %Z%z')}")
-            
-            # Save last used timezones as preferences
-            self.save_pref("default_from_tz", from_tz_str)
-            self.save_pref("default_to_tz", to_tz_str)
+        self.result_label.config(text=f"Converted Time: {self.timezones.format(converted_dt)}")
 
-        except ValueError:
-            self.result_label.config(text="Error: Invalid time format (HH:MM) or timezone.")
-        except self.pytz.exceptions.UnknownTimeZoneError: # Corrected exception type
-            self.result_label.config(text="Error: Unknown timezone selected.")
-        except Exception as e:
-            self.result_label.config(text=f"An error occurred: {e}")
+        # Save last used timezones as preferences
+        self.save_pref("default_from_tz", from_tz_str)
+        self.save_pref("default_to_tz", to_tz_str)
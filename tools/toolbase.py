@@ -3,13 +3,23 @@ from tkinter import ttk
 
 class ToolBase(tk.Frame):
     """Base class for all tools to inherit from."""
+    # When hidden, the app keeps the frame (pack_forget + on_hide) and shows it again later
+    # with on_show() instead of rebuilding it. Set to False in tools that must start fresh.
+    cacheable = True
+
     # master = DigitalToolBoxApp.main_content_frame, app_controller = DigitalToolBoxApp
     def __init__(self, master, app_controller, tool_name, default_prefs=None):
         super().__init__(master)
         self.app_controller = app_controller
         self.tool_name = tool_name
         self.default_prefs = default_prefs if default_prefs is not None else {}
-        
+
+        # Preference subscriptions made with subscribe_pref(): (key, callback, default)
+        self._pref_subscriptions = []
+        # Tokens of the subscriptions currently registered, and the UserPreferences they belong to
+        self._pref_tokens = []
+        self._subscribed_prefs = None
+
         # --- FIX IS HERE ---
         # Call the new method designed to get the entire dictionary for a tool.
         self.prefs = self.app_controller.user_prefs.get_tool_preferences(self.tool_name, self.default_prefs)
@@ -30,6 +40,61 @@ class ToolBase(tk.Frame):
         # This call is correct because 'key' will be a string.
         return self.app_controller.user_prefs.get_preference(self.tool_name, key, default)
 
+    def subscribe_pref(self, key, callback, default=None):
+        """
+        Calls callback(value) right away with the current value of 'key', and again
+        whenever it changes. Use this instead of calling get_pref() in loops.
+        The subscription is paused in on_hide()/destroy() and renewed in on_show().
+        """
+        subscription = (key, callback, default)
+        self._pref_subscriptions.append(subscription)
+        user_prefs = self.app_controller.user_prefs
+        if self._subscribed_prefs is None:
+            self._subscribed_prefs = user_prefs
+        self._pref_tokens.append(user_prefs.subscribe(self.tool_name, key, callback))
+        callback(user_prefs.get_preference(self.tool_name, key, default))
+
+    def _resubscribe_prefs(self):
+        """Registers all subscriptions with the current user's preferences and pushes their values."""
+        user_prefs = self.app_controller.user_prefs
+        if self._subscribed_prefs is user_prefs:
+            return # Already up to date (e.g. on_show right after build_ui)
+        self._unsubscribe_prefs()
+        self._subscribed_prefs = user_prefs
+        for key, callback, default in self._pref_subscriptions:
+            self._pref_tokens.append(user_prefs.subscribe(self.tool_name, key, callback))
+            callback(user_prefs.get_preference(self.tool_name, key, default))
+
+    def _unsubscribe_prefs(self):
+        if self._subscribed_prefs is not None:
+            for token in self._pref_tokens:
+                self._subscribed_prefs.unsubscribe(token)
+        self._pref_tokens = []
+        self._subscribed_prefs = None
+
+    # --- Event handlers ---
+    def instrumented(self, label, callback):
+        """Returns callback wrapped for the app's latency monitor (unchanged when it's off)."""
+        return self.app_controller.instrument(callback, label, self.tool_name)
+
+    def bind_key(self, widget, sequence, callback):
+        """widget.bind() that goes through the latency monitor."""
+        widget.bind(sequence, self.instrumented(sequence, callback))
+
+    # --- Timers ---
+    # Jobs go through the app's scheduler and are cancelled automatically in on_hide()/destroy(),
+    # so start periodic work in on_show() rather than build_ui().
+    def schedule_every(self, name, period_ms, callback):
+        """Calls callback() every period_ms while the tool is shown. Reusing a name replaces that job."""
+        return self.app_controller.scheduler.every(period_ms, callback, name, owner=self)
+
+    def schedule_once(self, name, delay_ms, callback):
+        """Calls callback() once after delay_ms. Reusing a name restarts the delay."""
+        return self.app_controller.scheduler.once(delay_ms, callback, name, owner=self)
+
+    def cancel_job(self, name):
+        self.app_controller.scheduler.cancel(name, owner=self)
+
     def on_show(self):
         """Called when the tool is shown. Override in subclasses if needed."""
         # Refresh preferences when shown, in case they were changed by another instance
@@ -37,7 +102,15 @@ class ToolBase(tk.Frame):
         # --- FIX IS HERE ---
         # Also update this line to use the new method
         self.prefs = self.app_controller.user_prefs.get_tool_preferences(self.tool_name, self.default_prefs)
+        self._resubscribe_prefs()
 
     def on_hide(self):
         """Called when the tool is hidden. Override in subclasses if needed."""
-        pass
+        self._unsubscribe_prefs()
+        self.app_controller.scheduler.cancel_owner(self)
+
+    def destroy(self):
+        """Drops preference subscriptions and timers so callbacks never reach destroyed widgets."""
+        self._unsubscribe_prefs()
+        self.app_controller.scheduler.cancel_owner(self)
+        super().destroy()
@@ -0,0 +1,115 @@
+import queue
+import sys
+import threading
+from concurrent.futures import Future
+
+# How often (in ms) TkFuturePump checks for finished work while something is pending
+PUMP_INTERVAL_MS = 20
+
+
+class SerialWorker:
+    """
+    Runs submitted functions one at a time, in order, on a single background thread.
+    submit() returns a concurrent.futures.Future for the result.
+    """
+    def __init__(self, name="SerialWorker"):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None: # shutdown() marker
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue # Cancelled while it was waiting in the queue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self, wait=True):
+        """Finishes the work already queued, then stops the thread."""
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+
+class ImmediateWorker:
+    """
+    Same interface as SerialWorker, but runs everything right away on the calling thread.
+    Used for scripts and tests where there is no event loop to hand results back to.
+    """
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class TkFuturePump:
+    """
+    Hands finished futures back to the Tk thread.
+    Futures complete on a worker thread, where touching Tk is not allowed, so
+    watch() queues the callback and a short after() loop on 'widget' runs it.
+    The loop only runs while there is something pending.
+    """
+    def __init__(self, widget, interval_ms=PUMP_INTERVAL_MS):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self._done = queue.Queue()
+        self._pending = 0
+        self._poll_job = None
+
+    def watch(self, future, callback):
+        """Calls callback(future) on the Tk thread once 'future' is done."""
+        self._pending += 1
+        future.add_done_callback(lambda f: self._done.put((callback, f)))
+        if self._poll_job is None:
+            self._poll_job = self.widget.after(self.interval_ms, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        try:
+            while True:
+                try:
+                    callback, future = self._done.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending -= 1
+                try:
+                    callback(future)
+                except Exception:
+                    # Like an exception in a plain after() callback: report it and keep draining
+                    self.widget._root().report_callback_exception(*sys.exc_info())
+        finally:
+            if self._pending and self._poll_job is None:
+                self._poll_job = self.widget.after(self.interval_ms, self._poll)
+
+    def drain(self):
+        """Runs every callback that is ready right now (e.g. just before quitting)."""
+        if self._poll_job is not None:
+            self.widget.after_cancel(self._poll_job)
+        self._poll()
+
+
+class ImmediatePump:
+    """TkFuturePump stand-in without Tk: runs the callback as soon as the future is done."""
+    def watch(self, future, callback):
+        future.add_done_callback(callback)
+
+    def drain(self):
+        pass